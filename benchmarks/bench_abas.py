@@ -0,0 +1,117 @@
+"""
+Benchmark da leitura de workbooks com várias abas (leitura.abas): um
+workbook com uma aba por produto, cada uma com cabeçalhos diferentes, mais
+uma aba de resumo (sem número de apólice, que precisa ficar de fora).
+
+Compara a leitura aba a aba com pd.read_excel (reabre o arquivo a cada aba)
+com read_sheets (workbook aberto uma vez, e com processos auxiliares) e
+confere que processar o workbook dá o mesmo UNIQUE que processar as abas
+já juntadas à mão numa planilha só, nos modos agrupar e último.
+
+Uso:
+  python benchmarks/bench_abas.py --abas 4 --linhas 20000 --workers 4
+"""
+
+import argparse
+import copy
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import processa_seguradoras as ps  # noqa: E402
+from gerador import carregar_config, gerar_frame, gravar_arquivo  # noqa: E402
+
+
+def gerar_workbook(caminho: Path, abas: int, linhas: int, cfg: dict) -> pd.DataFrame:
+    """Grava o workbook e devolve as abas juntadas à mão (cabeçalhos da 1ª aba)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ps.append_frame_rows(wb.create_sheet("Resumo"), pd.DataFrame({"Produto": ["Garantia"], "Total": [linhas]}))
+    juntas, nomes_base = [], None
+    for i in range(abas):
+        df = gerar_frame(linhas, seed=100 + i, cfg=cfg)
+        ps.append_frame_rows(wb.create_sheet(f"Produto {i + 1}"), df)
+        colmap = ps.detect_columns(df, cfg["column_synonyms"])
+        nomes_base = nomes_base or colmap
+        juntas.append(df.rename(columns={colmap[c]: nomes_base[c] for c in colmap}))
+    wb.save(caminho)
+    return pd.concat(juntas, ignore_index=True)
+
+
+def medir(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def unique(saida: Path, stem: str, modo: str) -> pd.DataFrame:
+    return pd.read_excel(saida / f"{stem}__{modo}_automatico.xlsx", sheet_name="UNIQUE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de workbooks com várias abas")
+    parser.add_argument("--abas", type=int, default=4)
+    parser.add_argument("--linhas", type=int, default=20_000, help="Linhas por aba")
+    parser.add_argument("--workers", type=int, default=4, help="Processos da leitura paralela das abas")
+    args = parser.parse_args()
+
+    cfg = carregar_config()
+    cfg["cache"] = {"enabled": False}
+    cfg["consolidado"] = {"enabled": False}
+    cfg["output"] = dict(cfg.get("output") or {}, original_sheet="omitir")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        entrada = tmp / "entrada"
+        entrada.mkdir()
+        juntas = gerar_workbook(entrada / "SEGURADORA_abas.xlsx", args.abas, args.linhas, cfg)
+        path = entrada / "SEGURADORA_abas.xlsx"
+        print(f"{args.abas} abas x {args.linhas:,} linhas (+ aba de resumo)")
+
+        nomes = pd.ExcelFile(path, engine="openpyxl").sheet_names
+        t = medir(lambda: [pd.read_excel(path, sheet_name=n, engine="openpyxl") for n in nomes])
+        print(f"pd.read_excel aba a aba          {t:6.2f}s")
+        info = {}
+        t = medir(lambda: ps.read_sheets(path, "todas", info))
+        print(f"read_sheets (workbook aberto 1x) {t:6.2f}s | {info['linhas_por_aba']}")
+        t = medir(lambda: ps.read_sheets(path, "todas", {}, workers=args.workers))
+        print(f"read_sheets com {args.workers} processos      {t:6.2f}s")
+
+        for modo in ("agrupar", "ultimo"):
+            cfg_abas = copy.deepcopy(cfg)
+            cfg_abas["leitura"] = dict(cfg.get("leitura") or {}, abas="todas")
+            for stem, df in ((f"SEGURADORA_abas_{modo}", None), (f"SEGURADORA_juntas_{modo}", juntas)):
+                origem = entrada / f"{stem}.xlsx"
+                if df is None:
+                    origem.write_bytes(path.read_bytes())
+                else:
+                    gravar_arquivo(df, origem)
+            r_abas = ps.process_file(entrada / f"SEGURADORA_abas_{modo}.xlsx", tmp / "saida", cfg_abas)
+            r_juntas = ps.process_file(entrada / f"SEGURADORA_juntas_{modo}.xlsx", tmp / "saida", cfg)
+            cfg_blocos = copy.deepcopy(cfg_abas)
+            cfg_blocos["processamento"] = {"chunked": True, "chunk_linhas": max(1, args.linhas // 3)}
+            r_blocos = ps.process_file(entrada / f"SEGURADORA_abas_{modo}.xlsx", tmp / "blocos", cfg_blocos)
+            ref = unique(tmp / "saida", f"SEGURADORA_juntas_{modo}", modo)
+            iguais = ref.equals(unique(tmp / "saida", f"SEGURADORA_abas_{modo}", modo))
+            try:
+                # Em blocos a soma da IS pode diferir na última casa (ordem da soma)
+                pd.testing.assert_frame_equal(ref, unique(tmp / "blocos", f"SEGURADORA_abas_{modo}", modo),
+                                              check_exact=False, rtol=1e-12)
+            except AssertionError:
+                iguais = False
+            print(f"{modo:<8} linhas {r_juntas['linhas_entrada']:,} -> {r_juntas['linhas_saida']:,} | "
+                  f"abas ignoradas: {r_abas.get('abas_ignoradas')} (blocos: {r_blocos.get('abas_ignoradas')}) | "
+                  f"{'UNIQUE idêntico' if iguais else 'UNIQUE DIVERGENTE'}")
+            if not iguais:
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Equivalência + benchmark da detecção de colunas (detect_columns) com o
+matcher pré-compilado contra a implementação anterior, em cabeçalhos largos.
+
+Uso:
+  python benchmarks/bench_colunas.py --colunas 500 --repeticoes 200
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import processa_seguradoras as ps  # noqa: E402
+
+
+# ----------------------- Referência (implementação anterior) -----------------------
+
+def normalize_text_ref(s):
+    if s is None:
+        return ""
+    s = str(s)
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = s.lower()
+    s = re.sub(r"[\W_]+", " ", s, flags=re.UNICODE)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def detect_columns_ref(df, col_synonyms):
+    header_map = {normalize_text_ref(col): col for col in df.columns}
+    colmap = {}
+    for canon, variants in col_synonyms.items():
+        match = None
+        for v in variants:
+            nv = normalize_text_ref(v)
+            if nv in header_map:
+                match = header_map[nv]
+                break
+        if match is None:
+            for v in variants:
+                nv = normalize_text_ref(v)
+                for norm_col, orig_col in header_map.items():
+                    if nv and (nv in norm_col or norm_col in nv):
+                        match = orig_col
+                        break
+                if match is not None:
+                    break
+        if match:
+            colmap[canon] = match
+    return colmap
+
+
+# ----------------------- Cabeçalhos sintéticos -----------------------
+
+PALAVRAS = ["valor", "premio", "comissao", "corretor", "filial", "produto", "ramo", "cliente", "cnpj",
+            "tomador", "segurado", "modalidade", "objeto", "garantia", "codigo", "descricao", "regional",
+            "moeda", "taxa", "juros", "observacao", "usuario", "data carga", "lote", "sistema"]
+
+
+def cabecalho(n: int, synonyms: dict, seed: int) -> list:
+    rnd = random.Random(seed)
+    cols = []
+    # Algumas colunas reais (sinônimos com variações de caixa/acentos/sufixos)
+    for variants in synonyms.values():
+        if rnd.random() < 0.7:
+            v = rnd.choice(variants)
+            cols.append(rnd.choice([v, v.upper(), v.title(), f"{v} (R$)", f"{v}_ref"]))
+    while len(cols) < n:
+        cols.append(" ".join(rnd.sample(PALAVRAS, rnd.randint(1, 3))) + f" {len(cols)}")
+    rnd.shuffle(cols)
+    return cols[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de detect_columns em cabeçalhos largos")
+    parser.add_argument("--colunas", type=int, default=500)
+    parser.add_argument("--repeticoes", type=int, default=200, help="Nº de cabeçalhos (arquivos) diferentes")
+    args = parser.parse_args()
+
+    with open(ROOT / "config.json", "r", encoding="utf-8") as f:
+        synonyms = json.load(f)["column_synonyms"]
+    frames = [pd.DataFrame(columns=cabecalho(args.colunas, synonyms, seed)) for seed in range(args.repeticoes)]
+    frames.append(pd.DataFrame(columns=["%%", "outra"]))  # cabeçalho que normaliza para ""
+
+    diferentes = sum(detect_columns_ref(df, synonyms) != ps.detect_columns(df, synonyms) for df in frames)
+    print(f"Equivalência: {len(frames) - diferentes}/{len(frames)} cabeçalhos com o mesmo mapeamento")
+    if diferentes:
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    for df in frames:
+        detect_columns_ref(df, synonyms)
+    t_ref = time.perf_counter() - t0
+
+    ps._normalize_str.cache_clear()
+    ps._COMPILED_SYNONYMS.clear()
+    t0 = time.perf_counter()
+    for df in frames:
+        ps.detect_columns(df, synonyms)
+    t_novo = time.perf_counter() - t0
+
+    # Mesmos cabeçalhos de novo (ex.: arquivo do mês seguinte da mesma seguradora)
+    t0 = time.perf_counter()
+    for df in frames:
+        ps.detect_columns(df, synonyms)
+    t_quente = time.perf_counter() - t0
+
+    n = len(frames)
+    print(f"{n} cabeçalhos x {args.colunas} colunas")
+    print(f"  anterior          : {t_ref:8.3f} s ({1000 * t_ref / n:6.2f} ms/arquivo)")
+    print(f"  compilado         : {t_novo:8.3f} s ({1000 * t_novo / n:6.2f} ms/arquivo)  {t_ref / t_novo:5.1f}x")
+    print(f"  compilado (quente): {t_quente:8.3f} s ({1000 * t_quente / n:6.2f} ms/arquivo)  {t_ref / t_quente:5.1f}x")
+
+    trace = {}
+    ps.detect_columns(frames[0], synonyms, trace=trace)
+    print("\nRegras aplicadas no 1º cabeçalho:\n  " + ps.format_column_rules(trace).replace("; ", "\n  "))
+
+
+if __name__ == "__main__":
+    main()
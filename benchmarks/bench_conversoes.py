@@ -0,0 +1,150 @@
+"""
+Equivalência + micro-benchmark de br_number_to_float_series e
+recompute_status_by_dates contra as implementações antigas (apply/iterrows).
+
+Uso:
+  python benchmarks/bench_conversoes.py --linhas 1000000
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import processa_seguradoras as ps  # noqa: E402
+
+
+# ----------------------- Referências (implementação anterior) -----------------------
+
+def br_number_to_float_series_ref(s: pd.Series) -> pd.Series:
+    def conv(x):
+        if pd.isna(x):
+            return np.nan
+        txt = str(x)
+        txt = re.sub(r"[^0-9,.-]", "", txt)
+        txt = txt.strip()
+        if "," in txt and "." in txt:
+            txt = txt.replace(".", "")
+        txt = txt.replace(",", ".")
+        try:
+            return float(txt)
+        except Exception:
+            return np.nan
+    return s.apply(conv)
+
+
+def recompute_status_by_dates_ref(df, col_fim, out_col="status_automatico", today_override=None):
+    today = pd.Timestamp(today_override.date()) if today_override is not None else pd.Timestamp(datetime.now().date())
+    status = []
+    for _, row in df.iterrows():
+        fim = row[col_fim] if col_fim in df.columns else pd.NaT
+        if pd.notna(fim):
+            status.append("VIGENTE" if today <= fim else "VENCIDA")
+        else:
+            status.append(None)
+    df[out_col] = status
+    return df
+
+
+# ----------------------- Casos de equivalência -----------------------
+
+def casos_numeros():
+    rnd = random.Random(1)
+    aleatorios = ["".join(rnd.choice("0123456789,.-R$ a") for _ in range(rnd.randint(0, 20))) for _ in range(50_000)]
+    floats = np.concatenate([
+        10 ** np.random.default_rng(1).uniform(-8, 22, 5_000),
+        -10 ** np.random.default_rng(2).uniform(-8, 22, 5_000),
+        [0.0, -0.0, np.inf, -np.inf, np.nan, 1e16, 1e-4, 9.999e-5],
+    ])
+    especiais = ["1.234,56", "1,5", "1.5", "-", "", ".", "1.", ".5", "R$ 1.234.567,89", "abc", None, np.nan,
+                 1234.5, 1e20, True, "1-2", "--1", "1.2.3", "12345678901234567890", 7, "0,0", "-0",
+                 "1,2,3", ",5", "-,5", pd.NA, pd.NaT]
+    return {
+        "texto aleatório": pd.Series(aleatorios),
+        "texto com índice repetido": pd.Series(aleatorios[:1000], index=[7] * 1000),
+        "float64": pd.Series(floats),
+        "float como object": pd.Series(floats.astype(object)),
+        "int64": pd.Series(np.arange(-500, 500)),
+        "Int64 com NA": pd.Series([1, None, 3], dtype="Int64"),
+        "casos especiais": pd.Series(especiais, dtype=object),
+        "tudo NaN": pd.Series([np.nan] * 5),
+    }
+
+
+def frame_datas(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    fim = pd.Series(pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 900, n), unit="D"))
+    fim[rng.random(n) < 0.1] = pd.NaT
+    return pd.DataFrame({"num_apolice": np.arange(n), "data_fim_vigencia": fim})
+
+
+def verificar_equivalencia() -> bool:
+    ok = True
+    for nome, s in casos_numeros().items():
+        igual = br_number_to_float_series_ref(s).equals(ps.br_number_to_float_series(s))
+        ok &= igual
+        print(f"  br_number_to_float_series [{nome}]: {'ok' if igual else 'DIFERENTE'}")
+
+    ref = pd.Timestamp("2025-09-30")
+    df = frame_datas(20_000)
+    for nome, col in [("com data fim", "data_fim_vigencia"), ("sem coluna fim", "inexistente")]:
+        a = recompute_status_by_dates_ref(df.copy(), col, today_override=ref)
+        b = ps.recompute_status_by_dates(df.copy(), col, today_override=ref)
+        igual = a.equals(b)
+        ok &= igual
+        print(f"  recompute_status_by_dates [{nome}]: {'ok' if igual else 'DIFERENTE'}")
+    return ok
+
+
+# ----------------------- Benchmark -----------------------
+
+def cronometrar(fn, *args, **kwargs) -> float:
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Equivalência e benchmark das conversões vetorizadas")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--pular-referencia", action="store_true", help="Não cronometra a versão antiga (lenta)")
+    args = parser.parse_args()
+
+    print("Equivalência:")
+    if not verificar_equivalencia():
+        sys.exit(1)
+
+    n = args.linhas
+    rng = np.random.default_rng(0)
+    valores = rng.uniform(1, 5_000_000, n)
+    textos = pd.Series([f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") for v in valores])
+    numericos = pd.Series(valores)
+    ref = pd.Timestamp("2025-09-30")
+    datas = frame_datas(n)
+
+    print(f"\nBenchmark ({n:,} linhas):")
+    casos = [
+        ("br_number_to_float_series (texto '1.234,56')", br_number_to_float_series_ref, ps.br_number_to_float_series, (textos,), {}),
+        ("br_number_to_float_series (float64)", br_number_to_float_series_ref, ps.br_number_to_float_series, (numericos,), {}),
+        ("recompute_status_by_dates", recompute_status_by_dates_ref, ps.recompute_status_by_dates,
+         (datas, "data_fim_vigencia"), {"today_override": ref}),
+    ]
+    for nome, antigo, novo, a, kw in casos:
+        t_novo = cronometrar(novo, *a, **kw)
+        if args.pular_referencia:
+            print(f"  {nome:<48} novo {t_novo:7.3f} s")
+            continue
+        t_antigo = cronometrar(antigo, *a, **kw)
+        print(f"  {nome:<48} antigo {t_antigo:7.3f} s | novo {t_novo:7.3f} s | {t_antigo / t_novo:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
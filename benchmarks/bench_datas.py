@@ -0,0 +1,89 @@
+"""
+Equivalência + benchmark da conversão de datas (parse_date_series): formato
+inferido por amostra e aplicado em uma passada, contra a chamada anterior
+pd.to_datetime(errors="coerce", dayfirst=True), em colunas de 1 milhão de linhas.
+
+Colunas com um formato só precisam dar exatamente o mesmo resultado. Nas
+colunas mistas, a versão anterior aplicava o formato da 1ª linha e perdia as
+demais (NaT); aqui confere-se que tudo o que ela convertia continua igual e
+conta-se quantas linhas passaram a ser aproveitadas.
+
+Uso:
+  python benchmarks/bench_datas.py --linhas 1000000
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import processa_seguradoras as ps  # noqa: E402
+from gerador import _formatar_datas  # noqa: E402
+
+
+def parse_date_series_ref(s):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return pd.to_datetime(s, errors="coerce", dayfirst=True)
+
+
+def colunas(linhas: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    datas = pd.Series(pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 4000, linhas), unit="D"))
+    vazios = rng.random(linhas) < 0.02
+    def com_vazios(s):
+        s = s.astype(object)
+        s[vazios] = None
+        return s
+    return {
+        "dd/mm/aaaa": (com_vazios(datas.dt.strftime("%d/%m/%Y")), True),
+        "aaaa-mm-dd": (com_vazios(datas.dt.strftime("%Y-%m-%d")), True),
+        "dd/mm/aa": (com_vazios(datas.dt.strftime("%d/%m/%y")), True),
+        "dd/mm/aaaa hh:mm:ss": (com_vazios((datas + pd.to_timedelta(rng.integers(0, 86400, linhas), unit="s")).dt.strftime("%d/%m/%Y %H:%M:%S")), True),
+        "misto 95/5": (_formatar_datas(datas, rng, "%d/%m/%Y", 0.05), False),
+        "misto 70/30": (_formatar_datas(datas, rng, "%d/%m/%Y", 0.30), False),
+        "misto ISO 95/5": (_formatar_datas(datas, rng, "%Y-%m-%d", 0.05), False),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da conversão de datas")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    falhas = 0
+    for nome, (s, formato_unico) in colunas(args.linhas).items():
+        t0 = time.perf_counter()
+        ref = parse_date_series_ref(s)
+        t_ref = time.perf_counter() - t0
+        info = {}
+        t0 = time.perf_counter()
+        novo = ps.parse_date_series(s, info)
+        t_novo = time.perf_counter() - t0
+
+        ref_us = ref.astype("datetime64[us]")
+        convertia = ref_us.notna().to_numpy()
+        mesmos = bool((ref_us[convertia] == novo[convertia]).all())
+        if formato_unico:
+            ok = mesmos and novo.isna().equals(ref_us.isna())
+        else:
+            ok = mesmos
+        falhas += not ok
+        recuperadas = int((novo.notna() & ref_us.isna()).sum())
+        print(f"{nome:<20} anterior {t_ref:7.2f}s | novo {t_novo:6.2f}s ({t_ref / t_novo:5.1f}x) | "
+              f"{'idêntico' if ok else 'DIVERGENTE'} | recuperadas {recuperadas:,} | "
+              f"não convertidas {info['nao_convertidas']:,} | formatos {info['formatos']}")
+    if falhas:
+        raise SystemExit(f"{falhas} coluna(s) com resultado divergente")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark de várias datas de referência: rodar o script uma vez por data
+(como se fazia para comparar fim de trimestre, fim de ano e hoje) contra
+uma única execução com --data d1 d2 ... dN, que acrescenta uma coluna
+status_automatico_AAAA_MM_DD por data. Confere que cada coluna é igual ao
+status_automatico da execução com aquela data sozinha.
+
+Uso:
+  python benchmarks/bench_datas_referencia.py --arquivos 4 --linhas 50000
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import processa_seguradoras as ps  # noqa: E402
+from gerador import gerar_pasta  # noqa: E402
+
+DATAS = ["30/09/2025", "31/12/2025", "31/03/2026", "30/06/2026"]
+
+
+def rodar(entrada: Path, saida: Path, datas: list) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, str(ROOT / "processa_seguradoras.py"), "-i", str(entrada), "-o", str(saida),
+                    "-c", str(ROOT / "config.json"), "--no-cache", "--data", *datas],
+                   check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de várias datas de referência numa execução")
+    parser.add_argument("--arquivos", type=int, default=4)
+    parser.add_argument("--linhas", type=int, default=50_000)
+    parser.add_argument("--datas", type=int, default=len(DATAS), help=f"Quantas datas (até {len(DATAS)})")
+    args = parser.parse_args()
+    datas = DATAS[: args.datas]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        entrada = tmp / "entrada"
+        gerar_pasta(entrada, args.arquivos, args.linhas)
+
+        t_separadas = sum(rodar(entrada, tmp / f"data_{i}", [d]) for i, d in enumerate(datas))
+        t_unica = rodar(entrada, tmp / "todas", datas)
+        print(f"{len(datas)} execuções, uma por data: {t_separadas:6.2f}s")
+        print(f"1 execução com {len(datas)} datas:     {t_unica:6.2f}s ({t_separadas / t_unica:.1f}x)")
+
+        divergentes = 0
+        for saida in sorted((tmp / "todas").glob("*__*.xlsx")):
+            todas = pd.read_excel(saida, sheet_name="UNIQUE")
+            for i, d in enumerate(datas):
+                sozinha = pd.read_excel(tmp / f"data_{i}" / saida.name, sheet_name="UNIQUE")
+                coluna = ps.status_column_name(ps.parse_reference_date(d))
+                divergentes += not todas[coluna].equals(sozinha["status_automatico"])
+        print("status idênticos às execuções separadas" if not divergentes else f"{divergentes} colunas DIVERGENTES")
+        if divergentes:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
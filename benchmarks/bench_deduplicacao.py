@@ -0,0 +1,154 @@
+"""
+Benchmark da deduplicação das linhas brutas: raw.drop_duplicates em todas as
+colunas (como era) contra deduplicate_rows (impressão digital de 64 bits
+acumulada coluna a coluna, com o duplicated exato só nas candidatas), e com
+deduplicacao.colunas limitado a algumas colunas (abaixo de DEDUP_FINGERPRINT_MIN_ROWS
+linhas ou DEDUP_FINGERPRINT_MIN_COLS colunas deduplicate_rows usa o
+duplicated direto).
+
+Antes de medir, confere em casos pequenos e aleatórios (object misturado,
+-0.0, NaN/None, texto vazio, datas) que duplicate_rows marca exatamente as
+mesmas linhas que DataFrame.duplicated, e depois que process_file com
+linhas repetidas dá o mesmo UNIQUE do arquivo sem elas e informa quantas
+saíram no resumo.
+
+Uso:
+  python benchmarks/bench_deduplicacao.py --linhas 200000 --extras 40 --repetidas 5000
+"""
+
+import argparse
+import copy
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import processa_seguradoras as ps  # noqa: E402
+from gerador import carregar_config, gerar_frame, gravar_arquivo  # noqa: E402
+
+VALORES = np.array(["A", "B", "", None, np.nan, 1, 1.0, 2.5, -0.0, 0.0], dtype=object)
+
+
+def aleatorio(rng, n: int, colunas: int) -> pd.DataFrame:
+    """Poucos valores distintos por coluna, para sobrar bastante linha repetida."""
+    df = pd.DataFrame({f"c{j}": rng.choice(VALORES[: int(rng.integers(2, len(VALORES) + 1))], n)
+                       for j in range(colunas)})
+    df["num"] = rng.choice([0.0, -0.0, np.nan, 1.5], n)
+    df["data"] = pd.Series(pd.to_datetime(rng.choice(["2025-01-01", "2025-06-30", None], n)))
+    df["texto"] = pd.Series(rng.choice(["x", "y", None], n)).astype("str")
+    return df
+
+
+def verificar(casos: int = 300, seed: int = 0):
+    # Casos pequenos cairiam no duplicated direto: força a impressão digital
+    limites = ps.DEDUP_FINGERPRINT_MIN_ROWS, ps.DEDUP_FINGERPRINT_MIN_COLS
+    ps.DEDUP_FINGERPRINT_MIN_ROWS = ps.DEDUP_FINGERPRINT_MIN_COLS = 0
+    try:
+        _verificar(casos, seed)
+    finally:
+        ps.DEDUP_FINGERPRINT_MIN_ROWS, ps.DEDUP_FINGERPRINT_MIN_COLS = limites
+
+
+def _verificar(casos: int, seed: int):
+    rng = np.random.default_rng(seed)
+    for i in range(casos):
+        df = aleatorio(rng, int(rng.integers(0, 300)), int(rng.integers(1, 5)))
+        subset = list(rng.choice(df.columns, int(rng.integers(1, len(df.columns) + 1)), replace=False)) \
+            if i % 2 else None
+        ref = df.duplicated(subset=subset, keep="first").to_numpy()
+        novo = ps.duplicate_rows(df, subset)
+        if not np.array_equal(ref, novo):
+            raise SystemExit(f"DIVERGÊNCIA no caso {i} (subset={subset}):\n{df[ref != novo]}")
+    print(f"equivalência: {casos} casos aleatórios OK")
+
+
+def verificar_resumo(cfg: dict, linhas: int, repetidas: int):
+    cfg = copy.deepcopy(cfg)
+    cfg["cache"] = {"enabled": False}
+    cfg["consolidado"] = {"enabled": False}
+    cfg["output"] = dict(cfg.get("output") or {}, original_sheet="omitir")
+    df = gerar_frame(linhas, seed=7, cfg=cfg)
+    com_repetidas = pd.concat([df, df.sample(repetidas, random_state=7)], ignore_index=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        gravar_arquivo(df, tmp / "SEGURADORA_limpa_agrupar.xlsx")
+        gravar_arquivo(com_repetidas, tmp / "SEGURADORA_repetida_agrupar.xlsx")
+        r_limpa = ps.process_file(tmp / "SEGURADORA_limpa_agrupar.xlsx", tmp / "saida", cfg)
+        r_rep = ps.process_file(tmp / "SEGURADORA_repetida_agrupar.xlsx", tmp / "saida", cfg)
+        cfg_blocos = copy.deepcopy(cfg)
+        cfg_blocos["processamento"] = {"chunked": True, "chunk_linhas": max(1, linhas // 3)}
+        r_blocos = ps.process_file(tmp / "SEGURADORA_repetida_agrupar.xlsx", tmp / "blocos", cfg_blocos)
+
+        def unique(pasta, stem):
+            return pd.read_excel(pasta / f"{stem}_agrupar__agrupar_automatico.xlsx", sheet_name="UNIQUE")
+
+        ref = unique(tmp / "saida", "SEGURADORA_limpa")
+        iguais = ref.equals(unique(tmp / "saida", "SEGURADORA_repetida"))
+        try:
+            # Em blocos a soma da IS pode diferir na última casa (ordem da soma)
+            pd.testing.assert_frame_equal(ref, unique(tmp / "blocos", "SEGURADORA_repetida"),
+                                          check_exact=False, rtol=1e-12)
+        except AssertionError:
+            iguais = False
+    print(f"resumo: {r_rep['duplicadas_removidas']:,} removidas (blocos: {r_blocos['duplicadas_removidas']:,}, "
+          f"arquivo limpo: {r_limpa['duplicadas_removidas']}) | exemplos: {r_rep.get('exemplos_duplicadas')} | "
+          f"{'UNIQUE idêntico' if iguais else 'UNIQUE DIVERGENTE'}")
+    # O gerador já repete algumas linhas; as acrescentadas aqui saem todas
+    if (not iguais or r_rep["duplicadas_removidas"] != r_limpa["duplicadas_removidas"] + repetidas
+            or r_blocos["duplicadas_removidas"] != r_rep["duplicadas_removidas"]):
+        raise SystemExit(1)
+
+
+def medir(fn, repeticoes: int = 3):
+    melhor, r = float("inf"), None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        r = fn()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor, r
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da deduplicação das linhas brutas")
+    parser.add_argument("--linhas", type=int, default=200_000)
+    parser.add_argument("--extras", type=int, default=40, help="Colunas object extras (planilha larga)")
+    parser.add_argument("--repetidas", type=int, default=5_000, help="Linhas repetidas acrescentadas")
+    parser.add_argument("--casos", type=int, default=300, help="Casos aleatórios do teste de equivalência")
+    args = parser.parse_args()
+
+    cfg = carregar_config()
+    verificar(args.casos)
+    verificar_resumo(cfg, min(args.linhas, 20_000), min(args.repetidas, 500))
+
+    rng = np.random.default_rng(0)
+    df = gerar_frame(args.linhas, seed=1, cfg=cfg)
+    for i in range(args.extras):
+        df[f"extra_{i}"] = rng.choice(np.array(["A", "B", None, 1, 2.5], dtype=object), len(df))
+    df = pd.concat([df, df.sample(args.repetidas, random_state=1)], ignore_index=True)
+    colmap = ps.detect_columns(df, cfg["column_synonyms"])
+    subset = ps.dedup_columns(df.columns, ["num_apolice", "num_endosso", "data_emissao", "is"],
+                              [colmap])
+    print(f"{len(df):,} linhas x {df.shape[1]} colunas, {args.repetidas:,} repetidas")
+
+    t_ref, ref = medir(lambda: df.drop_duplicates(ignore_index=True))
+    t_novo, (novo, info) = medir(lambda: ps.deduplicate_rows(df, chaves=[colmap["num_apolice"]]))
+    print(f"drop_duplicates (todas)          {t_ref:6.2f}s")
+    print(f"deduplicate_rows (todas)         {t_novo:6.2f}s ({t_ref / t_novo:.1f}x) | "
+          f"{info['duplicadas_removidas']:,} removidas | {'mesmas linhas' if ref.equals(novo) else 'DIVERGENTE'}")
+    t_sub, (sub, info_sub) = medir(lambda: ps.deduplicate_rows(df, subset, chaves=[colmap["num_apolice"]]))
+    ref_sub = df.drop_duplicates(subset=subset, ignore_index=True)
+    print(f"deduplicate_rows ({len(subset)} colunas)     {t_sub:6.2f}s ({t_ref / t_sub:.1f}x) | "
+          f"{info_sub['duplicadas_removidas']:,} removidas | {'mesmas linhas' if ref_sub.equals(sub) else 'DIVERGENTE'}")
+    if not (ref.equals(novo) and ref_sub.equals(sub)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
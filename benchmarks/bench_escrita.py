@@ -0,0 +1,87 @@
+"""
+Benchmark da escrita dos xlsx de saída: tempo e pico de memória (RSS) de cada
+writer / opção da aba "original". Cada variante roda em um processo separado
+para que o pico de memória de uma não contamine a outra.
+
+Uso:
+  python benchmarks/bench_escrita.py --linhas 200000
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+VARIANTES = [
+    ("openpyxl", "incluir"),
+    ("streaming", "incluir"),
+    ("streaming", "separado"),
+    ("streaming", "omitir"),
+]
+
+
+def pico_rss_mb() -> float:
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def filho(frames: Path, saida: Path, writer: str, original: str):
+    """Executado no subprocesso: lê os frames e grava uma vez com a variante pedida."""
+    import pandas as pd
+    import processa_seguradoras as ps
+
+    raw = pd.read_pickle(frames / "raw.pkl")
+    result = pd.read_pickle(frames / "result.pkl")
+    antes = pico_rss_mb()
+    cfg = {"output": {"writer": writer, "original_sheet": original}}
+    t0 = time.perf_counter()
+    saidas = ps.write_outputs(saida, "BENCH", "ultimo", result, raw, cfg)
+    tempo = time.perf_counter() - t0
+    tamanho = sum(Path(p).stat().st_size for p in saidas.values())
+    print(json.dumps({"tempo_s": tempo, "rss_antes_mb": antes, "rss_pico_mb": pico_rss_mb(), "bytes": tamanho}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos writers de saída")
+    parser.add_argument("--linhas", type=int, default=200_000)
+    parser.add_argument("--_filho", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._filho:
+        frames, saida, writer, original = args._filho
+        filho(Path(frames), Path(saida), writer, original)
+        return
+
+    import processa_seguradoras as ps
+    from gerador import gerar_frame
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"Gerando {args.linhas:,} linhas…")
+        raw = gerar_frame(args.linhas)
+        result = raw.rename(columns={"Nº Apólice": "num_apolice"}).drop_duplicates(subset=["num_apolice"])
+        result["is"] = ps.br_number_to_float_series(result["Vl IS"])
+        raw.to_pickle(tmp / "raw.pkl")
+        result.to_pickle(tmp / "result.pkl")
+
+        print(f"{'writer':<10} {'original':<9} {'tempo (s)':>10} {'Δ RSS (MB)':>11} {'pico (MB)':>10} {'saída (MB)':>11}")
+        for writer, original in VARIANTES:
+            out = subprocess.run(
+                [sys.executable, __file__, "--_filho", str(tmp), str(tmp / f"{writer}_{original}"), writer, original],
+                check=True, capture_output=True, text=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{writer:<10} {original:<9} {r['tempo_s']:>10.2f} {r['rss_pico_mb'] - r['rss_antes_mb']:>11.1f} "
+                  f"{r['rss_pico_mb']:>10.1f} {r['bytes'] / 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
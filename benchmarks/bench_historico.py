@@ -0,0 +1,151 @@
+"""
+Benchmark do histórico em SQLite: simula um ano de execuções (várias por dia,
+dezenas de arquivos cada), grava como os CSV antigos e como historico.sqlite
+(com a importação dos CSV) e compara as consultas do dia a dia: lendo o CSV
+inteiro com pandas contra as consultas indexadas do consulta_historico.py.
+No fim, vários processos gravam no mesmo banco ao mesmo tempo e confere-se
+que nenhuma linha se perdeu.
+
+Uso:
+  python benchmarks/bench_historico.py --dias 365 --execucoes-dia 4 --arquivos 60
+"""
+
+import argparse
+import multiprocessing as mp
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import consulta_historico as ch  # noqa: E402
+import processa_seguradoras as ps  # noqa: E402
+from gerador import SEGURADORAS, carregar_config  # noqa: E402
+
+
+def historico_csv(pasta: Path, dias: int, por_dia: int, arquivos: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    execucoes, linhas = [], []
+    inicio = pd.Timestamp("2025-01-01 08:00")
+    for d in range(dias):
+        for k in range(por_dia):
+            run_id = str(uuid.UUID(int=int(rng.integers(0, 2**63)) << 64 | d * 100 + k))
+            quando = inicio + pd.Timedelta(days=d, hours=2 * k, seconds=int(rng.integers(0, 3600)))
+            erros = 0
+            for i in range(arquivos):
+                status = "ok" if rng.random() > 0.03 else "erro_leitura"
+                erros += status != "ok"
+                entrada = int(rng.integers(1_000, 200_000))
+                linhas.append({
+                    "run_id": run_id, "arquivo": f"{SEGURADORAS[i % len(SEGURADORAS)]}_{i:03d}.xlsx",
+                    "modo": "agrupar" if i % 2 else "ultimo", "status": status,
+                    "linhas_entrada": entrada if status == "ok" else None,
+                    "linhas_saida": entrada // 4 if status == "ok" else None,
+                    "t_total_s": round(float(rng.random() * 20), 3),
+                })
+            execucoes.append({"run_id": run_id, "data_execucao": quando, "data_referencia_status": quando.normalize(),
+                              "total_arquivos_encontrados": arquivos, "total_processados_ok": arquivos - erros,
+                              "total_erros": erros, "total_cancelados": 0})
+    pasta.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(execucoes).to_csv(pasta / "execucoes.csv", index=False)
+    pd.DataFrame(linhas).to_csv(pasta / "arquivos.csv", index=False)
+    return len(execucoes), len(linhas)
+
+
+def consultas_csv(pasta: Path, cfg: dict) -> dict:
+    """Como se respondia antes: lendo os dois CSV inteiros."""
+    def ultimo_ok():
+        ex = pd.read_csv(pasta / "execucoes.csv")
+        arq = pd.read_csv(pasta / "arquivos.csv").merge(ex[["run_id", "data_execucao"]], on="run_id")
+        arq["seguradora"] = arq["arquivo"].map(lambda a: ps.insurer_name(a, cfg))
+        ok = arq[arq["status"] == "ok"].sort_values("data_execucao")
+        return ok.groupby("seguradora").tail(1)
+
+    def tendencia():
+        ex = pd.read_csv(pasta / "execucoes.csv")
+        arq = pd.read_csv(pasta / "arquivos.csv").merge(ex[["run_id", "data_execucao"]], on="run_id")
+        return arq[arq["arquivo"].str.contains("AXA")].sort_values("data_execucao").tail(50)
+
+    return {"ultimo-ok": ultimo_ok, "tendencia AXA": tendencia}
+
+
+def consultas_sqlite(pasta: Path) -> dict:
+    def rodar(nome, params=()):
+        conn = ch.conectar(pasta)
+        try:
+            return conn.execute(ch.consulta(conn, nome), params).fetchall()
+        finally:
+            conn.close()
+
+    return {
+        "ultimo-ok": lambda: rodar("ultimo-ok"),
+        "tendencia AXA": lambda: rodar("tendencia", ("AXA", 50)),
+    }
+
+
+def medir(fn, repeticoes: int = 3) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def _gravador(pasta: str, n: int, cfg: dict):
+    for _ in range(n):
+        run_id = str(uuid.uuid4())
+        ps.write_history(Path(pasta), {"run_id": run_id, "data_execucao": pd.Timestamp.now()},
+                         [{"run_id": run_id, "arquivo": "AXA_concorrente.xlsx", "status": "ok"}], cfg)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do histórico em SQLite")
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--execucoes-dia", dest="por_dia", type=int, default=4)
+    parser.add_argument("--arquivos", type=int, default=60)
+    parser.add_argument("--processos", type=int, default=4, help="Gravadores simultâneos no teste de concorrência")
+    args = parser.parse_args()
+
+    cfg = carregar_config()
+    with tempfile.TemporaryDirectory() as tmp:
+        pasta = Path(tmp)
+        n_exec, n_arq = historico_csv(pasta, args.dias, args.por_dia, args.arquivos)
+        tamanho_csv = sum((pasta / n).stat().st_size for n in ("execucoes.csv", "arquivos.csv")) / 1e6
+        t0 = time.perf_counter()
+        ps.open_history(pasta, cfg).close()
+        print(f"{n_exec:,} execuções / {n_arq:,} linhas por arquivo ({tamanho_csv:.1f} MB de CSV); "
+              f"importação para SQLite: {time.perf_counter() - t0:.2f}s")
+
+        antes, depois = consultas_csv(pasta, cfg), consultas_sqlite(pasta)
+        for nome in antes:
+            t_csv, t_sql = medir(antes[nome]), medir(depois[nome])
+            print(f"{nome:<14} CSV + pandas {t_csv * 1000:8.1f} ms | SQLite {t_sql * 1000:6.2f} ms ({t_csv / t_sql:,.0f}x)")
+
+        por_processo = 50
+        t0 = time.perf_counter()
+        procs = [mp.Process(target=_gravador, args=(str(pasta), por_processo, cfg)) for _ in range(args.processos)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        conn = sqlite3.connect(pasta / ps.HISTORY_DB_NAME)
+        gravadas = conn.execute("SELECT COUNT(*) FROM arquivos WHERE arquivo = 'AXA_concorrente.xlsx'").fetchone()[0]
+        conn.close()
+        esperado = args.processos * por_processo
+        print(f"concorrência: {args.processos} processos x {por_processo} execuções em {time.perf_counter() - t0:.1f}s -> "
+              f"{gravadas}/{esperado} gravadas")
+        if gravadas != esperado or any(p.exitcode for p in procs):
+            raise SystemExit("gravações concorrentes perdidas ou com erro")
+
+
+if __name__ == "__main__":
+    main()
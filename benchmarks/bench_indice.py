@@ -0,0 +1,77 @@
+"""
+Benchmark do índice consolidado de apólices: monta o índice a partir de
+fatias sintéticas (várias seguradoras) e mede o tempo de consulta por número.
+
+Uso:
+  python benchmarks/bench_indice.py --seguradoras 20 --apolices 100000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import processa_seguradoras as ps  # noqa: E402
+
+
+def resultado_sintetico(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    fim = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 900, n), unit="D")
+    df = pd.DataFrame({
+        "num_apolice": rng.choice(np.arange(1, 5 * n), n, replace=False),
+        "is": rng.uniform(1_000, 5_000_000, n).round(2),
+        "data_fim_vigencia": fim,
+    })
+    return ps.finalize_result(df, pd.Timestamp("2025-09-30"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice consolidado")
+    parser.add_argument("--seguradoras", type=int, default=20)
+    parser.add_argument("--apolices", type=int, default=100_000, help="Apólices por seguradora")
+    parser.add_argument("--consultas", type=int, default=10_000)
+    args = parser.parse_args()
+
+    cfg = {"rules": {"insurer_patterns": []}, "consolidado": {"enabled": True, "formato": "feather"}}
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        t0 = time.perf_counter()
+        resumos = []
+        for i in range(args.seguradoras):
+            nome = f"SEGURADORA_{i:02d}.xlsx"
+            parte = ps.write_consolidation_part(out_dir, Path(nome).stem, nome, "agrupar",
+                                                resultado_sintetico(args.apolices, i), cfg)
+            resumos.append({"status": "ok", "parte_consolidado": parte})
+        t_partes = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        info = ps.build_consolidated_index(out_dir, resumos, cfg)
+        t_indice = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        indice = ps.load_policy_index(out_dir)
+        t_carga = time.perf_counter() - t0
+
+        rnd = random.Random(0)
+        numeros = [str(rnd.randint(1, 5 * args.apolices)) for _ in range(args.consultas)]
+        t0 = time.perf_counter()
+        achadas = sum(len(indice.lookup(n)) > 0 for n in numeros)
+        t_consulta = time.perf_counter() - t0
+
+    print(f"Índice: {len(indice):,} linhas, {info['apolices']:,} apólices ({Path(info['indice']).suffix[1:]})")
+    print(f"  gravar fatias : {t_partes:7.2f} s")
+    print(f"  montar índice : {t_indice:7.2f} s")
+    print(f"  carregar      : {t_carga:7.3f} s")
+    print(f"  consulta      : {1000 * t_consulta / args.consultas:7.3f} ms/apólice ({achadas}/{args.consultas} encontradas)")
+
+
+if __name__ == "__main__":
+    main()
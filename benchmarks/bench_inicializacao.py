@@ -0,0 +1,119 @@
+"""
+Benchmark da inicialização do script: quanto tempo passa até a primeira
+planilha ser tocada. Mede, em processos novos (mediana de N execuções):
+import do módulo, --help (pelo caminho do script, que é recompilado a cada
+execução, e com python -m, que usa o .pyc), erro de uso, --validate-config
+(que grava o config compilado, config.json.compilado) e, para comparação, o
+import do pandas (que antes acontecia sempre, no topo do módulo).
+
+Também mede, no mesmo processo, ler e compilar o config.json (JSON,
+validação, sinônimos normalizados e regras) contra carregar o artefato, e
+confere que --validate-config não importa o pandas.
+
+Uso:
+  python benchmarks/bench_inicializacao.py --repeticoes 7
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import processa_seguradoras as ps  # noqa: E402
+
+SCRIPT = str(ROOT / "processa_seguradoras.py")
+MODULO = ["-m", "processa_seguradoras"]
+
+
+def medir_processo(cmd: list, repeticoes: int, antes=None) -> float:
+    """Mediana do tempo de parede de `cmd` (ms); `antes` roda antes de cada execução, fora da medição."""
+    # Com PYTHONDONTWRITEBYTECODE o módulo seria recompilado a cada execução (não é o caso na instalação)
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    subprocess.run(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # aquece o .pyc
+    tempos = []
+    for _ in range(repeticoes):
+        if antes is not None:
+            antes()
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+
+def medir(fn, repeticoes: int = 50) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor * 1000
+
+
+def limpar_compilados():
+    ps._COMPILED_SYNONYMS.clear()
+    ps._COMPILED_RULES.clear()
+    ps._normalize_str.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização do script")
+    parser.add_argument("--repeticoes", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg_path = Path(tmp) / "config.json"
+        shutil.copy(ROOT / "config.json", cfg_path)
+        artefato = ps.config_artifact_path(cfg_path)
+        py = sys.executable
+        n = args.repeticoes
+
+        linhas = [
+            ("python vazio", medir_processo([py, "-c", "pass"], n)),
+            ("import pandas (antes: sempre)", medir_processo([py, "-c", "import pandas"], n)),
+            ("import processa_seguradoras", medir_processo([py, "-c", "import processa_seguradoras"], n)),
+            ("--help (script pelo caminho)", medir_processo([py, SCRIPT, "--help"], n)),
+            ("--help (python -m)", medir_processo([py, *MODULO, "--help"], n)),
+            ("erro de uso (sem -i/-o)", medir_processo([py, SCRIPT], n)),
+            ("-m --validate-config",
+             medir_processo([py, *MODULO, "--validate-config", "-c", str(cfg_path)], n)),
+        ]
+        print(f"processos novos (mediana de {n}):")
+        for nome, ms in linhas:
+            print(f"  {nome:<34} {ms:8.1f} ms")
+
+        def sem_artefato():
+            artefato.unlink(missing_ok=True)
+            ps.load_compiled_config(cfg_path)
+
+        def com_artefato():
+            cfg, reaproveitou = ps.load_compiled_config(cfg_path)
+            assert reaproveitou
+            ps.compile_column_synonyms(cfg["column_synonyms"])
+            ps.compile_mode_rules(cfg.get("rules", {}))
+
+        print("config no processo (melhor de 50):")
+        ms = medir(lambda: (limpar_compilados(), sem_artefato()))
+        print(f"  {'sem artefato (valida e compila)':<34} {ms:8.2f} ms")
+        ps.write_config_artifact(cfg_path)
+        ms = medir(lambda: (limpar_compilados(), com_artefato()))
+        print(f"  {'com artefato (JSON)':<34} {ms:8.2f} ms")
+
+        saida = subprocess.run([py, "-c", "import sys, processa_seguradoras as ps; "
+                                f"ps.executar(['--validate-config', '-c', {str(cfg_path)!r}]); "
+                                "print(type(sys.modules['pandas']).__name__)"],
+                               cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+        print(f"pandas após --validate-config: {saida[-1]}")
+        if saida[-1] != "_LazyModule":
+            raise SystemExit("--validate-config importou o pandas")
+
+
+if __name__ == "__main__":
+    main()
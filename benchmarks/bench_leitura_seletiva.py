@@ -0,0 +1,97 @@
+"""
+Equivalência + benchmark da leitura seletiva de colunas (leitura.colunas_seletivas):
+planilhas largas (base do gerador.py + ~140 colunas que o processamento não
+usa) processadas lendo tudo e lendo só as colunas reconhecidas, com a aba
+original omitida e deduplicacao.colunas definido. O UNIQUE gerado precisa ser
+idêntico.
+
+Uso:
+  python benchmarks/bench_leitura_seletiva.py --linhas 50000 --extras 140 --formatos xlsx csv
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import processa_seguradoras as ps  # noqa: E402
+from gerador import carregar_config, gerar_frame, gravar_arquivo  # noqa: E402
+
+DATA_REF = "30/09/2025"
+
+
+def frame_largo(linhas: int, extras: int, cfg: dict, seed: int = 0) -> pd.DataFrame:
+    """Base sintética com `extras` colunas a mais, derivadas de cada linha (repetidas continuam repetidas)."""
+    df = gerar_frame(linhas, seed=seed, cfg=cfg)
+    semente = pd.util.hash_pandas_object(df.iloc[:, :3], index=False).to_numpy()
+    novas = {}
+    for i in range(extras):
+        v = (semente >> np.uint64(i % 48)) % np.uint64(100_000)
+        if i % 3 == 0:
+            novas[f"Campo_{i:03d}"] = np.char.add("COD", v.astype(str)).astype(object)
+        elif i % 3 == 1:
+            novas[f"Campo_{i:03d}"] = v.astype("int64")
+        else:
+            novas[f"Campo_{i:03d}"] = v.astype("float64") / 100
+    return pd.concat([df, pd.DataFrame(novas)], axis=1)
+
+
+def rodar(arquivo: Path, saida: Path, cfg: dict, seletiva: bool) -> tuple:
+    cfg = dict(cfg, leitura=dict(cfg.get("leitura") or {}, colunas_seletivas=seletiva))
+    resumo = ps.process_file(arquivo, saida, cfg, ref_date=ps.parse_reference_date(DATA_REF))
+    if resumo.get("status") != "ok":
+        raise SystemExit(f"{arquivo.name}: {resumo.get('status')} {resumo.get('detalhe', '')}")
+    return resumo, pd.read_excel(resumo["saida"], sheet_name="UNIQUE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da leitura seletiva de colunas")
+    parser.add_argument("--linhas", type=int, default=50_000)
+    parser.add_argument("--extras", type=int, default=140, help="Colunas a mais que o processamento não usa")
+    parser.add_argument("--formatos", nargs="+", choices=["xlsx", "csv"], default=["xlsx", "csv"])
+    args = parser.parse_args()
+
+    cfg = carregar_config()
+    # A leitura seletiva exige deduplicacao.colunas (senão a deduplicação veria menos colunas)
+    cfg.update(cache={"enabled": False}, consolidado={"enabled": False},
+               output=dict(cfg.get("output") or {}, original_sheet="omitir"),
+               deduplicacao={"colunas": ["num_apolice", "num_endosso", "data_emissao", "is"]})
+    df = frame_largo(args.linhas, args.extras, cfg)
+    falhas = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for formato in args.formatos:
+            arquivo = tmp / f"JUNTO_largo.{formato}"
+            if formato == "xlsx":
+                # Como o Excel grava (strings compartilhadas e <dimension>), não o modo write-only do gerador
+                df.to_excel(arquivo, index=False, engine="openpyxl")
+            else:
+                gravar_arquivo(df, arquivo)
+            for modo in ["agrupar", "ultimo"]:
+                # O sufixo do nome decide o modo (rules.suffix_keywords)
+                alvo = arquivo.with_name(f"JUNTO_largo_{modo}.{formato}")
+                arquivo = arquivo.replace(alvo)
+                completo, ref = rodar(arquivo, tmp / f"completo_{formato}_{modo}", cfg, False)
+                seletivo, novo = rodar(arquivo, tmp / f"seletivo_{formato}_{modo}", cfg, True)
+                assert completo["mode"] == seletivo["mode"] == modo
+                igual = ref.equals(novo)
+                falhas += not igual
+                print(f"{formato:<4} {modo:<7} {len(df):,} linhas x {df.shape[1]} colunas (lidas {seletivo['colunas_lidas']}): "
+                      f"leitura {completo['t_leitura_s']:.2f}s -> {seletivo['t_leitura_s']:.2f}s | "
+                      f"total {completo['t_total_s']:.2f}s -> {seletivo['t_total_s']:.2f}s "
+                      f"({completo['t_total_s'] / seletivo['t_total_s']:.1f}x) | "
+                      f"pico {completo['mem_pico_mb'] or 0:.0f} -> {seletivo['mem_pico_mb'] or 0:.0f} MB | "
+                      f"{'idêntico' if igual else 'DIVERGENTE'}")
+    if falhas:
+        raise SystemExit(f"{falhas} caso(s) com resultado divergente")
+
+
+if __name__ == "__main__":
+    main()
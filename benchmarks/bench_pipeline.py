@@ -0,0 +1,155 @@
+"""
+Benchmark do pipeline completo: gera arquivos sintéticos (gerador.py) de cada
+tamanho, mede o tempo/memória de cada etapa de process_file (agrupar e
+último) e o tempo de ponta a ponta do script (subprocesso, como o usuário
+roda), e grava tudo em JSON para comparar execuções ao longo do tempo.
+
+Uso:
+  python benchmarks/bench_pipeline.py --linhas 10000 100000 1000000
+  python benchmarks/bench_pipeline.py --linhas 5000000 --formato csv --chunked
+  python benchmarks/bench_pipeline.py --linhas 100000 --comparar benchmarks/resultados/pipeline_20251001_120000.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import processa_seguradoras as ps  # noqa: E402
+from gerador import carregar_config, formato_para, gerar_pasta  # noqa: E402
+
+MODOS = ["agrupar", "ultimo"]
+DATA_REF = "30/09/2025"
+
+
+def ambiente() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "versao_script": ps.SCRIPT_VERSION,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def medir_etapas(arquivo: Path, saida: Path, cfg: dict, repeticoes: int) -> dict:
+    """process_file no próprio processo; fica a repetição mais rápida (com as etapas dela)."""
+    melhor = None
+    for _ in range(repeticoes):
+        resumo = ps.process_file(arquivo, saida, cfg, ref_date=ps.parse_reference_date(DATA_REF))
+        if resumo.get("status") != "ok":
+            raise SystemExit(f"{arquivo.name}: {resumo.get('status')} {resumo.get('detalhe', '')}")
+        if melhor is None or resumo["t_total_s"] < melhor["t_total_s"]:
+            melhor = resumo
+    return {
+        "linhas_entrada": melhor["linhas_entrada"],
+        "linhas_saida": melhor["linhas_saida"],
+        "t_total_s": melhor["t_total_s"],
+        "mem_pico_mb": melhor.get("mem_pico_mb"),
+        "etapas": melhor["etapas_detalhe"],
+    }
+
+
+def medir_ponta_a_ponta(pasta: Path, saida: Path, chunked: bool) -> float:
+    cmd = [sys.executable, str(ROOT / "processa_seguradoras.py"), "-i", str(pasta), "-o", str(saida),
+           "-c", str(ROOT / "config.json"), "--data", DATA_REF, "--no-cache", "--no-consolidado"]
+    if chunked:
+        cmd.append("--chunked")
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+
+def chave(r: dict) -> tuple:
+    return (r["linhas"], r["formato"], r["modo"], r["chunked"])
+
+
+def comparar(atual: list, anterior_path: Path):
+    anterior = {chave(r): r for r in json.loads(anterior_path.read_text(encoding="utf-8"))["resultados"]}
+    print(f"\nComparação com {anterior_path.name} (anterior -> atual):")
+    for r in atual:
+        a = anterior.get(chave(r))
+        if a is None:
+            continue
+        linha = f"  {r['linhas']:>9,} {r['formato']:<4} {r['modo']:<7}: process_file {a['t_total_s']:.2f}s -> {r['t_total_s']:.2f}s ({a['t_total_s'] / r['t_total_s']:.2f}x)"
+        if a.get("e2e_s") and r.get("e2e_s"):
+            linha += f" | ponta a ponta {a['e2e_s']:.2f}s -> {r['e2e_s']:.2f}s ({a['e2e_s'] / r['e2e_s']:.2f}x)"
+        print(linha)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline (etapas e ponta a ponta)")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000], help="Tamanhos (10 mil a 5 milhões)")
+    parser.add_argument("--formato", choices=["auto", "xlsx", "csv"], default="auto",
+                        help="auto = xlsx até o limite do Excel, CSV acima")
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=MODOS)
+    parser.add_argument("--chunked", action="store_true", help="Mede também o modo em blocos")
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--sem-ponta-a-ponta", dest="sem_e2e", action="store_true")
+    parser.add_argument("--resultados", default=str(Path(__file__).resolve().parent / "resultados"),
+                        help="Pasta onde o JSON é gravado")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    cfg_base = carregar_config()
+    cfg_base["cache"] = {"enabled": False}
+    cfg_base["consolidado"] = {"enabled": False}
+    variantes = [False, True] if args.chunked else [False]
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for linhas in args.linhas:
+            formato = formato_para(linhas, args.formato)
+            for modo in args.modos:
+                pasta = tmp / f"entrada_{linhas}_{modo}"
+                t0 = time.perf_counter()
+                arquivo = gerar_pasta(pasta, 1, linhas, formato=formato, modo=modo, cfg=cfg_base)[0]
+                t_gerar = time.perf_counter() - t0
+                for chunked in variantes:
+                    cfg = dict(cfg_base, processamento={"chunked": chunked})
+                    saida = tmp / f"saida_{linhas}_{modo}_{int(chunked)}"
+                    r = {"linhas": linhas, "formato": formato, "modo": modo, "chunked": chunked,
+                         "arquivo_mb": round(arquivo.stat().st_size / 1e6, 2), "gerar_s": round(t_gerar, 3)}
+                    r.update(medir_etapas(arquivo, saida, cfg, args.repeticoes))
+                    if not args.sem_e2e:
+                        r["e2e_s"] = round(medir_ponta_a_ponta(pasta, tmp / f"e2e_{linhas}_{modo}_{int(chunked)}", chunked), 3)
+                    resultados.append(r)
+                    etapas = ", ".join(f"{n} {e['s']:.2f}s" for n, e in r["etapas"].items())
+                    print(f"{linhas:>9,} {formato:<4} {modo:<7} {'blocos' if chunked else 'memória':<7}: "
+                          f"total {r['t_total_s']:.2f}s, pico {r['mem_pico_mb'] or 0:.0f} MB"
+                          + (f", ponta a ponta {r['e2e_s']:.2f}s" if "e2e_s" in r else "") + f"\n    {etapas}")
+
+    pasta_res = Path(args.resultados)
+    pasta_res.mkdir(parents=True, exist_ok=True)
+    destino = pasta_res / f"pipeline_{datetime.now():%Y%m%d_%H%M%S}.json"
+    destino.write_text(json.dumps({"data": datetime.now().isoformat(timespec="seconds"), "ambiente": ambiente(),
+                                   "parametros": vars(args), "resultados": resultados},
+                                  ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nResultados: {destino}")
+    if args.comparar:
+        comparar(resultados, Path(args.comparar))
+
+
+if __name__ == "__main__":
+    main()
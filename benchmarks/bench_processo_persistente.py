@@ -0,0 +1,97 @@
+"""
+Benchmark do processo persistente (servir, usado pela GUI): a mesma pasta
+processada várias vezes trocando só a data de referência, como o usuário faz
+na GUI, comparando um interpretador novo por execução (subprocesso do script)
+com um processo que mantém imports, config e leituras carregados. As saídas
+da última execução de cada lado precisam ser idênticas.
+
+Uso:
+  python benchmarks/bench_processo_persistente.py --arquivos 6 --linhas 20000 --execucoes 3
+"""
+
+import argparse
+import multiprocessing as mp
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from gerador import gerar_pasta  # noqa: E402
+
+DATAS = ["30/09/2025", "31/12/2025", "31/03/2026", "30/06/2026"]
+
+
+def _servidor(conn, cancelar):
+    sys.path.insert(0, str(ROOT))
+    import processa_seguradoras as ps
+    ps.servir(conn, cancelar)
+
+
+def argumentos(entrada: Path, saida: Path, data: str) -> list:
+    return ["-i", str(entrada), "-o", str(saida), "-c", str(ROOT / "config.json"), "--data", data]
+
+
+def rodar_persistente(conn, argv: list):
+    conn.send(("executar", argv))
+    while True:
+        msg, dado = conn.recv()
+        if msg == "fim":
+            if dado != 0:
+                raise SystemExit(f"execução no processo persistente terminou com código {dado}")
+            return
+
+
+def uniques(saida: Path) -> dict:
+    return {p.name: pd.read_excel(p, sheet_name="UNIQUE") for p in sorted(saida.glob("*__*.xlsx"))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do processo persistente da GUI")
+    parser.add_argument("--arquivos", type=int, default=6)
+    parser.add_argument("--linhas", type=int, default=20_000)
+    parser.add_argument("--execucoes", type=int, default=3, help="Execuções seguidas (cada uma com outra data)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        entrada = tmp / "entrada"
+        gerar_pasta(entrada, args.arquivos, args.linhas)
+
+        for i in range(args.execucoes):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, str(ROOT / "processa_seguradoras.py")]
+                           + argumentos(entrada, tmp / "novo", DATAS[i % len(DATAS)]),
+                           check=True, stdout=subprocess.DEVNULL)
+            print(f"interpretador novo  execução {i + 1}: {time.perf_counter() - t0:6.2f}s")
+
+        ctx = mp.get_context("spawn")
+        conn, filho = ctx.Pipe()
+        t0 = time.perf_counter()
+        cancelar = ctx.Event()  # precisa continuar referenciado: start() descarta os args do Process
+        proc = ctx.Process(target=_servidor, args=(filho, cancelar), daemon=True)
+        proc.start()
+        conn.recv()  # ("pronto", ...)
+        print(f"processo persistente pronto em {time.perf_counter() - t0:6.2f}s")
+        for i in range(args.execucoes):
+            t0 = time.perf_counter()
+            rodar_persistente(conn, argumentos(entrada, tmp / "persistente", DATAS[i % len(DATAS)]))
+            print(f"processo persistente execução {i + 1}: {time.perf_counter() - t0:6.2f}s")
+        conn.send(("sair", None))
+        proc.join(10)
+
+        ref, novo = uniques(tmp / "novo"), uniques(tmp / "persistente")
+        iguais = ref.keys() == novo.keys() and all(ref[k].equals(novo[k]) for k in ref)
+        print("saídas idênticas" if iguais else "saídas DIVERGENTES")
+        if not iguais:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Equivalência + benchmark da decisão de modo (decide_mode) com as regras
+pré-compiladas contra a implementação anterior (re.search por regra), em
+pastas com milhares de nomes de arquivo.
+
+Uso:
+  python benchmarks/bench_regras.py --arquivos 20000 --seguradoras 200
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import processa_seguradoras as ps  # noqa: E402
+
+
+# ----------------------- Referência (implementação anterior) -----------------------
+
+def decide_mode_ref(filename, cfg):
+    if cfg.get("rules", {}).get("suffix_overrides", True):
+        for kw in cfg["rules"].get("suffix_keywords", {}).get("agrupar", []):
+            if re.search(kw, filename, flags=re.IGNORECASE):
+                return "agrupar"
+        for kw in cfg["rules"].get("suffix_keywords", {}).get("ultimo", []):
+            if re.search(kw, filename, flags=re.IGNORECASE):
+                return "ultimo"
+    for rule in cfg["rules"].get("insurer_patterns", []):
+        if re.search(rule["pattern"], filename, flags=re.IGNORECASE):
+            return rule["mode"]
+    return cfg["rules"].get("default_mode", "ultimo")
+
+
+def nomes_sinteticos(cfg, n, seed=0):
+    rnd = random.Random(seed)
+    tokens = [r["pattern"] for r in cfg["rules"]["insurer_patterns"]]
+    tokens += ["carteira", "2024", "2025", "ago", "set", "v2", "Final", "_agrupar", "mais recente", "soma", "ÚLTIMO"]
+    return ["_".join(rnd.choice(tokens) for _ in range(rnd.randint(1, 4))) + rnd.choice([".xlsx", ".csv"])
+            for _ in range(n)]
+
+
+def medir(fn, nomes, cfg):
+    t0 = time.perf_counter()
+    modos = [fn(n, cfg) for n in nomes]
+    return modos, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das regras de decisão de modo")
+    parser.add_argument("--arquivos", type=int, default=20_000)
+    parser.add_argument("--seguradoras", type=int, default=200, help="Total de insurer_patterns (completa com sintéticos)")
+    args = parser.parse_args()
+
+    cfg = json.loads((ROOT / "config.json").read_text(encoding="utf-8"))
+    padroes = cfg["rules"]["insurer_patterns"]
+    for i in range(len(padroes), args.seguradoras):
+        padroes.append({"pattern": f"SEGURADORA_{i:03d}", "mode": "agrupar" if i % 2 else "ultimo"})
+    nomes = nomes_sinteticos(cfg, args.arquivos)
+
+    ref, t_ref = medir(decide_mode_ref, nomes, cfg)
+    novo, t_novo = medir(ps.decide_mode, nomes, cfg)
+    divergentes = [n for n, a, b in zip(nomes, ref, novo) if a != b]
+    if divergentes:
+        raise SystemExit(f"DIVERGÊNCIA em {len(divergentes)} arquivos, ex.: {divergentes[:5]}")
+
+    regras = {}
+    for n in nomes:
+        regra = ps.decide_mode_trace(n, cfg)[1].split(":")[0]
+        regras[regra] = regras.get(regra, 0) + 1
+    print(f"{args.arquivos:,} arquivos, {len(ps.compile_mode_rules(cfg['rules'])['regras'])} regras: resultados idênticos")
+    print(f"  anterior   : {1e6 * t_ref / len(nomes):7.1f} µs/arquivo")
+    print(f"  compiladas : {1e6 * t_novo / len(nomes):7.1f} µs/arquivo ({t_ref / t_novo:.1f}x)")
+    print(f"  regras que decidiram: {regras}")
+
+
+if __name__ == "__main__":
+    main()
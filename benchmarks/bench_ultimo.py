@@ -0,0 +1,74 @@
+"""
+Benchmark do modo ULTIMO: a seleção antiga (ordenar tudo com sort_for_latest
+e drop_duplicates) contra latest_per_policy (argmax agrupado, só as
+vencedoras são ordenadas). A equivalência das duas (empates, datas e
+endossos vazios, endosso em texto, só uma das colunas, entrada já ordenada)
+é conferida em tests/test_ultimo.py.
+
+Uso:
+  python benchmarks/bench_ultimo.py --linhas 5000000 --endossos 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import processa_seguradoras as ps  # noqa: E402
+
+
+def antigo(df, col_emissao, col_endosso, endosso_numeric=None):
+    ordered = ps.sort_for_latest(df, col_emissao, col_endosso, endosso_numeric=endosso_numeric)
+    return ordered.drop_duplicates(subset=["num_apolice"], keep="first").drop(columns="_endosso_num", errors="ignore")
+
+
+def endossos(n: int, apolices: int, rng, vazios: float = 0.0, texto: bool = False, datas: int = 400) -> pd.DataFrame:
+    """Tabela de endossos em ordem aleatória, com poucas datas distintas (para haver empates)."""
+    emissao = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, datas, n), unit="D")
+    emissao = pd.Series(emissao).mask(rng.random(n) < vazios)
+    endosso = pd.Series(rng.integers(0, 8, n).astype(float)).mask(rng.random(n) < vazios)
+    if texto:
+        endosso = endosso.map(lambda v: None if pd.isna(v) else f"E{int(v)}").astype("str")
+    return pd.DataFrame({
+        "num_apolice": pd.Series(rng.integers(0, apolices, n)).map("AP{:07d}".format).astype("str"),
+        "data_emissao": emissao,
+        "num_endosso": endosso,
+        "linha": np.arange(n),
+    })
+
+
+def medir(fn, repeticoes: int = 2) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da seleção da linha mais recente (modo ULTIMO)")
+    parser.add_argument("--linhas", type=int, default=5_000_000)
+    parser.add_argument("--endossos", type=int, default=5, help="Endossos por apólice, em média")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    df = endossos(args.linhas, max(1, args.linhas // args.endossos), rng, vazios=0.01)
+    ordenada = antigo(df, "data_emissao", "num_endosso")
+    ordenada = pd.concat([ordenada, df[~df.index.isin(ordenada.index)]]).reset_index(drop=True)
+    print(f"{len(df):,} linhas, {df['num_apolice'].nunique():,} apólices")
+    for nome, tabela in (("ordem aleatória", df), ("já ordenada", ordenada)):
+        t_antigo = medir(lambda: antigo(tabela, "data_emissao", "num_endosso"))
+        t_novo = medir(lambda: ps.latest_per_policy(tabela, "data_emissao", "num_endosso"))
+        print(f"{nome:<16} sort + drop_duplicates {t_antigo:6.2f}s | argmax agrupado {t_novo:6.2f}s "
+              f"({t_antigo / t_novo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
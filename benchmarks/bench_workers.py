@@ -0,0 +1,68 @@
+"""
+Benchmark do modo --workers: processa uma pasta sintética de 50 planilhas
+em sequência e em paralelo, confere que o resumo é idêntico e mostra o speedup.
+
+Uso:
+  python benchmarks/bench_workers.py --arquivos 50 --linhas 5000 --workers 4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from gerador import gerar_pasta  # noqa: E402
+
+# Colunas que mudam a cada execução e não entram na comparação
+VOLATEIS = ["run_id", "saida", "etapas", "mem_pico_etapa"]
+VOLATEIS_PREFIXOS = ("t_", "mem_")
+
+
+def executar(entrada: Path, saida: Path, workers: int) -> float:
+    cmd = [sys.executable, str(ROOT / "processa_seguradoras.py"),
+           "-i", str(entrada), "-o", str(saida), "-c", str(ROOT / "config.json"),
+           "--data", "30/09/2025", "--workers", str(workers)]
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+
+def ler_resumo(saida: Path) -> pd.DataFrame:
+    df = pd.read_excel(saida / "_resumo_processamento.xlsx", sheet_name="resumo")
+    return df.drop(columns=[c for c in df.columns if c in VOLATEIS or c.startswith(VOLATEIS_PREFIXOS)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequencial x --workers")
+    parser.add_argument("--arquivos", type=int, default=50)
+    parser.add_argument("--linhas", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        entrada = tmp / "entrada"
+        print(f"Gerando {args.arquivos} planilhas com {args.linhas} linhas…")
+        gerar_pasta(entrada, args.arquivos, args.linhas)
+
+        t_seq = executar(entrada, tmp / "saida_seq", 1)
+        t_par = executar(entrada, tmp / "saida_par", args.workers)
+
+        iguais = ler_resumo(tmp / "saida_seq").equals(ler_resumo(tmp / "saida_par"))
+        print(f"sequencial : {t_seq:8.2f} s")
+        print(f"workers={args.workers:<3}: {t_par:8.2f} s  (speedup {t_seq / t_par:.2f}x)")
+        print(f"resumo idêntico: {'sim' if iguais else 'NÃO'}")
+        if not iguais:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
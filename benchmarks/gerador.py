@@ -0,0 +1,205 @@
+"""
+Gerador de arquivos sintéticos de seguradoras para os benchmarks.
+
+Cada arquivo imita uma base real: cabeçalhos sorteados entre os sinônimos de
+column_synonyms do config.json, IS em formato brasileiro ('1.234.567,89'),
+datas em formatos misturados, histórico de endossos por apólice, colunas de
+parcela (removidas por drop_columns_contains) e algumas linhas duplicadas.
+
+Uso:
+  python benchmarks/gerador.py -o /tmp/entrada --arquivos 50 --linhas 5000
+  python benchmarks/gerador.py -o /tmp/grande --arquivos 1 --linhas 5000000 --formato csv
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import processa_seguradoras as ps  # noqa: E402
+
+# Nomes de arquivo que caem nas duas regras (ver rules.insurer_patterns no config.json)
+SEGURADORAS = ["JUNTO", "POTTENCIAL", "CESCE", "AKAD", "AXA", "TOKIO", "FAIRFAX", "ZURICH"]
+
+# Limite de linhas de uma planilha do Excel (inclui o cabeçalho)
+XLSX_MAX_LINHAS = 1_048_576
+
+FORMATOS_DATA = ["%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S"]
+TIPOS_ENDOSSO = np.array(["AUMENTO IS", "REDUCAO IS", "PRORROGACAO", "ALTERACAO CADASTRAL", "CANCELAMENTO"])
+STATUS = np.array(["ATIVA", "CANCELADA", "EMITIDA", "VENCIDA"])
+
+_BR_TABELA = str.maketrans({",": ".", ".": ","})
+
+
+def br_number(v: float) -> str:
+    """Formata 1234567.8 como '1.234.567,80'."""
+    return f"{v:,.2f}".translate(_BR_TABELA)
+
+
+def carregar_config(caminho: Path = ROOT / "config.json") -> dict:
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def escolher_cabecalhos(cfg: dict, rnd: random.Random) -> dict:
+    """Sorteia um sinônimo de column_synonyms para cada coluna canônica,
+    conferindo com detect_columns que o conjunto é reconhecido como esperado."""
+    sinonimos = cfg["column_synonyms"]
+    for _ in range(200):
+        escolha = {canon: rnd.choice(variantes) for canon, variantes in sinonimos.items()}
+        if len({ps.normalize_text(v) for v in escolha.values()}) < len(escolha):
+            continue
+        vazio = pd.DataFrame(columns=list(escolha.values()))
+        if ps.detect_columns(vazio, sinonimos) == escolha:
+            return escolha
+    raise RuntimeError("não foi possível sortear cabeçalhos reconhecíveis a partir de column_synonyms")
+
+
+def _formatar_datas(datas: pd.Series, rng: np.random.Generator, formato: str, mistura: float) -> pd.Series:
+    """Datas como texto no formato dominante, com uma fração em outros formatos e alguns vazios."""
+    out = datas.dt.strftime(formato).astype(object)
+    if mistura > 0:
+        sorteio = rng.random(len(datas))
+        outros = [f for f in FORMATOS_DATA if f != formato]
+        alvo = np.flatnonzero(sorteio < mistura)
+        for i, fmt in enumerate(outros):
+            idx = alvo[alvo % len(outros) == i]
+            out.iloc[idx] = datas.iloc[idx].dt.strftime(fmt).to_numpy()
+        out.iloc[np.flatnonzero(sorteio > 1 - mistura / 5)] = None
+    return out
+
+
+def _formatar_br(valores: np.ndarray, rng: np.random.Generator, fracao_numerica: float) -> np.ndarray:
+    """IS em texto brasileiro; uma fração fica numérica (como em colunas mistas do Excel)."""
+    out = np.array([br_number(v) for v in valores.tolist()], dtype=object)
+    if fracao_numerica > 0:
+        idx = np.flatnonzero(rng.random(len(valores)) < fracao_numerica)
+        out[idx] = valores[idx]
+    return out
+
+
+def gerar_frame(linhas: int, seed: int = 0, cfg: "dict|None" = None, mistura_datas: float = 0.05,
+                duplicadas: float = 0.01, embaralhar: bool = True) -> pd.DataFrame:
+    """Base sintética com `linhas` linhas (histórico de endossos por apólice)."""
+    cfg = cfg or carregar_config()
+    rnd = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    cab = escolher_cabecalhos(cfg, rnd)
+
+    # Histórico de endossos: 1 a ~12 por apólice (média ~3)
+    n_unicas = max(1, int(linhas * (1 - duplicadas)))
+    endossos = np.minimum(rng.geometric(1 / 3, size=max(1, n_unicas // 2)), 12)
+    endossos = endossos[: np.searchsorted(np.cumsum(endossos), n_unicas) + 1]
+    n_apolices = len(endossos)
+    apolice = np.repeat(np.arange(n_apolices), endossos)[:n_unicas]
+    inicio_grupo = np.r_[0, np.cumsum(endossos)[:-1]]
+    num_endosso = np.arange(len(apolice)) - inicio_grupo[apolice]
+
+    # Datas: emissão da apólice + dias acumulados a cada endosso
+    base = pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 2200, n_apolices), unit="D")
+    passo = rng.integers(1, 90, len(apolice))
+    passo[num_endosso == 0] = 0
+    acumulado = np.cumsum(passo) - np.cumsum(passo)[inicio_grupo][apolice]
+    emissao = pd.Series(base[apolice]) + pd.to_timedelta(acumulado, unit="D")
+    inicio = pd.Series(base[apolice]) + pd.to_timedelta(rng.integers(0, 30, n_apolices)[apolice], unit="D")
+    prazo = rng.choice([180, 365, 730], n_apolices)[apolice]
+    prorrogacao = np.where(num_endosso > 0, rng.choice([0, 0, 90, 180], len(apolice)), 0)
+    fim = inicio + pd.to_timedelta(prazo + prorrogacao, unit="D")
+
+    is_base = rng.uniform(1_000, 5_000_000, n_apolices)[apolice]
+    is_valor = np.round(is_base * rng.choice([1.0, 1.0, 1.1, 0.9, 1.25], len(apolice)), 2)
+    tipo = np.where(num_endosso == 0, "EMISSAO", TIPOS_ENDOSSO[rng.integers(0, len(TIPOS_ENDOSSO), len(apolice))])
+    qtd_parcelas = rng.choice([1, 2, 4, 6, 10, 12], n_apolices)[apolice]
+
+    # Estilo do número da apólice varia por seguradora
+    numeros = rng.choice(np.arange(10_000, 10_000 + 20 * n_apolices), n_apolices, replace=False)[apolice]
+    if rnd.random() < 0.5:
+        num_apolice = np.char.zfill(numeros.astype(str), 10).astype(object)
+    else:
+        num_apolice = numeros
+
+    fmt = rnd.choice(FORMATOS_DATA[:4])
+    df = pd.DataFrame({
+        cab["num_apolice"]: num_apolice,
+        cab["apolice_susep"]: np.char.add(np.char.add("15414.9", np.char.zfill(numeros.astype(str), 7)), "/2023-11"),
+        cab["num_endosso"]: num_endosso,
+        cab["tipo_endosso"]: tipo,
+        cab["data_emissao"]: _formatar_datas(emissao, rng, fmt, mistura_datas).to_numpy(),
+        cab["data_inicio_vigencia"]: _formatar_datas(inicio, rng, fmt, mistura_datas).to_numpy(),
+        cab["data_fim_vigencia"]: _formatar_datas(fim, rng, fmt, mistura_datas).to_numpy(),
+        cab["status_apolice"]: STATUS[rng.integers(0, len(STATUS), len(apolice))],
+        cab["is"]: _formatar_br(is_valor, rng, 0.1),
+        "Parcela": rng.integers(1, 13, len(apolice)) % (qtd_parcelas + 1),
+        "Qtd Parcelas": qtd_parcelas,
+        "Vl Parcela": _formatar_br(np.round(is_valor * 0.002 / qtd_parcelas, 2), rng, 0),
+        "Corretor": rng.choice(["CORRETORA A", "CORRETORA B", "DIRETO"], len(apolice)),
+    })
+
+    # Linhas repetidas (extrações acumuladas costumam repetir registros)
+    if linhas > len(df):
+        df = pd.concat([df, df.iloc[rng.integers(0, len(df), linhas - len(df))]], ignore_index=True)
+    if embaralhar:
+        df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+    return df
+
+
+def gravar_arquivo(df: pd.DataFrame, caminho: Path, encoding: str = "utf-8-sig"):
+    """Grava em .xlsx (write-only, rápido para arquivos grandes) ou .csv (';')."""
+    if caminho.suffix.lower() == ".xlsx":
+        if len(df) + 1 > XLSX_MAX_LINHAS:
+            raise ValueError(f"{len(df):,} linhas não cabem numa planilha .xlsx (máx. {XLSX_MAX_LINHAS - 1:,}); use CSV")
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ps.append_frame_rows(wb.create_sheet("Planilha1"), df)
+        wb.save(caminho)
+    else:
+        df.to_csv(caminho, sep=";", index=False, encoding=encoding)
+
+
+def formato_para(linhas: int, formato: str = "auto") -> str:
+    """'auto' usa xlsx enquanto couber numa planilha e CSV acima disso."""
+    if formato == "auto":
+        return "xlsx" if linhas + 1 <= XLSX_MAX_LINHAS else "csv"
+    return formato
+
+
+def gerar_pasta(pasta: Path, arquivos: int, linhas: int, seed: int = 0, formato: str = "xlsx",
+                modo: "str|None" = None, cfg: "dict|None" = None) -> list:
+    """Gera `arquivos` arquivos; `modo` ('agrupar'/'ultimo') força a regra pelo sufixo do nome."""
+    cfg = cfg or carregar_config()
+    pasta.mkdir(parents=True, exist_ok=True)
+    ext = formato_para(linhas, formato)
+    sufixo = f"_{modo}" if modo else ""
+    caminhos = []
+    for i in range(arquivos):
+        nome = f"{SEGURADORAS[i % len(SEGURADORAS)]}_{i:03d}{sufixo}.{ext}"
+        caminho = pasta / nome
+        encoding = "latin-1" if (seed + i) % 2 else "utf-8-sig"
+        gravar_arquivo(gerar_frame(linhas, seed=seed + i, cfg=cfg), caminho, encoding=encoding)
+        caminhos.append(caminho)
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera arquivos sintéticos de seguradoras.")
+    parser.add_argument("-o", "--output", required=True, help="Pasta onde os arquivos serão gerados")
+    parser.add_argument("--arquivos", type=int, default=50)
+    parser.add_argument("--linhas", type=int, default=5000, help="Linhas por arquivo (10 mil a 5 milhões)")
+    parser.add_argument("--formato", choices=["auto", "xlsx", "csv"], default="xlsx")
+    parser.add_argument("--modo", choices=["agrupar", "ultimo"], default=None, help="Força a regra pelo sufixo do nome")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    caminhos = gerar_pasta(Path(args.output), args.arquivos, args.linhas, seed=args.seed,
+                           formato=args.formato, modo=args.modo)
+    print(f"{len(caminhos)} arquivos gerados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
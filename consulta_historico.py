@@ -0,0 +1,158 @@
+"""
+Consulta o histórico de execuções gravado por processa_seguradoras.py
+(<saida>/_historico/historico.sqlite). Só usa a biblioteca padrão, para
+responder na hora, mesmo com anos de histórico.
+
+Uso:
+  python consulta_historico.py -d saida/_historico execucoes --ultimas 10
+  python consulta_historico.py -d saida/_historico ultimo-ok                # última execução OK de cada seguradora
+  python consulta_historico.py -d saida/_historico ultimo-ok --seguradora AXA
+  python consulta_historico.py -d saida/_historico tendencia AXA           # linhas por execução ao longo do tempo
+  python consulta_historico.py -d saida/_historico arquivo AXA_2025_09.xlsx
+  python consulta_historico.py -d saida/_historico exportar pasta_csv      # execucoes.csv / arquivos.csv (formato antigo)
+  python consulta_historico.py -d saida/_historico sql "SELECT status, COUNT(*) FROM arquivos GROUP BY status"
+"""
+
+import argparse
+import csv
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+HISTORY_DB_NAME = 'historico.sqlite'  # mesmo nome de processa_seguradoras.HISTORY_DB_NAME
+
+CONSULTAS = {
+    'execucoes': (
+        'SELECT data_execucao, run_id, data_referencia_status, total_arquivos_encontrados, '
+        'total_processados_ok, total_erros, total_cancelados '
+        'FROM execucoes ORDER BY data_execucao DESC LIMIT ?'
+    ),
+    # Percorre o índice (seguradora, data) saltando de uma seguradora para a próxima e
+    # buscando só a última linha OK de cada uma, em vez de agrupar a tabela inteira
+    'ultimo-ok': (
+        'WITH RECURSIVE s(seguradora) AS ('
+        ' SELECT MIN(seguradora COLLATE NOCASE) FROM arquivos'
+        ' UNION ALL'
+        ' SELECT (SELECT MIN(seguradora COLLATE NOCASE) FROM arquivos WHERE seguradora COLLATE NOCASE > s.seguradora)'
+        ' FROM s WHERE s.seguradora IS NOT NULL) '
+        'SELECT s.seguradora, a.data_execucao AS ultima_execucao_ok, a.arquivo, a.linhas_entrada, a.linhas_saida, a.run_id '
+        'FROM s JOIN arquivos a ON a.rowid = ('
+        ' SELECT rowid FROM arquivos WHERE seguradora = s.seguradora COLLATE NOCASE AND status = \'ok\'{filtro}'
+        ' ORDER BY data_execucao DESC LIMIT 1) '
+        'ORDER BY s.seguradora'
+    ),
+    'ultimo-ok-seguradora': (
+        'SELECT seguradora, data_execucao AS ultima_execucao_ok, arquivo, linhas_entrada, linhas_saida, run_id '
+        'FROM arquivos WHERE seguradora = ? COLLATE NOCASE AND status = \'ok\'{filtro} ORDER BY data_execucao DESC LIMIT 1'
+    ),
+    'tendencia': (
+        'SELECT data_execucao, arquivo, status, linhas_entrada, linhas_saida, t_total_s '
+        'FROM arquivos WHERE seguradora = ? COLLATE NOCASE{filtro} ORDER BY data_execucao DESC LIMIT ?'
+    ),
+    'arquivo': (
+        'SELECT data_execucao, status, modo, linhas_entrada, linhas_saida, t_total_s, erro_detalhe, run_id '
+        'FROM arquivos WHERE arquivo = ?{filtro} ORDER BY data_execucao DESC LIMIT ?'
+    ),
+}
+# Arquivos reaproveitados pelo --incremental entram no histórico da execução, mas
+# repetem o resultado anterior: as consultas por arquivo/seguradora os deixam de fora
+FILTRO_REAPROVEITADOS = " AND incremental IS NOT 'reaproveitado'"
+
+
+def consulta(conn, nome: str) -> str:
+    """SQL de CONSULTAS[nome], com o filtro dos reaproveitados se o banco já tiver a coluna incremental."""
+    colunas = {r[1] for r in conn.execute('PRAGMA table_info("arquivos")')}
+    return CONSULTAS[nome].format(filtro=FILTRO_REAPROVEITADOS if 'incremental' in colunas else '')
+
+
+def conectar(log_dir: Path):
+    path = log_dir / HISTORY_DB_NAME
+    if not path.exists():
+        raise SystemExit(f'ERRO: histórico não encontrado: {path}')
+    # Somente leitura: não disputa o lock com execuções em andamento
+    return sqlite3.connect(path.resolve().as_uri() + '?mode=ro', uri=True, timeout=30)
+
+
+def imprimir(cursor, como_csv: bool = False):
+    colunas = [d[0] for d in cursor.description]
+    linhas = [['' if v is None else str(v) for v in linha] for linha in cursor.fetchall()]
+    if como_csv:
+        w = csv.writer(sys.stdout)
+        w.writerow(colunas)
+        w.writerows(linhas)
+        return len(linhas)
+    larguras = [max([len(c)] + [len(l[i]) for l in linhas]) for i, c in enumerate(colunas)]
+    print('  '.join(c.ljust(larguras[i]) for i, c in enumerate(colunas)))
+    print('  '.join('-' * n for n in larguras))
+    for l in linhas:
+        print('  '.join(v.ljust(larguras[i]) for i, v in enumerate(l)))
+    return len(linhas)
+
+
+def exportar(conn, destino: Path):
+    """Grava uma tabela por CSV, com as colunas na ordem do banco."""
+    destino.mkdir(parents=True, exist_ok=True)
+    for tabela in ('execucoes', 'arquivos'):
+        cur = conn.execute(f'SELECT * FROM "{tabela}" ORDER BY data_execucao, rowid')
+        path = destino / f'{tabela}.csv'
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            w = csv.writer(f)
+            w.writerow([d[0] for d in cur.description])
+            n = 0
+            for linha in cur:
+                w.writerow(['' if v is None else v for v in linha])
+                n += 1
+        print(f'{path} ({n} linhas)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consulta o histórico de execuções (historico.sqlite).')
+    parser.add_argument('-d', '--log-dir', dest='log_dir', default='saida/_historico',
+                        help='Pasta do histórico (o --log-dir do processamento; default: saida/_historico)')
+    parser.add_argument('--csv', action='store_true', help='Resultado em CSV no stdout (para colar no Excel)')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p = sub.add_parser('execucoes', help='Últimas execuções')
+    p.add_argument('--ultimas', type=int, default=20)
+    p = sub.add_parser('ultimo-ok', help='Última execução com sucesso de cada seguradora')
+    p.add_argument('--seguradora', default=None)
+    p = sub.add_parser('tendencia', help='Linhas de entrada/saída de uma seguradora ao longo do tempo')
+    p.add_argument('seguradora')
+    p.add_argument('--ultimas', type=int, default=50)
+    p = sub.add_parser('arquivo', help='Histórico de um arquivo')
+    p.add_argument('nome')
+    p.add_argument('--ultimas', type=int, default=50)
+    p = sub.add_parser('exportar', help='Exporta execucoes.csv e arquivos.csv')
+    p.add_argument('destino')
+    p = sub.add_parser('sql', help='Consulta SQL livre (somente leitura)')
+    p.add_argument('consulta')
+    args = parser.parse_args()
+
+    conn = conectar(Path(args.log_dir))
+    t0 = time.perf_counter()
+    if args.comando == 'exportar':
+        exportar(conn, Path(args.destino))
+        return
+    if args.comando == 'execucoes':
+        cur = conn.execute(consulta(conn, 'execucoes'), (args.ultimas,))
+    elif args.comando == 'ultimo-ok':
+        if args.seguradora:
+            cur = conn.execute(consulta(conn, 'ultimo-ok-seguradora'), (args.seguradora,))
+        else:
+            cur = conn.execute(consulta(conn, 'ultimo-ok'))
+    elif args.comando == 'tendencia':
+        cur = conn.execute(consulta(conn, 'tendencia'), (args.seguradora, args.ultimas))
+    elif args.comando == 'arquivo':
+        cur = conn.execute(consulta(conn, 'arquivo'), (args.nome, args.ultimas))
+    else:
+        try:
+            cur = conn.execute(args.consulta)
+        except sqlite3.Error as e:
+            raise SystemExit(f'ERRO: {e}')
+    n = imprimir(cur, como_csv=args.csv)
+    if not args.csv:
+        print(f'\n{n} linha(s) em {(time.perf_counter() - t0) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
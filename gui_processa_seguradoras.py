@@ -12,6 +12,9 @@ Pré-requisitos:
 
 import os
 import sys
+import json
+import queue
+import multiprocessing
 import subprocess
 import threading
 from pathlib import Path
@@ -20,6 +23,41 @@ from tkinter import ttk, filedialog, messagebox
 
 SCRIPT_NAME = 'processa_seguradoras.py'
 
+# Protocolo de progresso do script (--progresso): linhas "@@PROGRESSO {json}" no stdout
+# e o comando "cancelar" pela entrada padrão (mesmos valores de processa_seguradoras.py)
+PROGRESS_PREFIX = '@@PROGRESSO '
+CANCEL_COMMAND = 'cancelar'
+POLL_MS = 100
+
+
+def _servidor(conn, cancelar, script_dir):
+    """Processo persistente: importa o script uma vez e atende as execuções (processa_seguradoras.servir)."""
+    sys.path.insert(0, script_dir)
+    import processa_seguradoras
+    processa_seguradoras.servir(conn, cancelar)
+
+
+def _enfileirar_linha(fila, line):
+    if line.startswith(PROGRESS_PREFIX):
+        try:
+            fila.put(('evento', json.loads(line[len(PROGRESS_PREFIX):])))
+            return
+        except ValueError:
+            pass
+    fila.put(('log', line))
+
+
+def _fmt_tempo(s):
+    s = int(round(s))
+    h, m = divmod(s, 3600)
+    m, s = divmod(m, 60)
+    return f'{h}:{m:02d}:{s:02d}' if h else f'{m}:{s:02d}'
+
+
+def _fmt_int(n):
+    return f'{n:,}'.replace(',', '.')
+
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -32,8 +70,26 @@ class App(tk.Tk):
         self.config_path = tk.StringVar(value=str(Path('config.json').resolve()) if Path('config.json').exists() else '')
         self.ref_date = tk.StringVar()
         self.log_dir = tk.StringVar()
+        self.status = tk.StringVar(value='Pronto.')
+        self.persistente = tk.BooleanVar(value=True)
+
+        # As threads de leitura só escrevem na fila; os widgets são atualizados no loop do Tk (_poll)
+        self._fila = queue.Queue()
+        self._proc = None
+        self._rodando = False
+        self._total_arquivos = 0
+        # Processo persistente (pandas/openpyxl, config e leituras ficam carregados entre execuções)
+        self._mp = multiprocessing.get_context('spawn')
+        self._servidor = None
+        self._conn = None
+        self._cancelar = None
+        self._encerrando = []  # (processo, Event) até o processo sair: o filho ainda pode estar lendo o Event
 
         self._build_ui()
+        self.protocol('WM_DELETE_WINDOW', self._on_close)
+        self.after(POLL_MS, self._poll)
+        if self.persistente.get() and Path(SCRIPT_NAME).exists():
+            self._start_server()
 
     def _build_ui(self):
         pad = {'padx': 8, 'pady': 6}
@@ -65,7 +121,7 @@ class App(tk.Tk):
         row += 1
         ttk.Label(frm, text='Data de referência (opcional):').grid(row=row, column=0, sticky='w', padx= 8, pady= 6)
         ttk.Entry(frm, textvariable=self.ref_date, width=20).grid(row=row, column=1, sticky='w', padx= 8, pady= 6)
-        ttk.Label(frm, text='Ex.: 30/09/2025').grid(row=row, column=2, sticky='w', padx= 8, pady= 6)
+        ttk.Label(frm, text='Ex.: 30/09/2025 (várias: 30/09/2025; 31/12/2025; hoje)').grid(row=row, column=2, sticky='w', padx= 8, pady= 6)
 
         # Log dir
         row += 1
@@ -74,19 +130,32 @@ class App(tk.Tk):
         ent_log.grid(row=row, column=1, sticky='we', padx= 8, pady= 6)
         ttk.Button(frm, text='Procurar…', command=self._ask_logdir).grid(row=row, column=2, padx= 8, pady= 6)
 
+        # Processo persistente
+        row += 1
+        ttk.Checkbutton(frm, text='Manter o processamento carregado entre execuções (mais rápido a partir da 2ª)',
+                        variable=self.persistente, command=self._on_toggle_persistente).grid(row=row, column=0, columnspan=3, sticky='w', padx= 8, pady= 6)
+
         # Run controls
         row += 1
          # Botões: Fechar, Executar, Abrir pasta de saída
         self.btn_run = ttk.Button(frm, text='Executar', command=self._run_pipeline)
         self.btn_run.grid(row=row, column=0, sticky='w', padx= 8, pady= 6)
 
-        self.btn_close = ttk.Button(frm, text='Fechar', command=self.destroy)
-        self.btn_close.grid(row=row, column=1, sticky='w', padx= 8, pady= 6)
+        botoes = ttk.Frame(frm)
+        botoes.grid(row=row, column=1, sticky='w', padx= 8, pady= 6)
+        self.btn_cancel = ttk.Button(botoes, text='Cancelar', command=self._cancel, state='disabled')
+        self.btn_cancel.pack(side='left')
+        self.btn_close = ttk.Button(botoes, text='Fechar', command=self._on_close)
+        self.btn_close.pack(side='left', padx=(8, 0))
 
-        # Barra de progresso
-        self.prog = ttk.Progressbar(frm, mode='indeterminate')
+        # Barra de progresso (proporcional ao volume dos arquivos já concluídos)
+        self.prog = ttk.Progressbar(frm, mode='determinate', maximum=1)
         self.prog.grid(row=row, column=2, sticky='we', padx= 8, pady= 6)
 
+        # Arquivo/etapa atual, vazão e tempo restante
+        row += 1
+        ttk.Label(frm, textvariable=self.status).grid(row=row, column=0, columnspan=3, sticky='w', padx= 8, pady= 2)
+
         # Output log
         row += 1
         ttk.Label(frm, text='Saída do processo:').grid(row=row, column=0, sticky='w', padx= 8, pady= 6)
@@ -147,46 +216,194 @@ class App(tk.Tk):
         if not self._validate():
             return
         self.btn_run.configure(state='disabled')
-        self.prog.start(10)
+        self.btn_cancel.configure(state='normal')
+        self.prog.configure(value=0, maximum=1)
+        self.status.set('Iniciando…')
         self.txt.delete('1.0', 'end')
 
-        # Build command
-        cmd = [sys.executable, str(Path(SCRIPT_NAME).resolve()),
-               '-i', self.input_dir.get().strip(),
-               '-o', self.output_dir.get().strip()]
+        # Argumentos do script
+        argv = ['-i', self.input_dir.get().strip(),
+                '-o', self.output_dir.get().strip(),
+                '--progresso']
         if self.config_path.get().strip():
-            cmd += ['-c', self.config_path.get().strip()]
+            argv += ['-c', self.config_path.get().strip()]
         if self.ref_date.get().strip():
-            cmd += ['--data', self.ref_date.get().strip()]
+            argv += ['--data', self.ref_date.get().strip()]
         if self.log_dir.get().strip():
-            cmd += ['--log-dir', self.log_dir.get().strip()]
-
-        def worker():
-            try:                
-                proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
-                stdout = proc.stdout
-                if stdout is None:
-                    # Fallback: captura tudo ao final se stdout não estiver disponível
-                    combined, _ = proc.communicate()
-                    if combined:
-                        self._append_log(combined)
-                else:
-                    for line in stdout:
-                        self._append_log(line)
-                ret = proc.wait()
-                if ret == 0:
-                    self._append_log('Concluído com sucesso.')
-                else:
-                    self._append_log(f"Finalizado com código {ret}. Verifique acima.")
+            argv += ['--log-dir', self.log_dir.get().strip()]
+
+        self._rodando = True
+        if self.persistente.get():
+            try:
+                self._start_server()
+                self._conn.send(('executar', argv))
             except Exception as e:
+                self._stop_server()
                 messagebox.showerror('Erro na execução', str(e))
+                self._finish()
+            return
+
+        # Um interpretador novo por execução (-u: o log chega linha a linha, sem buffer;
+        # -m: usa o .pyc em cache, o script chamado pelo caminho é recompilado a cada vez)
+        cmd = [sys.executable, '-u', '-m', Path(SCRIPT_NAME).stem] + argv
+        env = dict(os.environ, PYTHONIOENCODING='utf-8')
+        try:
+            self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                          text=True, encoding='utf-8', errors='replace', bufsize=1, env=env)
+        except Exception as e:
+            messagebox.showerror('Erro na execução', str(e))
+            self._finish()
+            return
+
+        def worker(proc, fila):
+            # Só lê o processo e enfileira; nada de Tk fora da thread principal
+            try:
+                for line in proc.stdout:
+                    _enfileirar_linha(fila, line)
+                fila.put(('fim', proc.wait()))
+            except Exception as e:
+                fila.put(('erro', str(e)))
+
+        threading.Thread(target=worker, args=(self._proc, self._fila), daemon=True).start()
+
+    def _start_server(self):
+        """Sobe o processo persistente (se ainda não estiver de pé); os imports acontecem em segundo plano."""
+        if self._servidor is not None and self._servidor.is_alive():
+            return
+        self._conn, filho = self._mp.Pipe()
+        self._cancelar = self._mp.Event()
+        script_dir = str(Path(SCRIPT_NAME).resolve().parent)
+        self._servidor = self._mp.Process(target=_servidor, args=(filho, self._cancelar, script_dir), daemon=True)
+        self._servidor.start()
+        filho.close()
+
+        def leitor(conn, fila):
+            # Mensagens do processo persistente: ("pronto", ...), ("linha", texto), ("fim", código)
+            try:
+                while True:
+                    msg, dado = conn.recv()
+                    if msg == 'linha':
+                        _enfileirar_linha(fila, dado)
+                    else:
+                        fila.put((msg, dado))
+            except (EOFError, OSError):
+                fila.put(('servidor_encerrado', conn))
+
+        threading.Thread(target=leitor, args=(self._conn, self._fila), daemon=True).start()
+
+    def _stop_server(self):
+        if self._servidor is None:
+            return
+        try:
+            self._conn.send(('sair', None))
+        except (OSError, ValueError):
+            pass
+        if self._rodando:
+            self._servidor.terminate()
+        # A conexão não é fechada aqui: a thread leitora recebe EOF quando o processo sair
+        self._encerrando.append((self._servidor, self._cancelar))
+        self._servidor = self._conn = self._cancelar = None
+
+    def _on_toggle_persistente(self):
+        if self._rodando:
+            return  # vale a partir da próxima execução
+        if self.persistente.get():
+            if Path(SCRIPT_NAME).exists():
+                self._start_server()
+        else:
+            self._stop_server()
+
+    def _poll(self):
+        """Consome a fila no loop do Tk (limitado por rodada, para a janela não travar)."""
+        for _ in range(500):
+            try:
+                tipo, dado = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if tipo == 'log':
+                self._append_log(dado)
+            elif tipo == 'evento':
+                self._on_event(dado)
+            elif tipo == 'fim':
+                if dado == 0:
+                    self._append_log('Concluído com sucesso.')
+                else:
+                    self._append_log(f"Finalizado com código {dado}. Verifique acima.")
+                self._finish()
+            elif tipo == 'erro':
+                messagebox.showerror('Erro na execução', dado)
+                self._finish()
+            elif tipo == 'pronto':
+                if not self._rodando:
+                    self.status.set('Pronto (processamento carregado).')
+            elif tipo == 'servidor_encerrado' and dado is self._conn:
+                # Caiu no meio de uma execução (ex.: falta de memória): a próxima sobe outro
+                self._servidor = self._conn = self._cancelar = None
+                if self._rodando:
+                    self._append_log('O processo de processamento foi encerrado inesperadamente.\n')
+                    self._finish()
+        self._encerrando = [(p, ev) for p, ev in self._encerrando if p.is_alive()]
+        self.after(POLL_MS, self._poll)
+
+    def _on_event(self, ev):
+        tipo = ev.get('evento')
+        if tipo == 'inicio':
+            self._total_arquivos = ev['total_arquivos']
+            self.prog.configure(maximum=max(ev['total_bytes'], 1), value=0)
+            self.status.set(f"0/{self._total_arquivos} arquivos")
+        elif tipo == 'arquivo':
+            self.status.set(f"Arquivo {ev['indice']}/{self._total_arquivos}: {ev['arquivo']}")
+        elif tipo == 'etapa':
+            linhas = f" ({_fmt_int(ev['linhas'])} linhas)" if ev.get('linhas') else ''
+            self.status.set(f"{ev['arquivo']}: {ev['etapa']}{linhas}")
+        elif tipo == 'arquivo_fim':
+            self.prog.configure(value=ev['bytes_concluidos'])
+            partes = [f"{ev['concluidos']}/{ev['total_arquivos']} arquivos"]
+            if ev.get('linhas_por_s'):
+                partes.append(f"{ev['arquivo']}: {_fmt_int(ev['linhas_por_s'])} linhas/s")
+            if ev.get('eta_s') is not None:
+                partes.append(f"restante ~{_fmt_tempo(ev['eta_s'])}")
+            self.status.set(' | '.join(partes))
+        elif tipo == 'fim':
+            self.prog.configure(value=self.prog['maximum'])
+            resumo = f"{ev['ok']} ok, {ev['erros']} com erro"
+            if ev.get('cancelados'):
+                resumo += f", {ev['cancelados']} cancelados"
+            self.status.set(f"Fim: {resumo} em {_fmt_tempo(ev['decorrido_s'])}")
+
+    def _cancel(self):
+        """Pede ao script para parar: o arquivo em andamento termina e os demais são pulados."""
+        if not self._rodando:
+            return
+        if self._proc is not None:
+            try:
+                self._proc.stdin.write(CANCEL_COMMAND + '\n')
+                self._proc.stdin.flush()
+            except OSError:
+                return
+        elif self._cancelar is not None:
+            self._cancelar.set()
+        self.btn_cancel.configure(state='disabled')
+        self.status.set('Cancelando: aguardando o arquivo em andamento…')
 
-            finally:
-                self.prog.stop()
-                self.btn_run.configure(state='normal')               
+    def _finish(self):
+        self._proc = None
+        self._rodando = False
+        self.btn_run.configure(state='normal')
+        self.btn_cancel.configure(state='disabled')
+        if not self.persistente.get():
+            self._stop_server()
 
-        threading.Thread(target=worker, daemon=True).start()
+    def _on_close(self):
+        if self._rodando:
+            if not messagebox.askyesno('Sair', 'Há um processamento em andamento. Interromper e sair?'):
+                return
+            if self._proc is not None:
+                self._proc.terminate()
+        self._stop_server()
+        self.destroy()
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # executável empacotado (ex.: PyInstaller) no Windows
     app = App()
     app.mainloop()
\ No newline at end of file
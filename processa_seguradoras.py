@@ -3,34 +3,74 @@ Processa arquivos de seguradoras (Carlos Venancio) — v6
 
 Uso:
   python processa_seguradoras.py -i entrada -o saida -c config.json --data 30/09/2025 --log-dir logs
+  python processa_seguradoras.py -i entrada -o saida --workers 4   # arquivos em paralelo
+  python processa_seguradoras.py -i entrada -o saida --watch --workers 4   # processa os arquivos conforme chegam
+  python processa_seguradoras.py -i entrada -o saida --data 30/09/2025 31/12/2025 hoje   # um status por data
+  python -m processa_seguradoras --validate-config -c config.json   # só confere o config (sem carregar o pandas)
 
 Dependências: pandas, openpyxl, xlrd
 """
 
+from __future__ import annotations
+
 import argparse
 import os
 import re
 import sys
 import json
-import uuid
+import time
+import hashlib
 import unicodedata
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
-import pandas as pd
+SCRIPT_VERSION = "6"
+
+
+def _lazy_import(nome: str):
+    """Módulo que só é importado de fato no primeiro acesso a um atributo.
+
+    O pandas leva de 0,5s a vários segundos para importar (mais numa pasta de
+    rede); assim --help, --validate-config e erros de uso respondem sem ele.
+    """
+    import importlib.util
+
+    if nome in sys.modules:
+        return sys.modules[nome]
+    spec = importlib.util.find_spec(nome)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {nome!r}", name=nome)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nome] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+pd = _lazy_import("pandas")
 
 # ----------------------- Utilidades -----------------------
 
+# [\W_]+ já engole qualquer sequência de espaços, então não sobra "\s+" para colapsar depois
+_NON_WORD_RE = re.compile(r"[\W_]+", flags=re.UNICODE)
+
+
+@lru_cache(maxsize=1 << 16)
+def _normalize_str(s: str) -> str:
+    if not s.isascii():
+        s = unicodedata.normalize("NFD", s)
+        s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = s.lower()
+    s = _NON_WORD_RE.sub(" ", s)
+    return s.strip()
+
+
 def normalize_text(s: str) -> str:
     if s is None:
         return ""
-    s = str(s)
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-    s = s.lower()
-    s = re.sub(r"[\W_]+", " ", s, flags=re.UNICODE)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return _normalize_str(str(s))
 
 
 def build_header_map(df_columns):
@@ -52,13 +92,83 @@ def find_best_match_column(header_map, variants):
     return None
 
 
-def detect_columns(df, col_synonyms: dict) -> dict:
+# Sinônimos já normalizados, por config (chave: conteúdo de column_synonyms)
+_COMPILED_SYNONYMS = {}
+
+
+def _synonyms_key(col_synonyms: dict) -> tuple:
+    return tuple((canon, tuple(variants)) for canon, variants in col_synonyms.items())
+
+
+def compile_column_synonyms(col_synonyms: dict) -> list:
+    """Pré-processa column_synonyms uma vez por config.
+
+    Devolve [(canon, [(variante, normalizada, substrings), ...]), ...]; as
+    substrings de cada variante permitem achar cabeçalhos contidos nela com
+    buscas em dicionário em vez de comparar com cada cabeçalho.
+    """
+    key = _synonyms_key(col_synonyms)
+    compiled = _COMPILED_SYNONYMS.get(key)
+    if compiled is None:
+        compiled = _synonym_table([(canon, [(v, normalize_text(v)) for v in variants])
+                                   for canon, variants in col_synonyms.items()])
+        _COMPILED_SYNONYMS[key] = compiled
+    return compiled
+
+
+def _synonym_table(normalizados: list) -> list:
+    """[(canon, [(variante, normalizada), ...]), ...] -> formato de compile_column_synonyms (com as substrings)."""
+    return [(canon, [(v, nv, frozenset(nv[i:j] for i in range(len(nv) + 1) for j in range(i, len(nv) + 1)))
+                     for v, nv in pares])
+            for canon, pares in normalizados]
+
+
+def _match_compiled(header_map: dict, index: tuple, itens: list):
+    """Mesma prioridade de find_best_match_column: exato por variante e, senão,
+    o primeiro cabeçalho (na ordem da planilha) que contém/está contido na variante."""
+    from bisect import bisect_right
+
+    nomes, positions, headers_txt, offsets = index
+    for v, nv, _ in itens:
+        if nv in header_map:
+            return header_map[nv], f"exato:{v}"
+    for v, nv, subs in itens:
+        if not nv:
+            continue
+        # cabeçalho que contém a variante: 1ª ocorrência no texto concatenado = 1º cabeçalho
+        achou = headers_txt.find(nv)
+        idx = bisect_right(offsets, achou) - 1 if achou >= 0 else len(nomes)
+        # cabeçalhos contidos na variante
+        for sub in subs.intersection(positions):
+            idx = min(idx, positions[sub])
+        if idx < len(nomes):
+            return header_map[nomes[idx]], f"substring:{v}"
+    return None, None
+
+
+def format_column_rules(trace: dict) -> str:
+    """'num_apolice=exato:apolice; is=substring:vl is' (para o resumo/CSV)."""
+    return "; ".join(f"{canon}={regra}" for canon, regra in trace.items())
+
+
+def detect_columns(df, col_synonyms: dict, trace: "dict|None" = None) -> dict:
+    """Mapeia nome canônico -> coluna da planilha. Se trace for um dict, recebe a regra usada em cada coluna."""
     header_map = build_header_map(df.columns)
+    # Índice de substring: cabeçalhos normalizados concatenados (com offsets) e posição de cada um
+    nomes = list(header_map)
+    offsets, pos = [], 0
+    for nc in nomes:
+        offsets.append(pos)
+        pos += len(nc) + 1
+    index = (nomes, {nc: i for i, nc in enumerate(nomes)}, "\0".join(nomes), offsets)
+
     colmap = {}
-    for canon, variants in col_synonyms.items():
-        match = find_best_match_column(header_map, variants)
+    for canon, itens in compile_column_synonyms(col_synonyms):
+        match, regra = _match_compiled(header_map, index, itens)
         if match:
             colmap[canon] = match
+            if trace is not None:
+                trace[canon] = regra
     return colmap
 
 def drop_columns_by_contains(df, tokens):
@@ -80,269 +190,3164 @@ def drop_columns_by_contains(df, tokens):
     return df, to_drop
 
 
-def parse_date_series(s: pd.Series) -> pd.Series:
-    return pd.to_datetime(s, errors="coerce", dayfirst=True)
+# Formatos candidatos, na ordem de preferência em caso de empate (dia primeiro, padrão BR)
+DATE_FORMATS = [
+    "%d/%m/%Y", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y", "%Y/%m/%d", "%Y%m%d",
+]
+DATE_SAMPLE_SIZE = 500
+# Seriais do Excel aceitos como data: 1 (1900-01-01) até 2958465 (9999-12-31)
+EXCEL_EPOCH = "1899-12-30"
+EXCEL_SERIAL_MAX = 2_958_465
+
+
+def _excel_serial_to_datetime(v: pd.Series) -> pd.Series:
+    """Números (dias desde 1899-12-30, como o Excel grava) -> datas; fora da faixa vira NaT."""
+    import numpy as np
+
+    dias = pd.to_numeric(v, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    valido = (dias >= 1) & (dias <= EXCEL_SERIAL_MAX)
+    micros = np.where(valido, np.round(np.where(valido, dias, 0) * 86_400_000_000), 0).astype("int64")
+    out = np.datetime64(EXCEL_EPOCH, "us") + micros.astype("timedelta64[us]")
+    out[~valido] = np.datetime64("NaT")
+    return pd.Series(out, index=v.index)
+
+
+# Formatos ISO: o pandas já tem parser em C para eles, mais rápido que o de largura fixa
+_ISO_DATE_FORMATS = frozenset({"%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"})
+_FIXED_WIDTH_FIELDS = {"d": 2, "m": 2, "Y": 4, "y": 2, "H": 2, "M": 2, "S": 2}
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+@lru_cache(maxsize=None)
+def _fixed_width_spec(fmt: str) -> "tuple|None":
+    """'%d/%m/%Y' -> (largura, {campo: posição}, {posição: separador}) para valores com zeros à esquerda."""
+    campos, seps, pos, i = {}, {}, 0, 0
+    while i < len(fmt):
+        if fmt[i] == "%":
+            campo = fmt[i + 1]
+            if campo not in _FIXED_WIDTH_FIELDS:
+                return None
+            campos[campo] = pos
+            pos += _FIXED_WIDTH_FIELDS[campo]
+            i += 2
+        else:
+            seps[pos] = ord(fmt[i])
+            pos += 1
+            i += 1
+    return pos, campos, seps
+
+
+def _parse_fixed_width(valores, fmt: str):
+    """Caminho rápido para um formato de largura fixa ('31/01/2024', '2024-01-31 10:00:00'):
+    lê os dígitos direto dos bytes e calcula a data com aritmética inteira.
+
+    Devolve (casou, datetime64[us]); quem não casa exatamente (sem zero à
+    esquerda, espaços, dia inválido...) fica para o strptime do pandas.
+    """
+    import numpy as np
+
+    spec = _fixed_width_spec(fmt)
+    n = len(valores)
+    if spec is None or not n:
+        return None
+    largura, campos, seps = spec
+    try:
+        # Uma posição a mais: texto maior que o formato fica com byte != 0 ali
+        b = np.asarray(valores, dtype=object).astype(f"S{largura + 1}")
+    except (UnicodeEncodeError, ValueError, TypeError):
+        return None
+    c = b.view(np.uint8).reshape(n, largura + 1)
+    ok = c[:, largura] == 0
+    for p, sep in seps.items():
+        ok &= c[:, p] == sep
+    # Todas as posições de dígito validadas de uma vez ('0'..'9' -> 0..9; o resto passa de 9)
+    posicoes = [p for campo, inicio in campos.items() for p in range(inicio, inicio + _FIXED_WIDTH_FIELDS[campo])]
+    digitos = c[:, posicoes] - np.uint8(48)
+    ok &= digitos.max(axis=1) < 10
+    coluna = {p: k for k, p in enumerate(posicoes)}
+
+    def numero(campo):
+        inicio = campos[campo]
+        v = np.zeros(n, dtype=np.int64)
+        for p in range(inicio, inicio + _FIXED_WIDTH_FIELDS[campo]):
+            v = v * 10 + digitos[:, coluna[p]]
+        return v
+
+    dd, mm = numero("d"), numero("m")
+    if "Y" in campos:
+        yy = numero("Y")
+    else:
+        # %y como no strptime: 69-99 -> 19xx, 00-68 -> 20xx
+        yy = numero("y")
+        yy = yy + np.where(yy < 69, 2000, 1900)
+    bissexto = ((yy % 4 == 0) & (yy % 100 != 0)) | (yy % 400 == 0)
+    ultimo_dia = np.asarray(_DAYS_IN_MONTH)[np.clip(mm, 0, 12)] + ((mm == 2) & bissexto)
+    ok &= (mm >= 1) & (mm <= 12) & (dd >= 1) & (dd <= ultimo_dia) & (yy >= 1)
+
+    # Dias desde 1970-01-01 (algoritmo days_from_civil)
+    y = yy - (mm <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    doy = (153 * ((mm + 9) % 12) + 2) // 5 + dd - 1
+    dias = era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+    micros = dias * 86_400_000_000
+    for campo, limite, fator in (("H", 23, 3_600_000_000), ("M", 59, 60_000_000), ("S", 59, 1_000_000)):
+        if campo in campos:
+            v = numero(campo)
+            ok &= v <= limite
+            micros = micros + v * fator
+    return ok, np.where(ok, micros, 0).astype("int64").view("datetime64[us]")
+
+
+def _infer_date_formats(amostra: pd.Series) -> list:
+    """Formatos de DATE_FORMATS que convertem alguma linha da amostra, do que mais converte ao que menos."""
+    contagem = []
+    for i, fmt in enumerate(DATE_FORMATS):
+        n = int(pd.to_datetime(amostra, format=fmt, errors="coerce").notna().sum())
+        if n:
+            contagem.append((-n, i, fmt))
+    return [fmt for _, _, fmt in sorted(contagem)]
+
+
+def _parse_date_strings(valores, preenchido, info: dict):
+    """Texto (array object; `preenchido` marca as posições com valor) -> datetime64[us].
+
+    1) infere os formatos de uma amostra; 2) caminho de largura fixa para cada
+    formato, em passadas vetorizadas; 3) strptime do pandas, formato a formato,
+    só nas linhas que sobraram (sem zero à esquerda, espaços...); 4) números
+    como serial do Excel; 5) parser por elemento (dayfirst) no que restar.
+    Textos em branco contam como vazios; o que sobra no fim vai para
+    info["nao_convertidas"].
+    """
+    import numpy as np
+
+    out = np.full(len(valores), np.datetime64("NaT"), dtype="datetime64[us]")
+    info["formatos"] = []
+    info["nao_convertidas"] = 0
+    idx = np.flatnonzero(preenchido)
+    if not len(idx):
+        return out
+    passo = max(1, len(idx) // DATE_SAMPLE_SIZE)
+    amostra = pd.Series(valores[idx[::passo][:DATE_SAMPLE_SIZE]], dtype=object).str.strip()
+    formatos = _infer_date_formats(amostra)
+    usados = set()
+
+    for i, fmt in enumerate(formatos):
+        if not len(idx):
+            break
+        # ISO dominante: o parser em C do pandas é o mais rápido; nas sobras
+        # (com muitas linhas que não casam) a largura fixa é mais barata
+        if i == 0 and fmt in _ISO_DATE_FORMATS:
+            conv = pd.to_datetime(pd.Series(valores[idx], dtype=object), format=fmt, errors="coerce")
+            ok, conv = conv.notna().to_numpy(), conv.to_numpy().astype("datetime64[us]")
+        else:
+            rapido = _parse_fixed_width(valores[idx], fmt)
+            if rapido is None:
+                continue
+            ok, conv = rapido
+        if ok.any():
+            out[idx[ok]] = conv[ok]
+            usados.add(fmt)
+            idx = idx[~ok]
+
+    if len(idx):
+        resto = pd.Series(valores[idx], dtype=object).str.strip()
+        preenchido = (resto != "").to_numpy()
+        idx, resto = idx[preenchido], resto[preenchido]
+        for fmt in formatos:
+            conv = pd.to_datetime(resto, format=fmt, errors="coerce")
+            ok = conv.notna().to_numpy()
+            if ok.any():
+                out[idx[ok]] = conv[ok].to_numpy().astype("datetime64[us]")
+                usados.add(fmt)
+                idx, resto = idx[~ok], resto[~ok]
+            if not len(idx):
+                break
+
+    if len(idx):
+        numerico = pd.to_numeric(pd.Series(valores[idx], dtype=object), errors="coerce")
+        serial = _excel_serial_to_datetime(numerico)
+        ok = serial.notna().to_numpy()
+        if ok.any():
+            out[idx[ok]] = serial[ok].to_numpy()
+            usados.add("serial_excel")
+            idx = idx[~ok]
+
+    if len(idx):
+        import warnings
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            conv = pd.to_datetime(pd.Series(valores[idx], dtype=object).str.strip(), errors="coerce",
+                                  dayfirst=True, format="mixed")
+        ok = conv.notna().to_numpy()
+        if ok.any():
+            out[idx[ok]] = conv[ok].to_numpy().astype("datetime64[us]")
+            usados.add("misto")
+            idx = idx[~ok]
+
+    info["formatos"] = [f for f in formatos + ["serial_excel", "misto"] if f in usados]
+    info["nao_convertidas"] = len(idx)
+    return out
+
+
+def parse_date_series(s: pd.Series, info: "dict|None" = None) -> pd.Series:
+    """Converte uma coluna de datas (texto dd/mm/aaaa e variações, serial do Excel ou datetime).
+
+    O formato dominante é inferido de uma amostra e aplicado à coluna inteira de
+    uma vez; só as linhas que não casaram passam pelos formatos seguintes e pelo
+    parser por elemento. Se `info` for passado, recebe os formatos usados e
+    "nao_convertidas" (valores preenchidos que viraram NaT).
+    """
+    import numpy as np
+
+    info = {} if info is None else info
+    if pd.api.types.is_datetime64_any_dtype(s):
+        info.update(formatos=["datetime"], nao_convertidas=0)
+        return s
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        out = _excel_serial_to_datetime(s)
+        info["formatos"] = ["serial_excel"]
+        resto = (s.notna() & out.isna()).to_numpy()
+        if resto.any():
+            # Inteiros aaaammdd (20240131) exportados como número
+            v = s[resto]
+            inteiro = (v == v.round()).to_numpy()
+            conv = pd.to_datetime(v[inteiro].astype("int64").astype(str), format="%Y%m%d", errors="coerce")
+            if conv.notna().any():
+                out.iloc[np.flatnonzero(resto)[inteiro]] = conv.astype("datetime64[us]").to_numpy()
+                info["formatos"].append("%Y%m%d")
+        info["nao_convertidas"] = int((s.notna() & out.isna()).sum())
+        return out
+
+    preenchido = s.notna().to_numpy()
+    valores = s.to_numpy(dtype=object)
+    especiais = None
+    if pd.api.types.infer_dtype(valores, skipna=True) not in ("string", "empty"):
+        # Colunas mistas do Excel: datetime/número em algumas células e texto nas demais
+        especiais = preenchido & np.fromiter((not isinstance(v, str) for v in valores), dtype=bool, count=len(valores))
+        valores_especiais = valores[especiais]
+        preenchido = preenchido & ~especiais
+    out = _parse_date_strings(valores, preenchido, info)
+
+    if especiais is not None and especiais.any():
+        eh_data = np.fromiter((isinstance(v, datetime) for v in valores_especiais), dtype=bool, count=len(valores_especiais))
+        conv = np.full(len(valores_especiais), np.datetime64("NaT"), dtype="datetime64[us]")
+        if eh_data.any():
+            conv[eh_data] = pd.to_datetime(pd.Series(valores_especiais[eh_data]), errors="coerce").to_numpy().astype("datetime64[us]")
+        if (~eh_data).any():
+            conv[~eh_data] = _excel_serial_to_datetime(pd.Series(valores_especiais[~eh_data], dtype=object)).to_numpy()
+        out[especiais] = conv
+        novos = [f for f, m in (("datetime", eh_data), ("serial_excel", ~eh_data)) if m.any()]
+        info["formatos"] = list(dict.fromkeys(info["formatos"] + novos))
+        info["nao_convertidas"] += int(np.isnat(conv).sum())
+    return pd.Series(out, index=s.index)
+
+
+# Número "limpo" aceito por float(): sinal opcional, dígitos e no máximo um ponto
+_NUMERO_VALIDO = r"-?(?:\d+(?:\.\d*)?|\.\d+)"
 
 
 def br_number_to_float_series(s: pd.Series) -> pd.Series:
+    """Converte números no formato brasileiro ('1.234,56', 'R$ 10,5') para float.
+
+    Mantém o NaN para vazios/inválidos. Se houver ',' e '.' no mesmo valor, os
+    pontos são separadores de milhar. Operação por coluna (sem apply por célula).
+    """
     import numpy as np
-    def conv(x):
-        if pd.isna(x):
-            return np.nan
-        txt = str(x)
-        txt = re.sub(r"[^0-9,.-]", "", txt)
-        txt = txt.strip()
-        if "," in txt and "." in txt:
-            txt = txt.replace(".", "")
-        txt = txt.replace(",", ".")
-        try:
-            return float(txt)
-        except Exception:
-            return np.nan
-    return s.apply(conv)
+    from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+    out = np.full(len(s), np.nan)
+    if is_numeric_dtype(s.dtype) and not is_bool_dtype(s.dtype):
+        # Coluna já numérica (comum em .xlsx): str(x) só muda o valor quando sai em
+        # notação científica (ex.: '1e+20' vira '120'), então só esses seguem pelo texto.
+        vals = s.to_numpy(dtype="float64", na_value=np.nan)
+        a = np.abs(vals)
+        direto = ((a >= 1e-4) & (a < 1e16)) | (a == 0)
+        out[direto] = vals[direto]
+        pos = np.flatnonzero(~direto & ~np.isnan(vals))
+    else:
+        pos = np.flatnonzero(s.notna().to_numpy())
+
+    if len(pos):
+        txt = s.iloc[pos].astype(str).str.replace(r"[^0-9,.-]", "", regex=True)
+        ambos = txt.str.contains(",", regex=False) & txt.str.contains(".", regex=False)
+        txt = txt.where(~ambos, txt.str.replace(".", "", regex=False))
+        txt = txt.str.replace(",", ".", regex=False)
+        valido = txt.str.fullmatch(_NUMERO_VALIDO).to_numpy(dtype=bool)
+        out[pos[valido]] = txt[valido].astype("float64").to_numpy()
+    return pd.Series(out, index=s.index, name=s.name)
 
 
 def recompute_status_by_dates(df, col_fim, out_col="status_automatico", today_override=None):
     """Recalcula status (VIGENTE/VENCIDA) e grava em out_col (default: status_automatico)."""
+    import numpy as np
+
     today = pd.Timestamp(today_override.date()) if today_override is not None else pd.Timestamp(datetime.now().date())
-    status = []
-    for _, row in df.iterrows():
-        fim = row[col_fim] if col_fim in df.columns else pd.NaT
-        if pd.notna(fim):
-            status.append("VIGENTE" if today <= fim else "VENCIDA")
-        else:
-            status.append(None)
+    if col_fim in df.columns:
+        fim = df[col_fim]
+        vigente = (fim >= today).to_numpy(dtype=bool)
+        status = np.where(fim.isna().to_numpy(), None, np.where(vigente, "VIGENTE", "VENCIDA")).astype(object)
+    else:
+        status = np.full(len(df), None, dtype=object)
     df[out_col] = status
     return df
 
 
-def sort_for_latest(df, col_data_emissao, col_num_endosso):
+def status_column_name(data) -> str:
+    """status_automatico_2025_09_30: coluna de status de uma das datas de referência."""
+    return f"status_automatico_{data:%Y_%m_%d}"
+
+
+def recompute_status_for_dates(df, col_fim, datas: list):
+    """Uma coluna de status por data de referência (mesma regra de recompute_status_by_dates).
+
+    As datas de fim são lidas e os vazios marcados uma vez; cada data custa só
+    uma comparação vetorizada.
+    """
+    import numpy as np
+
+    fim = df[col_fim].to_numpy(dtype="datetime64[us]") if col_fim in df.columns else None
+    vazio = np.isnat(fim) if fim is not None else None
+    for data in datas:
+        if fim is None:
+            status = np.full(len(df), None, dtype=object)
+        else:
+            vigente = fim >= np.datetime64(pd.Timestamp(data.date()), "us")
+            status = np.where(vazio, None, np.where(vigente, "VIGENTE", "VENCIDA")).astype(object)
+        df[status_column_name(data)] = status
+    return df
+
+
+def sort_for_latest(df, col_data_emissao, col_num_endosso, endosso_numeric=None):
+    """Ordena do mais recente para o mais antigo (emissão desc, endosso desc).
+
+    O endosso é comparado como número quando ao menos metade dos valores é
+    numérica; endosso_numeric força essa decisão (usado no modo em blocos).
+    """
     sort_cols, ascending = [], []
     if col_data_emissao in df.columns:
         sort_cols.append(col_data_emissao); ascending.append(False)
     if col_num_endosso in df.columns:
         tmp = pd.to_numeric(df[col_num_endosso], errors="coerce")
-        if tmp.notna().mean() >= 0.5:
+        if endosso_numeric is None:
+            endosso_numeric = bool(tmp.notna().mean() >= 0.5)
+        if endosso_numeric:
             df = df.copy(); df["_endosso_num"] = tmp
             sort_cols.append("_endosso_num"); ascending.append(False)
         else:
             sort_cols.append(col_num_endosso); ascending.append(False)
     if sort_cols:
-        return df.sort_values(by=sort_cols, ascending=ascending)
+        return df.sort_values(by=sort_cols, ascending=ascending, kind="stable")
     return df
 
 
-def read_any_file(path: Path) -> pd.DataFrame:
+def _latest_sort_keys(df, col_data_emissao, col_num_endosso, endosso_numeric=None) -> list:
+    """Chaves de sort_for_latest (emissão, endosso numérico ou texto), na ordem de prioridade."""
+    chaves = []
+    if col_data_emissao in df.columns:
+        chaves.append(df[col_data_emissao])
+    if col_num_endosso in df.columns:
+        tmp = pd.to_numeric(df[col_num_endosso], errors="coerce")
+        if endosso_numeric is None:
+            endosso_numeric = bool(tmp.notna().mean() >= 0.5)
+        chaves.append(tmp if endosso_numeric else df[col_num_endosso])
+    return chaves
+
+
+def _sorted_latest_first(chaves: list) -> bool:
+    """As linhas já estão do mais recente para o mais antigo (chaves desc, vazios no fim)?"""
+    import numpy as np
+
+    empate = None  # pares vizinhos ainda empatados nas chaves anteriores
+    for s in chaves:
+        v = s.to_numpy()
+        if v.dtype.kind in "iuM":
+            v = v.view("i8") if v.dtype.kind == "M" else v  # NaT é o menor int64: já fica no fim
+            ok = v[:-1] >= v[1:]
+            igual = v[:-1] == v[1:]
+        elif v.dtype.kind == "f":
+            nan = np.isnan(v)
+            ok = (v[:-1] >= v[1:]) | nan[1:]
+            igual = (v[:-1] == v[1:]) | (nan[:-1] & nan[1:])
+        else:
+            return False  # endosso como texto: vai pelo caminho geral
+        if empate is not None:
+            ok |= ~empate
+            igual &= empate
+        if not ok.all():
+            return False
+        empate = igual
+    return True
+
+
+def latest_per_policy(df, col_data_emissao, col_num_endosso, endosso_numeric=None, key: str = "num_apolice"):
+    """Linha mais recente de cada apólice: o mesmo que sort_for_latest + drop_duplicates(keep="first").
+
+    Mais recente = maior emissão, depois maior endosso (vazios perdem); no
+    empate fica a que aparece primeiro. Em vez de ordenar todas as linhas,
+    calcula o máximo de cada chave por apólice (argmax agrupado, O(n)) e só
+    ordena as vencedoras. Se a entrada já vem do mais recente para o mais
+    antigo, basta a primeira ocorrência de cada apólice.
+    """
+    import numpy as np
+
+    chaves = _latest_sort_keys(df, col_data_emissao, col_num_endosso, endosso_numeric)
+    if not chaves or _sorted_latest_first(chaves):
+        return df[~df[key].duplicated(keep="first")]
+
+    codes, uniques = pd.factorize(df[key], use_na_sentinel=False)
+    candidatos = np.arange(len(df))
+    for s in chaves:
+        v = s.to_numpy()
+        grupos = codes[candidatos]
+        if v.dtype.kind in "iuM":
+            # NaT é o menor int64: só é o máximo quando o grupo não tem nenhuma data
+            v = (v.view("i8") if v.dtype.kind == "M" else v.astype("i8"))[candidatos]
+            maximo = np.full(len(uniques), np.iinfo("i8").min)
+            np.maximum.at(maximo, grupos, v)
+            manter = v == maximo[grupos]
+        elif v.dtype.kind == "f":
+            v = v[candidatos]
+            maximo = np.full(len(uniques), np.nan)
+            np.fmax.at(maximo, grupos, v)  # ignora NaN; grupo todo vazio fica NaN
+            manter = (v == maximo[grupos]) | np.isnan(maximo[grupos])
+        else:
+            valores = pd.Series(v[candidatos], copy=False)
+            maximo = valores.groupby(grupos, sort=False).transform("max")
+            # Grupo sem nenhum valor (máximo vazio): todos continuam empatados
+            manter = (valores == maximo).to_numpy(dtype=bool, na_value=False) | maximo.isna().to_numpy()
+        candidatos = candidatos[manter]
+    vencedoras = candidatos[~pd.Series(codes[candidatos], copy=False).duplicated().to_numpy()]
+
+    # Mesma ordem da versão com sort: chaves desc (vazios no fim), empates na ordem do arquivo
+    ordem = pd.DataFrame({i: s.to_numpy()[vencedoras] for i, s in enumerate(chaves)})
+    ordem = ordem.sort_values(by=list(ordem.columns), ascending=False, na_position="last", kind="stable")
+    return df.iloc[vencedoras[ordem.index.to_numpy()]]
+
+
+# Amostra usada para detectar encoding/separador dos CSVs (o arquivo inteiro não é decodificado duas vezes)
+CSV_SAMPLE_BYTES = 256 * 1024
+
+
+def sniff_csv(path: Path) -> tuple:
+    """Detecta (encoding, separador) a partir do início do arquivo.
+
+    Encoding: utf-8-sig se a amostra decodificar, senão latin-1. O separador é
+    detectado na primeira linha, como fazia o engine python com sep=None.
+    """
+    import codecs
+    import csv
+
+    with open(path, "rb") as f:
+        sample = f.read(CSV_SAMPLE_BYTES)
+    try:
+        # final=False: um caractere multibyte cortado no fim da amostra não conta como erro
+        text = codecs.getincrementaldecoder("utf-8-sig")().decode(sample, final=False)
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        text = sample.decode("latin-1")
+        encoding = "latin-1"
+    first_line = text.splitlines()[0] if text else ""
+    sep = csv.Sniffer().sniff(first_line).delimiter
+    return encoding, sep
+
+
+def _read_csv_legacy(path: Path, usecols: "list|None" = None) -> pd.DataFrame:
+    try:
+        return pd.read_csv(path, encoding="utf-8-sig", sep=None, engine="python", usecols=usecols)
+    except Exception:
+        return pd.read_csv(path, encoding="latin-1", sep=None, engine="python", usecols=usecols)
+
+
+def read_csv_fast(path: Path, info: "dict|None" = None, engine: str = "c", usecols: "list|None" = None) -> pd.DataFrame:
+    """Lê CSV detectando encoding/separador uma vez e usando o parser em C (ou pyarrow).
+
+    Se a detecção ou o parser rápido falhar, volta ao caminho antigo (engine
+    python com sep=None), para que nenhum arquivo que já era lido deixe de ser.
+    """
+    info = info if info is not None else {}
+    try:
+        encoding, sep = sniff_csv(path)
+    except Exception:
+        info["csv_engine"] = "python"
+        return _read_csv_legacy(path, usecols)
+
+    kwargs = {"sep": sep, "engine": engine, "usecols": usecols}
+    if engine == "c":
+        # Inferência de tipos sobre a coluna inteira (como o engine python), não por blocos
+        kwargs["low_memory"] = False
+    for enc in dict.fromkeys([encoding, "latin-1"]):
+        try:
+            df = pd.read_csv(path, encoding=enc, **kwargs)
+            info.update({"encoding": enc, "separador": "\\t" if sep == "\t" else sep, "csv_engine": engine})
+            return df
+        except UnicodeDecodeError:
+            # Amostra era utf-8 mas o restante do arquivo não: tenta latin-1 com o mesmo separador
+            continue
+        except Exception:
+            break
+    info["csv_engine"] = "python"
+    return _read_csv_legacy(path, usecols)
+
+
+def read_any_file(path: Path, info: "dict|None" = None, csv_engine: str = "c",
+                  colunas: "dict|None" = None, abas: "dict|None" = None) -> pd.DataFrame:
+    """Lê a planilha inteira ou, com `colunas` ({posição: nome}, de read_header), só essas colunas.
+
+    Com `abas` (de sheet_options, seleção diferente de "primeira"), lê várias
+    abas de uma vez com read_sheets.
+    """
+    if abas is not None:
+        return read_sheets(path, abas["abas"], info, workers=abas["workers"])
+    if colunas is not None:
+        return _read_columns(path, info, csv_engine, colunas)
     ext = path.suffix.lower()
     if ext == ".xlsx":
         return pd.read_excel(path, engine="openpyxl")
     elif ext == ".xls":
         return pd.read_excel(path, engine="xlrd")
     elif ext == ".csv":
-        try:
-            return pd.read_csv(path, encoding="utf-8-sig", sep=None, engine="python")
-        except Exception:
-            return pd.read_csv(path, encoding="latin-1", sep=None, engine="python")
+        return read_csv_fast(path, info, engine=csv_engine)
     else:
         raise ValueError(f"Extensão não suportada: {ext}")
 
-# -------------- Data de referência (status) --------------
 
-def parse_reference_date(s: str):
-    """Converte uma string em pd.Timestamp (date-only). Aceita '30/09/2025', '2025-09-30', '30-09-2025'."""
-    if not s:
-        return None
-    ts = pd.to_datetime(s, dayfirst=True, errors='coerce')
-    if pd.isna(ts):
-        return None
-    return pd.Timestamp(ts.date())
+# ----------------------- Leitura seletiva de colunas -----------------------
 
-# ----------------------- Núcleo -----------------------
+def selective_reading_issue(cfg: dict) -> "str|None":
+    """Motivo para ignorar leitura.colunas_seletivas (None = pode ler só as colunas usadas).
 
-OUTPUT_COLUMNS_ORDER = [
-    "num_apolice",
-    "apolice_susep",
-    "num_endosso",
-    "tipo_endosso",
-    "data_emissao",
-    "data_inicio_vigencia",
-    "data_fim_vigencia",
-    "status_apolice",
-    "status_automatico",
-    "is",
-]
+    A aba original precisa de todas as colunas, e a deduplicação também, a
+    menos que deduplicacao.colunas diga quais comparar: sem isso, linhas
+    diferentes só em colunas não lidas seriam tratadas como repetidas.
+    """
+    if output_options(cfg)["original_sheet"] != "omitir":
+        return "a aba 'original' precisa de todas as colunas (use --original omitir)"
+    if not dedup_options(cfg)["colunas"]:
+        return "a deduplicação compara todas as colunas (defina deduplicacao.colunas)"
+    return None
 
-def decide_mode(filename: str, cfg: dict) -> str:
-    # 1) Sufixos no nome (se habilitado)
-    if cfg.get("rules", {}).get("suffix_overrides", True):
-        for kw in cfg["rules"].get("suffix_keywords", {}).get("agrupar", []):
-            if re.search(kw, filename, flags=re.IGNORECASE):
-                return "agrupar"
-        for kw in cfg["rules"].get("suffix_keywords", {}).get("ultimo", []):
-            if re.search(kw, filename, flags=re.IGNORECASE):
-                return "ultimo"
-    # 2) Padrões por seguradora/nome
-    for rule in cfg["rules"].get("insurer_patterns", []):
-        if re.search(rule["pattern"], filename, flags=re.IGNORECASE):
-            return rule["mode"]
-    # 3) Default
-    return cfg["rules"].get("default_mode", "ultimo")
 
+def selective_reading(cfg: dict) -> bool:
+    """leitura.colunas_seletivas, se nada impedir (ver selective_reading_issue)."""
+    ligado = bool((cfg.get("leitura") or {}).get("colunas_seletivas", False))
+    return ligado and selective_reading_issue(cfg) is None
 
-def process_file(path: Path, out_dir: Path, cfg: dict, ref_date: "pd.Timestamp|None" = None) -> dict:
-    filename = path.name
-    mode = decide_mode(filename, cfg)
 
-    try:
-        raw = read_any_file(path)
-    except Exception as e:
-        return {"file": filename, "status": "erro_leitura", "detalhe": str(e)}
-    if raw.empty:
-        return {"file": filename, "status": "vazio"}
-    
-    # Remoção de colunas por tokens (primeira etapa) 
+def read_header(path: Path) -> list:
+    """Só a linha de cabeçalho, com os mesmos nomes que a leitura completa daria."""
+    ext = path.suffix.lower()
+    if ext == ".xlsx":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+        try:
+            return _xlsx_header(wb.worksheets[0])
+        finally:
+            wb.close()
+    elif ext == ".csv":
+        encoding, sep = sniff_csv(path)
+        for enc in dict.fromkeys([encoding, "latin-1"]):
+            try:
+                return list(pd.read_csv(path, encoding=enc, sep=sep, nrows=0).columns)
+            except UnicodeDecodeError:
+                continue
+        raise ValueError(f"não foi possível ler o cabeçalho de {path.name}")
+    else:
+        raise ValueError(f"Extensão não suportada: {ext}")
+
+
+def used_columns(header: list, cfg: dict) -> "tuple[dict, list]|None":
+    """Colunas que o processamento usa ({posição: nome}) e as removidas por tokens.
+
+    Aplica drop_columns_contains e detect_columns só ao cabeçalho e junta as
+    colunas de deduplicacao.colunas, para a deduplicação ver as mesmas colunas
+    da leitura completa. None se nenhuma coluna for reconhecida ou nenhuma de
+    deduplicacao.colunas existir (aí lê-se tudo).
+    """
     drop_tokens = (cfg.get('drop_columns_contains') or cfg.get('rules', {}).get('drop_columns_contains'))
+    vazio = pd.DataFrame(columns=header)
     colunas_dropadas = []
     if drop_tokens:
-        raw, colunas_dropadas = drop_columns_by_contains(raw, drop_tokens)
-        
-    raw.drop_duplicates(inplace=True, ignore_index=True)
-
-    colmap = detect_columns(raw, cfg["column_synonyms"]) 
-    present = [c for c in OUTPUT_COLUMNS_ORDER if c in colmap]   
-    if not present:
-        return {"file": filename, "status": "colunas_nao_encontradas", "detalhe": str(list(raw.columns))}
-    
-    df = raw[[colmap[c] for c in present]].copy()
-    df.columns = present
+        vazio, colunas_dropadas = drop_columns_by_contains(vazio, drop_tokens)
+    colmap = detect_columns(vazio, cfg["column_synonyms"])
+    if not colmap:
+        return None
+    subset = dedup_columns(vazio.columns, dedup_options(cfg)["colunas"], [colmap])
+    if subset is None:
+        return None
+    posicao = {nome: i for i, nome in enumerate(header)}
+    usadas = set(colmap.values()) | set(subset)
+    return {posicao[nome]: nome for nome in sorted(usadas, key=posicao.get)}, colunas_dropadas
 
-    # Normalizações
-    if "data_emissao" in df.columns:
-        df["data_emissao"] = parse_date_series(df["data_emissao"])
-    if "data_inicio_vigencia" in df.columns:
-        df["data_inicio_vigencia"] = parse_date_series(df["data_inicio_vigencia"])
-    if "data_fim_vigencia" in df.columns:
-        df["data_fim_vigencia"] = parse_date_series(df["data_fim_vigencia"])
-    if "is" in df.columns:
-        df["is"] = br_number_to_float_series(df["is"])
 
-    # Regras por modo
-    if mode == "agrupar":
-        group_keys = [c for c in ["num_apolice"] if c in df.columns] or [present[0]]
-        agg_map = {}
-        if "is" in df.columns: agg_map["is"] = "sum"
-        if "data_emissao" in df.columns: agg_map["data_emissao"] = "max"
-        if "data_inicio_vigencia" in df.columns: agg_map["data_inicio_vigencia"] = "min"
-        if "data_fim_vigencia" in df.columns: agg_map["data_fim_vigencia"] = "max"
-        
-        for t in ["tipo_endosso", "num_endosso", "status_apolice", "apolice_susep"]:
-            if t in df.columns: agg_map[t] = "last"
-        result = df.groupby(group_keys, dropna=False).agg(agg_map).reset_index()
-       
-        if "data_fim_vigencia" in result.columns:
-            result = recompute_status_by_dates(result, "data_fim_vigencia", today_override=ref_date)
-    else:  
-        # ultimo
-        if "num_apolice" not in df.columns:
-            return {"file": filename, "status": "sem_num_apolice_para_ultimo"}
-        ordered = sort_for_latest(
-            df,
-            "data_emissao" if "data_emissao" in df.columns else None,
-            "num_endosso" if "num_endosso" in df.columns else None,
-        )
-        result = ordered.drop_duplicates(subset=["num_apolice"], keep="first").copy()
-        if "data_fim_vigencia" in result.columns:
-            result = recompute_status_by_dates(result, "data_fim_vigencia", today_override=ref_date)
+def select_columns_to_read(path: Path, cfg: dict, info: "dict|None" = None) -> tuple:
+    """(colunas, colunas_dropadas) para a leitura; (None, []) = ler tudo.
 
-    # Reordenar colunas
-    final_cols = [c for c in OUTPUT_COLUMNS_ORDER if c in result.columns]
-    result = result[final_cols]
+    Com a leitura seletiva, registra em info "colunas_lidas" ('9/152'). .xls é
+    sempre lido inteiro (o xlrd carrega o arquivo todo de qualquer forma).
+    """
+    if not selective_reading(cfg) or path.suffix.lower() not in (".csv", ".xlsx"):
+        return None, []
+    header = read_header(path)
+    usadas = used_columns(header, cfg)
+    if usadas is None:
+        return None, []
+    colunas, colunas_dropadas = usadas
+    if info is not None:
+        info["colunas_lidas"] = f"{len(colunas)}/{len(header)}"
+    return colunas, colunas_dropadas
 
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_name = f"{path.stem}__{mode}_automatico.xlsx"
-    out_path = out_dir / out_name
 
-    with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
-        # Aba com o resultado padronizado
-        result.to_excel(writer, index=False, sheet_name="UNIQUE")        
-        # Aba com os dados originais lidos do arquivo de entrada
-        try:
-            raw.to_excel(writer, index=False, sheet_name="original")
-        except Exception:
-            # Em caso de dados muito grandes ou tipos não suportados, converte para string
-            raw_copy = raw.astype(str)
-            raw_copy.to_excel(writer, index=False, sheet_name="original")
+def _read_columns(path: Path, info: "dict|None", csv_engine: str, colunas: dict) -> pd.DataFrame:
+    """Lê só as colunas pedidas; os nomes vêm do cabeçalho completo (ex.: duplicados 'X.1')."""
+    info = info if info is not None else {}
+    posicoes = list(colunas)
+    ext = path.suffix.lower()
+    if ext == ".xlsx":
+        df = next(_iter_xlsx_chunks(path, sys.maxsize, posicoes), None)
+        if df is None:
+            df = pd.DataFrame(columns=list(colunas.values()))
+    elif ext == ".csv":
+        df = read_csv_fast(path, info, engine=csv_engine, usecols=posicoes)
+    else:
+        raise ValueError(f"Extensão não suportada: {ext}")
+    df.columns = list(colunas.values())
+    return df
 
-    return {
-        "file": filename,
-        "status": "ok",
-        "mode": mode,
-        "linhas_entrada": len(raw),
-        "linhas_saida": len(result),
-        "colunas_detectadas": list(result.columns),
-        "colunas_dropadas": colunas_dropadas,
-        "saida": str(out_path)
-    }
 
+# ----------------------- Planilhas com várias abas -----------------------
 
-def main():
-    parser = argparse.ArgumentParser(description="Processa arquivos de seguradoras (agrupar ou último valor por apólice).")
-    parser.add_argument("-i", "--input", required=True, help="Pasta de entrada com .xlsx/.xls/.csv")
-    parser.add_argument("-o", "--output", required=True, help="Pasta de saída para salvar os UNIQUE")
-    parser.add_argument("-c", "--config", default="config.json", help="Caminho do arquivo de configuração (JSON)")
-    parser.add_argument("--data", dest="ref_date", default=None, help="Data de referência para cálculo do status (ex.: 30/09/2025)")
-    parser.add_argument("--log-dir", dest="log_dir", default=None, help="Diretório para logs históricos (default: <saida>/_historico)")
-    args = parser.parse_args()
+SHEET_COLUMN = "_aba"
+SHEET_MODES = ("primeira", "todas")
 
-    in_dir = Path(args.input)
-    out_dir = Path(args.output)
-    cfg_path = Path(args.config)
 
-    if not in_dir.exists() or not in_dir.is_dir():
-        print(f"ERRO: pasta de entrada inválida: {in_dir}")
-        sys.exit(1)
+def sheet_options(cfg: dict, filename: str) -> dict:
+    """Abas a ler (config.json -> leitura.abas, ou leitura.abas_por_seguradora[<seguradora>]).
 
-    if not cfg_path.exists():
-        print(f"ERRO: arquivo de configuração não encontrado: {cfg_path}")
-        sys.exit(1)
+    "primeira" (default: só a 1ª aba, como sempre), "todas" ou uma lista de
+    nomes/regex das abas (sem diferenciar maiúsculas). .csv não tem abas.
+    """
+    leitura = cfg.get("leitura") or {}
+    selecao = leitura.get("abas", "primeira")
+    por_seguradora = leitura.get("abas_por_seguradora") or {}
+    if por_seguradora:
+        seguradora = insurer_name(filename, cfg).upper()
+        selecao = next((v for k, v in por_seguradora.items() if k.upper() == seguradora), selecao)
+    check_sheet_selection(selecao)
+    if Path(filename).suffix.lower() not in (".xlsx", ".xls"):
+        selecao = "primeira"
+    return {"abas": selecao, "workers": max(1, int(leitura.get("abas_workers", 1)))}
 
-    with open(cfg_path, "r", encoding="utf-8") as f:
-        cfg = json.load(f)
 
-    ref_dt = parse_reference_date(args.ref_date) if args.ref_date else None
+def check_sheet_selection(selecao, chave: str = "leitura.abas"):
+    """ValueError se a seleção de abas não for "primeira", "todas" ou uma lista de regex válidas."""
+    if isinstance(selecao, str):
+        if selecao in SHEET_MODES:
+            return
+    elif isinstance(selecao, list) and selecao and all(isinstance(a, str) for a in selecao):
+        for padrao in selecao:
+            try:
+                re.compile(padrao)
+            except re.error as e:
+                raise ValueError(f"{chave}: regex inválida {padrao!r} ({e})") from None
+        return
+    raise ValueError(f"{chave} inválido: {selecao!r} (use {', '.join(SHEET_MODES)} ou uma lista de nomes)")
 
-    run_id = str(uuid.uuid4())
-    log_dir = Path(args.log_dir) if args.log_dir else (out_dir / "_historico")
-    log_dir.mkdir(parents=True, exist_ok=True)
 
-    files = [p for p in in_dir.iterdir() if p.suffix.lower() in [".xlsx", ".xls", ".csv"]]
-    if not files:
-        print("Nenhum arquivo .xlsx/.xls/.csv encontrado na pasta de entrada.")
-        sys.exit(0)
+def select_sheets(nomes: list, selecao) -> list:
+    """Abas de `nomes` (na ordem do arquivo) que a seleção de sheet_options pede."""
+    if selecao == "primeira":
+        escolhidas = nomes[:1]
+    elif selecao == "todas":
+        escolhidas = list(nomes)
+    else:
+        padroes = [re.compile(p, flags=re.IGNORECASE) for p in selecao]
+        escolhidas = [n for n in nomes if any(p.fullmatch(n.strip()) for p in padroes)]
+    if not escolhidas:
+        raise ValueError(f"nenhuma aba corresponde a leitura.abas={selecao!r} (abas: {', '.join(nomes)})")
+    return escolhidas
 
-    resumos = []
-    per_file_logs = []
-    for p in files:
-        resumo = process_file(p, out_dir, cfg, ref_date=ref_dt)
-        resumos.append(resumo)
-        if resumo.get("status") == "ok":
-            print(f"[OK] {p.name} -> {resumo.get('mode')} | linhas: {resumo.get('linhas_entrada')} -> {resumo.get('linhas_saida')}")
-        else:
-            print(f"[ERRO] {p.name} -> {resumo.get('status')} | {resumo.get('detalhe', '')}")
-        per_file_logs.append({
-            "run_id": run_id,
-            "arquivo": p.name,
-            "modo": resumo.get("mode"),
-            "status": resumo.get("status"),
-            "linhas_entrada": resumo.get("linhas_entrada"),
+
+def _xlsx_header(ws) -> list:
+    """Cabeçalho da aba com os nomes que o read_excel daria (vazios -> 'Unnamed: n', repetidos -> 'X.1')."""
+    from pandas.io.parsers import TextParser
+
+    ws.reset_dimensions()
+    # O read_excel usa sempre a 1ª linha da aba como cabeçalho
+    header = [_convert_xlsx_cell(c) for c in next(ws.rows, ())]
+    while header and header[-1] == "":
+        header.pop()
+    return list(TextParser([header], header=0).read().columns) if header else []
+
+
+def _read_xlsx_sheet(path: Path, aba: str) -> "pd.DataFrame|None":
+    """Uma aba inteira; roda num processo auxiliar na leitura paralela das abas."""
+    return next(_iter_xlsx_chunks(path, sys.maxsize, aba=aba), None)
+
+
+def read_sheets(path: Path, selecao, info: "dict|None" = None, workers: int = 1) -> pd.DataFrame:
+    """Lê as abas escolhidas e junta numa tabela, com o nome da aba na 1ª coluna (_aba).
+
+    O workbook é aberto uma vez (as strings compartilhadas servem a todas as
+    abas). Com workers > 1, cada aba é convertida num processo separado, que
+    reabre o arquivo só para ela. Registra em info "linhas_por_aba"
+    ('Garantia=1200; Fiança=340') e "colunas_por_aba" (cabeçalho de cada aba).
+    """
+    info = info if info is not None else {}
+    ext = path.suffix.lower()
+    if ext == ".xlsx":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+        try:
+            nomes = select_sheets(wb.sheetnames, selecao)
+            if workers > 1 and len(nomes) > 1:
+                from concurrent.futures import ProcessPoolExecutor
+
+                with ProcessPoolExecutor(max_workers=min(workers, len(nomes)), initializer=_init_pool_worker) as ex:
+                    frames = list(ex.map(_read_xlsx_sheet, [path] * len(nomes), nomes))
+            else:
+                frames = [next(_xlsx_frames(wb[n], sys.maxsize), None) for n in nomes]
+        finally:
+            wb.close()
+    elif ext == ".xls":
+        with pd.ExcelFile(path, engine="xlrd") as xl:
+            nomes = select_sheets(xl.sheet_names, selecao)
+            frames = [xl.parse(n) for n in nomes]
+    else:
+        raise ValueError(f"Extensão sem abas: {ext}")
+
+    partes, linhas, colunas = [], {}, {}
+    for nome, df in zip(nomes, frames):
+        df = df if df is not None else pd.DataFrame()
+        linhas[nome] = len(df)
+        colunas[nome] = list(df.columns)
+        if len(df):
+            df.insert(0, SHEET_COLUMN, nome)
+            partes.append(df)
+    info["linhas_por_aba"] = "; ".join(f"{n}={k}" for n, k in linhas.items())
+    info["colunas_por_aba"] = colunas
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+
+def detect_sheet_columns(raw: pd.DataFrame, colunas_por_aba: dict, cfg: dict, trace: "dict|None" = None) -> dict:
+    """detect_columns em cada aba, com o cabeçalho dela ({aba: colmap}).
+
+    Só entram abas com o número da apólice: resumos e instruções ficam de
+    fora mesmo que alguma coluna case (ex.: "Total" como IS). trace recebe,
+    por aba, as regras usadas em cada coluna.
+    """
+    colmaps = {}
+    for aba, colunas in colunas_por_aba.items():
+        regras = {}
+        # Só as colunas que sobraram após drop_columns_contains
+        vazio = pd.DataFrame(columns=[c for c in colunas if c in raw.columns])
+        colmap = detect_columns(vazio, cfg["column_synonyms"], trace=regras)
+        if "num_apolice" in colmap:
+            colmaps[aba] = colmap
+            if trace is not None:
+                trace[aba] = regras
+    return colmaps
+
+
+def format_sheet_column_rules(trace: dict) -> str:
+    """'[Garantia] num_apolice=exato:apolice; ... | [Fiança] ...' (para o resumo/CSV)."""
+    return " | ".join(f"[{aba}] {format_column_rules(regras)}" for aba, regras in trace.items())
+
+
+def normalize_sheets(raw: pd.DataFrame, colmaps: dict, datas: "dict|None" = None) -> tuple:
+    """select_and_normalize aba a aba e junta tudo com os nomes canônicos: (df, present).
+
+    Colunas que só algumas abas têm ficam vazias nas demais; a ordem das
+    linhas é a do arquivo (abas na ordem do workbook).
+    """
+    abas = raw[SHEET_COLUMN].to_numpy()
+    partes = []
+    for aba, colmap in colmaps.items():
+        present = [c for c in OUTPUT_COLUMNS_ORDER if c in colmap]
+        partes.append(select_and_normalize(raw[abas == aba], colmap, present, datas))
+    df = pd.concat(partes, ignore_index=True)
+    present = [c for c in OUTPUT_COLUMNS_ORDER if c in df.columns]
+    return df[present], present
+
+
+def _add_missing_columns(df: pd.DataFrame, present: list) -> pd.DataFrame:
+    """Completa df com as colunas canônicas que faltam (datas como NaT), na ordem de present."""
+    for c in present:
+        if c not in df.columns:
+            df[c] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[us]") if c in DATE_COLUMNS else float("nan")
+    return df[present]
+
+
+def iter_sheet_chunks(path: Path, selecao, chunk_rows: int, info: "dict|None" = None):
+    """Gera (cabeçalhos, aba, bloco) das abas escolhidas, uma aba depois da outra.
+
+    O primeiro item traz só os cabeçalhos ({aba: colunas}, bloco None), lidos
+    antes de qualquer linha, para que os blocos de todas as abas tenham as
+    mesmas colunas na aba original. .xls é carregado aba a aba e fatiado.
+    """
+    info = info if info is not None else {}
+    linhas = {}
+    ext = path.suffix.lower()
+    if ext == ".xlsx":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+        try:
+            nomes = select_sheets(wb.sheetnames, selecao)
+            yield {n: _xlsx_header(wb[n]) for n in nomes}, None, None
+            for n in nomes:
+                linhas[n] = 0
+                for chunk in _xlsx_frames(wb[n], chunk_rows):
+                    linhas[n] += len(chunk)
+                    yield None, n, chunk
+        finally:
+            wb.close()
+    elif ext == ".xls":
+        with pd.ExcelFile(path, engine="xlrd") as xl:
+            nomes = select_sheets(xl.sheet_names, selecao)
+            yield {n: list(xl.parse(n, nrows=0).columns) for n in nomes}, None, None
+            for n in nomes:
+                df = xl.parse(n)
+                linhas[n] = len(df)
+                for start in range(0, len(df), chunk_rows):
+                    yield None, n, df.iloc[start:start + chunk_rows].reset_index(drop=True)
+    else:
+        raise ValueError(f"Extensão sem abas: {ext}")
+    info["linhas_por_aba"] = "; ".join(f"{n}={k}" for n, k in linhas.items())
+
+
+# ----------------------- Cache de leitura -----------------------
+
+# Só formatos de dados (pyarrow): o cache pode ficar numa pasta compartilhada
+# (--cache-dir), e ler pickle de lá executaria código de quem gravou o arquivo
+CACHE_FORMATS = ("feather", "parquet")
+
+# Camada em memória na frente do cache em disco, só útil num processo que roda
+# várias execuções (servir/GUI): chave -> (DataFrame, info da leitura, MB)
+_MEMORY_CACHE = {}
+_MEMORY_CACHE_MB = 0  # default de cache.memoria_mb; servir() liga
+
+
+def _memory_cache_get(key: str):
+    item = _MEMORY_CACHE.pop(key, None)
+    if item is None:
+        return None
+    _MEMORY_CACHE[key] = item  # reinsere no fim (LRU)
+    return item
+
+
+def _memory_cache_put(key: str, df: pd.DataFrame, info: dict, max_mb: float):
+    mb = df.memory_usage(deep=True).sum() / (1024 * 1024)
+    if mb > max_mb:
+        return
+    _MEMORY_CACHE.pop(key, None)
+    _MEMORY_CACHE[key] = (df, dict(info), mb)
+    total = sum(item[2] for item in _MEMORY_CACHE.values())
+    while total > max_mb:
+        _, _, mb_antigo = _MEMORY_CACHE.pop(next(iter(_MEMORY_CACHE)))
+        total -= mb_antigo
+
+
+def cache_options(cfg: dict, out_dir: Path) -> dict:
+    """Opções do cache de leitura (config.json -> "cache"); default: ligado, em <saida>/_cache_leitura."""
+    opts = cfg.get("cache") or {}
+    formato = opts.get("formato", "feather")
+    if formato not in CACHE_FORMATS:
+        raise ValueError(f"cache.formato inválido: {formato!r} (use {', '.join(CACHE_FORMATS)})")
+    return {
+        "enabled": bool(opts.get("enabled", True)),
+        "dir": Path(opts["dir"]) if opts.get("dir") else out_dir / "_cache_leitura",
+        "max_mb": float(opts.get("max_mb", 2048)),
+        "formato": formato,
+        "memoria_mb": float(opts.get("memoria_mb", _MEMORY_CACHE_MB)),
+    }
+
+
+def _cache_key(path: Path, variante: str = "") -> str:
+    st = path.stat()
+    txt = f"{path.resolve()}|{st.st_mtime_ns}|{st.st_size}|{SCRIPT_VERSION}|{variante}"
+    return hashlib.sha1(txt.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def has_pyarrow() -> bool:
+    """pyarrow instalado? Sem ele não há cache em disco nem índice consolidado."""
+    import importlib.util
+
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _write_frame(df: pd.DataFrame, path: Path, formato: str):
+    if formato == "feather":
+        df.to_feather(path)
+    elif formato == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"formato de cache inválido: {formato!r}")
+
+
+def _read_frame(path: Path, formato: str) -> pd.DataFrame:
+    # Nunca pickle: uma entrada antiga (ou plantada) em .pickle cai aqui e é relida da planilha
+    if formato == "feather":
+        return pd.read_feather(path)
+    if formato == "parquet":
+        return pd.read_parquet(path)
+    raise ValueError(f"formato de cache inválido: {formato!r}")
+
+
+def _store_frame(df: pd.DataFrame, folder: Path, key: str, formato: str, verify: bool = True) -> str:
+    """Grava o DataFrame em folder/key.<formato> e devolve o formato usado.
+
+    Formatos colunares (pyarrow) não aceitam qualquer DataFrame (ex.: colunas
+    object com tipos misturados) e podem mudar dtypes; nesses casos levanta
+    RuntimeError e o frame simplesmente não é guardado. Com verify=False
+    aceita a conversão de dtypes do formato colunar.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    data_path = folder / f"{key}.{formato}"
+    tmp = data_path.with_name(data_path.name + ".tmp")
+    try:
+        _write_frame(df, tmp, formato)
+        fiel = not verify or _read_frame(tmp, formato).equals(df)
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"não foi possível gravar {data_path}: {e}") from e
+    if not fiel:
+        tmp.unlink()
+        raise RuntimeError(f"{data_path}: o formato {formato} não preserva este DataFrame")
+    os.replace(tmp, data_path)
+    return formato
+
+
+def read_any_file_cached(path: Path, cfg: dict, out_dir: Path, info: "dict|None" = None,
+                         colunas: "dict|None" = None, abas: "dict|None" = None) -> pd.DataFrame:
+    """read_any_file com cache em disco (chave: caminho, mtime e tamanho do arquivo, e as colunas/abas lidas)."""
+    info = info if info is not None else {}
+    opts = cache_options(cfg, out_dir)
+    csv_engine = (cfg.get("leitura") or {}).get("csv_engine", "c")
+    if not opts["enabled"]:
+        info["cache"] = "desligado"
+        return read_any_file(path, info, csv_engine=csv_engine, colunas=colunas, abas=abas)
+
+    variante = csv_engine if path.suffix.lower() == ".csv" else ""
+    if colunas is not None:
+        variante += "|colunas=" + json.dumps(list(colunas.items()), ensure_ascii=False, default=str)
+    if abas is not None:
+        variante += "|abas=" + json.dumps(abas["abas"], ensure_ascii=False)
+    key = _cache_key(path, variante)
+    em_disco = has_pyarrow()
+    if opts["memoria_mb"] > 0:
+        item = _memory_cache_get(key)
+        if item is not None:
+            info.update(item[1])
+            info["cache"] = "memoria"
+            # Cópia rasa: o processamento remove duplicados com inplace e não pode alterar a entrada guardada
+            return item[0].copy(deep=False)
+    meta_path = opts["dir"] / f"{key}.json"
+    if em_disco and meta_path.exists():
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            df = _read_frame(opts["dir"] / f"{key}.{meta['formato']}", meta["formato"])
+            os.utime(meta_path)  # marca o acesso (LRU)
+            info.update(meta.get("leitura", {}))
+            if opts["memoria_mb"] > 0:
+                _memory_cache_put(key, df, info, opts["memoria_mb"])
+                df = df.copy(deep=False)
+            info["cache"] = "acerto"
+            return df
+        except Exception:
+            pass  # entrada incompleta/corrompida: lê de novo e regrava
+
+    df = read_any_file(path, info, csv_engine=csv_engine, colunas=colunas, abas=abas)
+    if opts["memoria_mb"] > 0:
+        _memory_cache_put(key, df, info, opts["memoria_mb"])
+        df = df.copy(deep=False)
+    if not em_disco:
+        info["cache"] = "sem_pyarrow"
+        return df
+    try:
+        fmt = _store_frame(df, opts["dir"], key, opts["formato"])
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"arquivo": str(path.resolve()), "formato": fmt, "leitura": dict(info)}, f, ensure_ascii=False)
+        info["cache"] = "gravado"
+    except Exception:
+        # Cache é só otimização: falha de escrita (disco cheio, permissão) não impede o processamento
+        info["cache"] = "erro_gravacao"
+    return df
+
+
+def evict_cache(cache_dir: Path, max_mb: float) -> int:
+    """Remove as entradas menos usadas até o cache caber em max_mb. Devolve quantas saíram."""
+    if not cache_dir.exists():
+        return 0
+    entradas = []
+    for meta_path in cache_dir.glob("*.json"):
+        arquivos = [meta_path] + [p for p in cache_dir.glob(f"{meta_path.stem}.*") if p != meta_path]
+        try:
+            tamanho = sum(p.stat().st_size for p in arquivos)
+            entradas.append((meta_path.stat().st_mtime, tamanho, arquivos))
+        except FileNotFoundError:
+            continue
+    total = sum(e[1] for e in entradas)
+    limite = max_mb * 1024 * 1024
+    removidas = 0
+    for _, tamanho, arquivos in sorted(entradas, key=lambda e: e[0]):
+        if total <= limite:
+            break
+        for p in arquivos:
+            p.unlink(missing_ok=True)
+        total -= tamanho
+        removidas += 1
+    return removidas
+
+# -------------- Data de referência (status) --------------
+
+def parse_reference_date(s: str):
+    """Converte uma string em pd.Timestamp (date-only). Aceita '30/09/2025', '2025-09-30', '30-09-2025'."""
+    if not s:
+        return None
+    ts = pd.to_datetime(s, dayfirst=True, errors='coerce')
+    if pd.isna(ts):
+        return None
+    return pd.Timestamp(ts.date())
+
+
+def parse_reference_dates(valores) -> list:
+    """Datas de --data: várias, separadas por espaço, vírgula ou ';' ('hoje' = data atual).
+
+    Sem repetidas, na ordem dada (a primeira é a do status_automatico).
+    ValueError se alguma não for reconhecida.
+    """
+    if isinstance(valores, str):
+        valores = [valores]
+    datas = []
+    for texto in valores:
+        for v in re.split(r"[\s,;]+", texto.strip()):
+            if not v:
+                continue
+            ts = pd.Timestamp(datetime.now().date()) if v.lower() == "hoje" else parse_reference_date(v)
+            if ts is None:
+                raise ValueError(f"data de referência inválida: {v!r} (ex.: 30/09/2025)")
+            if ts not in datas:
+                datas.append(ts)
+    return datas
+
+# ----------------------- Escrita das saídas -----------------------
+
+ORIGINAL_SHEET_OPTIONS = ("incluir", "omitir", "separado")
+
+
+def output_options(cfg: dict) -> dict:
+    """Opções de saída (config.json -> "output"), com os defaults do comportamento original."""
+    opts = cfg.get("output") or {}
+    writer = opts.get("writer", "openpyxl")
+    original = opts.get("original_sheet", "incluir")
+    if writer not in OUTPUT_WRITERS:
+        raise ValueError(f"output.writer inválido: {writer!r} (use {', '.join(OUTPUT_WRITERS)})")
+    if original not in ORIGINAL_SHEET_OPTIONS:
+        raise ValueError(f"output.original_sheet inválido: {original!r} (use {', '.join(ORIGINAL_SHEET_OPTIONS)})")
+    return {"writer": writer, "original_sheet": original}
+
+
+def write_output_openpyxl(out_path: Path, result: pd.DataFrame, raw: "pd.DataFrame|None"):
+    with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
+        # Aba com o resultado padronizado
+        result.to_excel(writer, index=False, sheet_name="UNIQUE")
+        # Aba com os dados originais lidos do arquivo de entrada
+        if raw is not None:
+            try:
+                raw.to_excel(writer, index=False, sheet_name="original")
+            except Exception:
+                # Em caso de dados muito grandes ou tipos não suportados, converte para string
+                raw_copy = raw.astype(str)
+                raw_copy.to_excel(writer, index=False, sheet_name="original")
+
+
+def _excel_safe_value(v):
+    """Valor que o openpyxl grava sem erro: tipos desconhecidos e datas com fuso viram texto, sem caracteres de controle."""
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE, NUMERIC_TYPES, TIME_TYPES
+
+    if v is None or isinstance(v, NUMERIC_TYPES):
+        return v
+    if isinstance(v, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", v) if ILLEGAL_CHARACTERS_RE.search(v) else v
+    if isinstance(v, TIME_TYPES) and getattr(v, "tzinfo", None) is None:
+        return v
+    return ILLEGAL_CHARACTERS_RE.sub("", str(v))
+
+
+def _excel_safe_dtype(dtype) -> bool:
+    """Colunas numéricas, booleanas e de data sem fuso não precisam de limpeza valor a valor."""
+    import numpy as np
+    from pandas.api.types import is_numeric_dtype
+
+    if isinstance(dtype, np.dtype):
+        return dtype.kind in "biufmM"
+    return is_numeric_dtype(dtype)
+
+
+def append_frame_rows(ws, df: pd.DataFrame, chunk_rows: int = 10_000, header: bool = True):
+    """Anexa um DataFrame a uma worksheet write-only em blocos (memória constante por bloco).
+
+    Cada bloco é limpo antes de gravar (texto sem caracteres de controle,
+    tipos que o openpyxl não aceita convertidos em texto): depois que o
+    ws.append de uma worksheet write-only falha, ela não aceita mais linhas.
+    """
+    if header:
+        ws.append([_excel_safe_value(str(c)) for c in df.columns])
+    seguras = [_excel_safe_dtype(dt) for dt in df.dtypes]
+    for start in range(0, len(df), chunk_rows):
+        bloco = df.iloc[start:start + chunk_rows].astype(object)
+        bloco = bloco.where(bloco.notna(), None)
+        colunas = []
+        for j, segura in enumerate(seguras):
+            valores = bloco.iloc[:, j].tolist()
+            colunas.append(valores if segura else [_excel_safe_value(v) for v in valores])
+        for row in (zip(*colunas) if colunas else [()] * len(bloco)):
+            ws.append(row)
+
+
+def write_output_streaming(out_path: Path, result: pd.DataFrame, raw: "pd.DataFrame|None"):
+    """Grava com worksheets write-only do openpyxl: as linhas vão direto para o disco."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    append_frame_rows(wb.create_sheet("UNIQUE"), result)
+    if raw is not None:
+        append_frame_rows(wb.create_sheet("original"), raw)
+    wb.save(out_path)
+
+
+OUTPUT_WRITERS = {
+    "openpyxl": write_output_openpyxl,
+    "streaming": write_output_streaming,
+}
+
+
+def write_outputs(out_dir: Path, stem: str, mode: str, result: pd.DataFrame, raw: pd.DataFrame, cfg: dict) -> dict:
+    """Grava o xlsx de saída com o writer configurado; devolve os caminhos gerados."""
+    opts = output_options(cfg)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"{stem}__{mode}_automatico.xlsx"
+
+    incluir_original = opts["original_sheet"] == "incluir"
+    OUTPUT_WRITERS[opts["writer"]](out_path, result, raw if incluir_original else None)
+
+    saidas = {"saida": str(out_path)}
+    if opts["original_sheet"] == "separado":
+        # Dados originais fora do xlsx, compactados (bem mais rápido e menor que a aba "original")
+        original_path = out_dir / f"{stem}__original.csv.gz"
+        raw.to_csv(original_path, index=False, encoding="utf-8", compression="gzip")
+        saidas["saida_original"] = str(original_path)
+    return saidas
+
+
+# ----------------------- Instrumentação -----------------------
+
+_PEAK_RESET_OK = None
+
+
+def _reset_peak_rss() -> bool:
+    """Zera o pico de RSS do processo (Linux: /proc/self/clear_refs = 5), para
+    medir o pico de cada etapa e não o do processo inteiro."""
+    global _PEAK_RESET_OK
+    if _PEAK_RESET_OK is False:
+        return False
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        _PEAK_RESET_OK = True
+    except OSError:
+        _PEAK_RESET_OK = False
+    return _PEAK_RESET_OK
+
+
+def peak_rss_mb() -> "float|None":
+    """Pico de memória residente do processo em MB (None se a plataforma não informa)."""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/status", "r") as f:
+                for linha in f:
+                    if linha.startswith("VmHWM:"):
+                        return int(linha.split()[1]) / 1024
+        except OSError:
+            pass
+    if os.name == "nt":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            pmc = PROCESS_MEMORY_COUNTERS()
+            pmc.cb = ctypes.sizeof(pmc)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(pmc), pmc.cb):
+                return pmc.PeakWorkingSetSize / (1024 * 1024)
+        except Exception:
+            pass
+        return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: KB no Linux, bytes no macOS
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+class StageTimer:
+    """Tempo de parede e pico de memória por etapa do processamento de um arquivo.
+
+    Etapas repetidas (modo em blocos) somam o tempo e guardam o maior pico.
+    Onde o pico não pode ser zerado (Windows/macOS), o valor é o pico do
+    processo até o fim da etapa.
+    """
+
+    def __init__(self, arquivo: "str|None" = None):
+        self.etapas = {}
+        self.arquivo = arquivo
+        self.linhas = None  # linhas lidas até agora (vai nos eventos de progresso)
+        self._inicio = time.perf_counter()
+
+    @contextmanager
+    def __call__(self, nome: str):
+        if _PROGRESS_HOOK is not None and self.arquivo:
+            _PROGRESS_HOOK(self.arquivo, nome, self.linhas)
+        _reset_peak_rss()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            pico = peak_rss_mb()
+            etapa = self.etapas.setdefault(nome, {"s": 0.0, "mem_pico_mb": None})
+            etapa["s"] += dt
+            if pico is not None and (etapa["mem_pico_mb"] is None or pico > etapa["mem_pico_mb"]):
+                etapa["mem_pico_mb"] = pico
+
+    def resumo(self) -> dict:
+        """Colunas para o resumo: t_<etapa>_s, t_total_s, pico de memória e o texto compacto 'etapas'."""
+        out = {f"t_{nome}_s": round(e["s"], 4) for nome, e in self.etapas.items()}
+        out["t_total_s"] = round(time.perf_counter() - self._inicio, 4)
+        picos = {nome: e["mem_pico_mb"] for nome, e in self.etapas.items() if e["mem_pico_mb"] is not None}
+        if picos:
+            etapa_pico = max(picos, key=picos.get)
+            out["mem_pico_mb"] = round(picos[etapa_pico], 1)
+            out["mem_pico_etapa"] = etapa_pico
+        out["etapas"] = "; ".join(
+            f"{nome}={e['s']:.3f}s" + (f"/{e['mem_pico_mb']:.0f}MB" if e["mem_pico_mb"] is not None else "")
+            for nome, e in self.etapas.items()
+        )
+        out["etapas_detalhe"] = {
+            nome: {"s": round(e["s"], 6), "mem_pico_mb": None if e["mem_pico_mb"] is None else round(e["mem_pico_mb"], 1)}
+            for nome, e in self.etapas.items()
+        }
+        return out
+
+
+# ----------------------- Progresso (GUI) -----------------------
+
+# Com --progresso, cada evento vai para o stdout numa linha "@@PROGRESSO {json}";
+# as demais linhas continuam sendo o log legível
+PROGRESS_PREFIX = "@@PROGRESSO "
+CANCEL_COMMAND = "cancelar"
+
+# Chamado pelo StageTimer ao entrar em cada etapa (só no processo principal; nos workers fica None)
+_PROGRESS_HOOK = None
+
+
+def set_progress_hook(fn):
+    global _PROGRESS_HOOK
+    _PROGRESS_HOOK = fn
+
+
+def emit_progress(evento: str, **dados):
+    print(PROGRESS_PREFIX + json.dumps({"evento": evento, **dados}, ensure_ascii=False, default=str), flush=True)
+
+
+def watch_cancel(fd: "int|None" = None):
+    """Lê comandos da entrada padrão numa thread; CANCEL_COMMAND liga o Event devolvido.
+
+    Lê o descritor direto (os.read), sem o lock do sys.stdin: o pool de
+    processos (fork) fecha o sys.stdin herdado em cada worker e travaria se a
+    thread estivesse bloqueada dentro dele. O fim da entrada não cancela nada.
+    """
+    import threading
+
+    cancelar = threading.Event()
+    if fd is None:
+        if sys.stdin is None:
+            return cancelar
+        try:
+            fd = sys.stdin.fileno()
+        except (OSError, ValueError):
+            return cancelar
+
+    def ler():
+        pendente = b""
+        try:
+            while True:
+                bloco = os.read(fd, 1024)
+                if not bloco:
+                    return
+                pendente += bloco
+                *linhas, pendente = pendente.split(b"\n")
+                if any(l.strip().lower() == CANCEL_COMMAND.encode() for l in linhas):
+                    cancelar.set()
+                    return
+        except OSError:
+            pass
+
+    threading.Thread(target=ler, name="cancelamento", daemon=True).start()
+    return cancelar
+
+
+class ProgressTracker:
+    """Eventos de progresso de uma execução: totais, etapa de cada arquivo, linhas e ETA.
+
+    O ETA usa o volume (bytes) já processado nesta execução; arquivos
+    reaproveitados (--incremental) contam como concluídos desde o início.
+    """
+
+    def __init__(self, files: list, reaproveitados: "set|None" = None, workers: int = 1):
+        reaproveitados = reaproveitados or set()
+        self.bytes = {p.name: p.stat().st_size for p in files}
+        self.total = len(files)
+        self.bytes_total = sum(self.bytes.values())
+        self.concluidos = 0
+        self.bytes_concluidos = 0
+        self.bytes_processados = 0
+        self.linhas = 0
+        self._inicio = time.perf_counter()
+        emit_progress("inicio", total_arquivos=self.total, total_bytes=self.bytes_total,
+                      reaproveitados=len(reaproveitados), workers=workers)
+
+    def arquivo_inicio(self, p: Path):
+        emit_progress("arquivo", arquivo=p.name, indice=self.concluidos + 1, bytes=self.bytes[p.name])
+
+    def etapa(self, arquivo: str, etapa: str, linhas: "int|None"):
+        emit_progress("etapa", arquivo=arquivo, etapa=etapa, linhas=linhas)
+
+    def arquivo_fim(self, p: Path, resumo: dict):
+        self.concluidos += 1
+        self.bytes_concluidos += self.bytes[p.name]
+        t = resumo.get("t_total_s")
+        linhas = resumo.get("linhas_entrada")
+        if resumo.get("incremental") != "reaproveitado" and resumo.get("status") != "cancelado":
+            self.bytes_processados += self.bytes[p.name]
+            self.linhas += linhas or 0
+        decorrido = time.perf_counter() - self._inicio
+        eta = None
+        if self.bytes_processados and self.concluidos < self.total:
+            eta = round(decorrido / self.bytes_processados * (self.bytes_total - self.bytes_concluidos), 1)
+        emit_progress("arquivo_fim", arquivo=p.name, status=resumo.get("status"),
+                      incremental=resumo.get("incremental"), linhas=linhas, t_s=t,
+                      linhas_por_s=round(linhas / t) if linhas and t else None,
+                      concluidos=self.concluidos, total_arquivos=self.total,
+                      bytes_concluidos=self.bytes_concluidos, total_bytes=self.bytes_total,
+                      decorrido_s=round(decorrido, 1), eta_s=eta)
+
+    def fim(self, resumos: list):
+        status = [r.get("status") for r in resumos]
+        emit_progress("fim", ok=status.count("ok"), cancelados=status.count("cancelado"),
+                      erros=sum(1 for st in status if st not in ("ok", "cancelado")),
+                      linhas=self.linhas, decorrido_s=round(time.perf_counter() - self._inicio, 1))
+
+
+# ----------------------- Deduplicação -----------------------
+
+DEDUP_SAMPLE_KEYS = 5
+_FINGERPRINT_MIX = 0x100000001B3  # primo do FNV-1a 64 bits
+_SPLITMIX_GAMMA = 0x9E3779B97F4A7C15
+_SECOND_HASH_KEY = "seguradoras.h2.."  # 16 caracteres, como o hash_key do pandas
+_CARDINALITY_SAMPLE = 1000
+# Abaixo disso o DataFrame.duplicated direto é mais rápido que a impressão digital
+# (medido: 25 mil x 53 colunas 0,10s contra 0,14s; com até ~30 colunas ele ganha mesmo com 1 milhão de linhas)
+DEDUP_FINGERPRINT_MIN_ROWS = 50_000
+DEDUP_FINGERPRINT_MIN_COLS = 40
+
+
+def dedup_options(cfg: dict) -> dict:
+    """config.json -> "deduplicacao": colunas (None = todas, como sempre) e nº de chaves de exemplo no resumo."""
+    opts = cfg.get("deduplicacao") or {}
+    colunas = opts.get("colunas")
+    if colunas is not None and not (isinstance(colunas, list) and all(isinstance(c, str) for c in colunas)):
+        raise ValueError(f"deduplicacao.colunas inválido: {colunas!r} (use null ou uma lista de nomes de colunas)")
+    return {"colunas": colunas or None, "exemplos": int(opts.get("exemplos", DEDUP_SAMPLE_KEYS))}
+
+
+def dedup_columns(columns, colunas_cfg: "list|None", colmaps: list) -> "list|None":
+    """Colunas da planilha que definem uma linha repetida; None = todas.
+
+    Cada nome de deduplicacao.colunas pode ser canônico (ex.: "num_apolice",
+    trocado pela coluna detectada em cada aba) ou o cabeçalho da planilha.
+    Nomes que não existem no arquivo são ignorados; se nenhum existir, usa todas.
+    """
+    if not colunas_cfg:
+        return None
+    existentes = set(columns)
+    subset = []
+    for nome in colunas_cfg:
+        subset += [m[nome] for m in colmaps if nome in m] or [nome]
+    subset = [c for c in dict.fromkeys(subset) if c in existentes]
+    if subset and SHEET_COLUMN in existentes:
+        subset.insert(0, SHEET_COLUMN)  # mesma linha em abas diferentes não é repetida
+    return subset or None
+
+
+def _column_fingerprint(s: pd.Series):
+    """Hash de 64 bits por valor; valores iguais para o drop_duplicates têm o mesmo hash."""
+    import numpy as np
+    from pandas.api.types import is_float_dtype
+
+    if is_float_dtype(s.dtype) and isinstance(s.dtype, np.dtype):
+        v = s.to_numpy()
+        # -0.0 == 0.0 e NaN == NaN para o drop_duplicates, mas os bits diferem
+        s = pd.Series(np.where(np.isnan(v), np.nan, v + 0.0), copy=False)
+    return pd.util.hash_pandas_object(s, index=False, categorize=True).to_numpy()
+
+
+def duplicate_rows(df: pd.DataFrame, subset: "list|None" = None):
+    """Mesmo resultado de df.duplicated(subset, keep="first"), sem fatorar todas as colunas em todas as linhas.
+
+    Acumula, coluna a coluna (das mais variadas para as menos), uma impressão
+    digital de 64 bits por linha. Linha cuja impressão já é única não pode
+    ser repetida e sai da conta, então as colunas seguintes só são lidas nas
+    linhas que ainda empatam. As poucas candidatas que sobram passam pelo
+    duplicated exato: colisão de hash não muda o resultado. Em planilhas com
+    menos de DEDUP_FINGERPRINT_MIN_ROWS linhas ou DEDUP_FINGERPRINT_MIN_COLS
+    colunas usa o duplicated direto, que aí é mais rápido.
+    """
+    import numpy as np
+
+    cols = list(subset) if subset else list(df.columns)
+    repetida = np.zeros(len(df), dtype=bool)
+    if len(df) < 2 or not cols:
+        return repetida
+    if len(df) < DEDUP_FINGERPRINT_MIN_ROWS or len(cols) < DEDUP_FINGERPRINT_MIN_COLS:
+        return df.duplicated(subset=cols, keep="first").to_numpy()
+    distintos = df[cols].iloc[:_CARDINALITY_SAMPLE].nunique(dropna=False)
+    candidatas = np.arange(len(df))
+    h = np.zeros(len(df), dtype="uint64")
+    # Empate no nº de distintos: colunas tipadas antes das object (hash bem mais barato)
+    for c in sorted(cols, key=lambda c: (-distintos[c], df[c].dtype == object)):
+        col = df[c] if len(candidatas) == len(df) else df[c].iloc[candidatas]
+        h = (h * np.uint64(_FINGERPRINT_MIX)) ^ _column_fingerprint(col)
+        empate = pd.Series(h, copy=False).duplicated(keep=False).to_numpy()
+        candidatas, h = candidatas[empate], h[empate]
+        if not len(candidatas):
+            return repetida
+    repetida[candidatas] = df.iloc[candidatas].duplicated(subset=cols, keep="first").to_numpy()
+    return repetida
+
+
+def _duplicate_key_samples(raw: pd.DataFrame, repetida, chaves: list, n: int) -> str:
+    """Até n valores distintos da apólice (ou da impressão digital da linha) das linhas removidas."""
+    import numpy as np
+
+    linhas = raw.iloc[np.flatnonzero(repetida)[: 50 * n]]
+    chaves = [c for c in chaves if c in raw.columns]
+    if chaves:
+        valores = linhas[chaves].bfill(axis=1).iloc[:, 0].dropna()
+        valores = [str(int(v)) if isinstance(v, float) and v.is_integer() else str(v) for v in valores]
+    else:
+        valores = [f"{h:016x}" for h in row_fingerprints(linhas)]
+    return "; ".join(list(dict.fromkeys(valores))[:n])
+
+
+def deduplicate_rows(raw: pd.DataFrame, subset: "list|None" = None, chaves: "list|None" = None,
+                     exemplos: int = DEDUP_SAMPLE_KEYS) -> tuple:
+    """Remove as linhas repetidas (1ª ocorrência fica) e resume o que saiu.
+
+    Devolve (df, info): info traz "duplicadas_removidas" e, se houver,
+    "exemplos_duplicadas" (valores de `chaves`, ex.: a coluna da apólice).
+    Sem `subset`, mesmas linhas que raw.drop_duplicates(ignore_index=True).
+    """
+    repetida = duplicate_rows(raw, subset)
+    info = {"duplicadas_removidas": int(repetida.sum())}
+    if info["duplicadas_removidas"] and exemplos > 0:
+        info["exemplos_duplicadas"] = _duplicate_key_samples(raw, repetida, chaves or [], exemplos)
+    if subset:
+        info["colunas_deduplicacao"] = "; ".join(c for c in subset if c != SHEET_COLUMN)
+    if not info["duplicadas_removidas"]:
+        return raw.reset_index(drop=True), info
+    return raw[~repetida].reset_index(drop=True), info
+
+
+# ----------------------- Núcleo -----------------------
+
+OUTPUT_COLUMNS_ORDER = [
+    "num_apolice",
+    "apolice_susep",
+    "num_endosso",
+    "tipo_endosso",
+    "data_emissao",
+    "data_inicio_vigencia",
+    "data_fim_vigencia",
+    "status_apolice",
+    "status_automatico",
+    "is",
+]
+DATE_COLUMNS = ["data_emissao", "data_inicio_vigencia", "data_fim_vigencia"]
+
+# Regras de decisão compiladas, por config (chave: conteúdo de rules)
+_COMPILED_RULES = {}
+_REGEX_META = frozenset(".^$*+?{}[]\\|()")
+RULE_MODES = ("agrupar", "ultimo")
+
+
+def _rules_key(rules: dict) -> tuple:
+    sufixos = rules.get("suffix_keywords", {}) if rules.get("suffix_overrides", True) else {}
+    return (
+        tuple(sufixos.get("agrupar", [])),
+        tuple(sufixos.get("ultimo", [])),
+        tuple((r["pattern"], r["mode"]) for r in rules.get("insurer_patterns", [])),
+        rules.get("default_mode", "ultimo"),
+    )
+
+
+def compile_mode_rules(rules: dict) -> dict:
+    """Pré-compila rules do config.json uma vez: sufixos (agrupar, depois
+    último), padrões por seguradora e o default, nessa prioridade.
+
+    Padrões sem metacaracteres (quase todos: 'JUNTO', '_agrupar'...) viram
+    texto minúsculo comparado com `in`; os demais são compilados uma vez.
+    """
+    key = _rules_key(rules)
+    engine = _COMPILED_RULES.get(key)
+    if engine is None:
+        regras = [(kw, "agrupar", f"sufixo:agrupar:{kw}") for kw in key[0]]
+        regras += [(kw, "ultimo", f"sufixo:ultimo:{kw}") for kw in key[1]]
+        regras += [(p, modo, f"seguradora:{p}") for p, modo in key[2]]
+        engine = _rules_engine(regras, len(key[0]) + len(key[1]), key[3])
+        _COMPILED_RULES[key] = engine
+    return engine
+
+
+def _rules_engine(regras: list, inicio_seguradoras: int, default: str) -> dict:
+    """Tabela [(padrão, modo, regra), ...] em prioridade -> regras prontas para _first_rule_index."""
+    testes = []
+    for padrao, _, _ in regras:
+        literal = padrao.isascii() and not _REGEX_META.intersection(padrao)
+        testes.append((padrao.lower() if literal else None, re.compile(padrao, re.IGNORECASE)))
+    return {
+        "testes": testes,
+        "padroes": [padrao for padrao, _, _ in regras],
+        "regras": [(modo, regra) for _, modo, regra in regras],
+        "inicio_seguradoras": inicio_seguradoras,
+        "default": default,
+    }
+
+
+def _first_rule_index(engine: dict, text: str, inicio: int = 0) -> "int|None":
+    """Índice da primeira regra (em prioridade, a partir de `inicio`) que casa com o texto."""
+    testes = engine["testes"]
+    if not text.isascii():
+        # Fora do ASCII, `lower()` e re.IGNORECASE podem discordar: tudo via regex
+        for i in range(inicio, len(testes)):
+            if testes[i][1].search(text):
+                return i
+        return None
+    baixo = text.lower()
+    for i in range(inicio, len(testes)):
+        literal, rx = testes[i]
+        if (literal in baixo) if literal is not None else rx.search(text):
+            return i
+    return None
+
+
+def decide_mode_trace(filename: str, cfg: dict) -> tuple:
+    """Modo do arquivo e a regra que decidiu (ex.: 'sufixo:agrupar:_agrupar',
+    'seguradora:JUNTO' ou 'default')."""
+    engine = compile_mode_rules(cfg.get("rules", {}))
+    i = _first_rule_index(engine, filename)
+    if i is None:
+        return engine["default"], "default"
+    return engine["regras"][i]
+
+
+def decide_mode(filename: str, cfg: dict) -> str:
+    return decide_mode_trace(filename, cfg)[0]
+
+
+def select_and_normalize(raw: pd.DataFrame, colmap: dict, present: list, datas: "dict|None" = None) -> pd.DataFrame:
+    """Recorta as colunas detectadas com os nomes canônicos e converte datas/IS.
+
+    Se `datas` for um dict, acumula por coluna de data os formatos usados e o
+    nº de valores não convertidos (chamadas sucessivas somam, como nos blocos).
+    """
+    df = raw[[colmap[c] for c in present]].copy()
+    df.columns = present
+
+    # Normalizações
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            info = {}
+            df[col] = parse_date_series(df[col], info)
+            if datas is not None:
+                acum = datas.setdefault(col, {"formatos": [], "nao_convertidas": 0})
+                acum["formatos"] = list(dict.fromkeys(acum["formatos"] + info["formatos"]))
+                acum["nao_convertidas"] += info["nao_convertidas"]
+    if "is" in df.columns:
+        df["is"] = br_number_to_float_series(df["is"])
+    return df
+
+
+def format_date_report(datas: dict) -> dict:
+    """'data_emissao=0; data_fim_vigencia=12' e 'data_emissao=%d/%m/%Y,%Y-%m-%d; ...' (para o resumo/CSV)."""
+    return {
+        "datas_nao_convertidas": "; ".join(f"{c}={d['nao_convertidas']}" for c, d in datas.items()),
+        "formatos_datas": "; ".join(f"{c}={','.join(d['formatos'])}" for c, d in datas.items()),
+    }
+
+
+def grouping_keys(df: pd.DataFrame, present: list) -> list:
+    return [c for c in ["num_apolice"] if c in df.columns] or [present[0]]
+
+
+def aggregation_map(df: pd.DataFrame) -> dict:
+    """Agregações do modo agrupar (todas combináveis: aplicá-las de novo sobre parciais dá o mesmo resultado)."""
+    agg_map = {}
+    if "is" in df.columns: agg_map["is"] = "sum"
+    if "data_emissao" in df.columns: agg_map["data_emissao"] = "max"
+    if "data_inicio_vigencia" in df.columns: agg_map["data_inicio_vigencia"] = "min"
+    if "data_fim_vigencia" in df.columns: agg_map["data_fim_vigencia"] = "max"
+
+    for t in ["tipo_endosso", "num_endosso", "status_apolice", "apolice_susep"]:
+        if t in df.columns: agg_map[t] = "last"
+    return agg_map
+
+
+def finalize_result(result: pd.DataFrame, ref_date=None) -> pd.DataFrame:
+    """Recalcula o status pela data fim e reordena as colunas de saída.
+
+    `ref_date` pode ser uma lista de datas (--data com várias): o
+    status_automatico usa a primeira e cada data ganha sua coluna
+    status_automatico_AAAA_MM_DD, logo depois dele.
+    """
+    datas = ref_date if isinstance(ref_date, list) else []
+    extras = []
+    if "data_fim_vigencia" in result.columns:
+        result = recompute_status_by_dates(result, "data_fim_vigencia",
+                                           today_override=datas[0] if datas else ref_date)
+        if datas:
+            result = recompute_status_for_dates(result, "data_fim_vigencia", datas)
+            extras = [status_column_name(d) for d in datas]
+    final_cols = []
+    for c in OUTPUT_COLUMNS_ORDER:
+        if c in result.columns:
+            final_cols.append(c)
+            if c == "status_automatico":
+                final_cols.extend(extras)
+    return result[final_cols]
+
+
+def process_file(path: Path, out_dir: Path, cfg: dict, ref_date: "pd.Timestamp|None" = None) -> dict:
+    filename = path.name
+    mode, regra_modo = decide_mode_trace(filename, cfg)
+    if processing_options(cfg)["chunked"]:
+        return process_file_chunked(path, out_dir, cfg, ref_date=ref_date, mode=mode, regra_modo=regra_modo)
+
+    etapas = StageTimer(filename)
+    leitura = {}
+    colunas_dropadas = []
+    try:
+        with etapas("leitura"):
+            abas = sheet_options(cfg, filename)
+            if abas["abas"] == "primeira":
+                abas = None
+                colunas, colunas_dropadas = select_columns_to_read(path, cfg, leitura)
+            else:
+                colunas = None  # leitura seletiva não se aplica: cada aba tem seu cabeçalho
+            raw = read_any_file_cached(path, cfg, out_dir, leitura, colunas=colunas, abas=abas)
+    except Exception as e:
+        return {"file": filename, "status": "erro_leitura", "detalhe": str(e)}
+    colunas_por_aba = leitura.pop("colunas_por_aba", None)
+    if raw.empty:
+        return {"file": filename, "status": "vazio"}
+    etapas.linhas = len(raw)
+    
+    # Remoção de colunas por tokens (primeira etapa; na leitura seletiva já foi feita no cabeçalho)
+    drop_tokens = (cfg.get('drop_columns_contains') or cfg.get('rules', {}).get('drop_columns_contains'))
+    if drop_tokens and colunas is None:
+        with etapas("remocao_colunas"):
+            raw, colunas_dropadas = drop_columns_by_contains(raw, drop_tokens)
+
+    # Detecção antes da deduplicação: só olha os nomes e diz quais colunas são as chaves
+    regras_colunas = {}
+    if colunas_por_aba is not None:
+        with etapas("deteccao_colunas"):
+            colmaps = detect_sheet_columns(raw, colunas_por_aba, cfg, trace=regras_colunas)
+        if not colmaps:
+            return {"file": filename, "status": "colunas_nao_encontradas", "detalhe": str(colunas_por_aba)}
+        ignoradas = [aba for aba in colunas_por_aba if aba not in colmaps]
+        if ignoradas:
+            leitura["abas_ignoradas"] = "; ".join(ignoradas)
+        mapas = list(colmaps.values())
+    else:
+        with etapas("deteccao_colunas"):
+            colmap = detect_columns(raw, cfg["column_synonyms"], trace=regras_colunas)
+        present = [c for c in OUTPUT_COLUMNS_ORDER if c in colmap]   
+        if not present:
+            return {"file": filename, "status": "colunas_nao_encontradas", "detalhe": str(list(raw.columns))}
+        mapas = [colmap]
+
+    dedup = dedup_options(cfg)
+    with etapas("deduplicacao"):
+        subset = dedup_columns(raw.columns, dedup["colunas"], mapas)
+        chaves = [m["num_apolice"] for m in mapas if "num_apolice" in m]
+        raw, duplicadas = deduplicate_rows(raw, subset, chaves, dedup["exemplos"])
+
+    datas = {}
+    with etapas("normalizacao"):
+        if colunas_por_aba is not None:
+            df, present = normalize_sheets(raw, colmaps, datas)
+        else:
+            df = select_and_normalize(raw, colmap, present, datas)
+
+    # Regras por modo
+    if mode == "agrupar":
+        with etapas("regra"):
+            group_keys = grouping_keys(df, present)
+            result = df.groupby(group_keys, dropna=False).agg(aggregation_map(df)).reset_index()
+    else:
+        # ultimo
+        if "num_apolice" not in df.columns:
+            return {"file": filename, "status": "sem_num_apolice_para_ultimo"}
+        with etapas("regra"):
+            result = latest_per_policy(
+                df,
+                "data_emissao" if "data_emissao" in df.columns else None,
+                "num_endosso" if "num_endosso" in df.columns else None,
+            )
+
+    with etapas("finalizacao"):
+        result = finalize_result(result, ref_date)
+
+    with etapas("escrita"):
+        saidas = write_outputs(out_dir, path.stem, mode, result, raw, cfg)
+    with etapas("consolidado"):
+        parte = write_consolidation_part(out_dir, path.stem, filename, mode, result, cfg)
+    if parte:
+        saidas["parte_consolidado"] = parte
+
+    return {
+        "file": filename,
+        "status": "ok",
+        "mode": mode,
+        "regra_modo": regra_modo,
+        "linhas_entrada": len(raw),
+        "linhas_saida": len(result),
+        **duplicadas,
+        "colunas_detectadas": list(result.columns),
+        "colunas_dropadas": colunas_dropadas,
+        "regras_colunas": (format_column_rules(regras_colunas) if colunas_por_aba is None
+                           else format_sheet_column_rules(regras_colunas)),
+        **format_date_report(datas),
+        **leitura,
+        **saidas,
+        **etapas.resumo(),
+    }
+
+
+# ----------------------- Processamento em blocos -----------------------
+
+def processing_options(cfg: dict) -> dict:
+    """Opções de processamento (config.json -> "processamento")."""
+    opts = cfg.get("processamento") or {}
+    chunk_linhas = int(opts.get("chunk_linhas", 200_000))
+    if chunk_linhas <= 0:
+        raise ValueError(f"processamento.chunk_linhas inválido: {chunk_linhas}")
+    return {"chunked": bool(opts.get("chunked", False)), "chunk_linhas": chunk_linhas}
+
+
+def _convert_xlsx_value(value, data_type):
+    """Mesma conversão que o pandas aplica às células do openpyxl em read_excel."""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    if value is None:
+        return ""
+    if data_type == TYPE_ERROR:
+        return float("nan")
+    if data_type == TYPE_NUMERIC:
+        val = int(value)
+        return val if val == value else float(value)
+    return value
+
+
+def _convert_xlsx_cell(cell):
+    return _convert_xlsx_value(cell.value, cell.data_type)
+
+
+def _xlsx_rows(ws, posicoes: "list|None" = None):
+    """(cabeçalho, linhas) da aba inteira; cada linha vem como (vazia, valores) na largura do cabeçalho.
+
+    Com `posicoes`, só as células dessas colunas são convertidas; nas demais
+    só se olha se há valor, para decidir se a linha está vazia como no
+    read_excel (que olha todas as colunas).
+    """
+    ws.reset_dimensions()
+    rows = ws.rows
+    header = None
+    for row in rows:
+        header = [_convert_xlsx_cell(c) for c in row]
+        while header and header[-1] == "":
+            header.pop()
+        if header:
+            break
+    if not header:
+        return None, iter(())
+    width = len(header)
+
+    def linhas():
+        for row in rows:
+            valores = [_convert_xlsx_cell(c) for c in row][:width]
+            valores += [""] * (width - len(valores))
+            yield all(v == "" for v in valores), valores
+
+    if posicoes is None:
+        return header, linhas()
+    posicoes = [i for i in posicoes if i < width]
+
+    def selecionadas():
+        for row in rows:
+            valores = [_convert_xlsx_cell(row[i]) if i < len(row) else "" for i in posicoes]
+            vazia = all(v == "" for v in valores) and all(c.value is None or c.value == "" for c in row[:width])
+            yield vazia, valores
+
+    return [header[i] for i in posicoes], selecionadas()
+
+
+def _xlsx_frames(ws, chunk_rows: int, colunas: "list|None" = None):
+    """DataFrames de até chunk_rows linhas de uma aba de um workbook já aberto (read-only).
+
+    Cada bloco passa pelo mesmo TextParser usado por pd.read_excel (nomes de
+    colunas, valores ausentes e inferência de tipos), sem carregar a aba toda.
+    Linhas vazias só são emitidas se houver dados depois delas, como no read_excel.
+    Com `colunas` (posições), só as células dessas colunas são convertidas.
+    """
+    from pandas.io.parsers import TextParser
+
+    header, linhas = _xlsx_rows(ws, colunas)
+    if not header:
+        return
+    bloco, vazias = [], []
+    for vazia, valores in linhas:
+        if vazia:
+            vazias.append(valores)
+            continue
+        bloco.extend(vazias)
+        vazias = []
+        bloco.append(valores)
+        if len(bloco) >= chunk_rows:
+            yield TextParser([header] + bloco, header=0, skip_blank_lines=False).read()
+            bloco = []
+    if bloco:
+        yield TextParser([header] + bloco, header=0, skip_blank_lines=False).read()
+
+
+def _iter_xlsx_chunks(path: Path, chunk_rows: int, colunas: "list|None" = None, aba: "str|None" = None):
+    """Lê a aba `aba` (default: a primeira) em modo read-only, em blocos de chunk_rows linhas."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb[aba] if aba is not None else wb.worksheets[0]
+        yield from _xlsx_frames(ws, chunk_rows, colunas)
+    finally:
+        wb.close()
+
+
+def _csv_encoding_full(path: Path, encoding: str) -> str:
+    """Confirma o encoding no arquivo inteiro (em blocos) antes de começar a ler em partes."""
+    import codecs
+
+    if encoding != "utf-8-sig":
+        return encoding
+    dec = codecs.getincrementaldecoder(encoding)()
+    try:
+        with open(path, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                dec.decode(bloco)
+            dec.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return encoding
+
+
+def iter_file_chunks(path: Path, chunk_rows: int, info: "dict|None" = None, colunas: "dict|None" = None):
+    """Gera a entrada em DataFrames de até chunk_rows linhas.
+
+    .csv e .xlsx são lidos em streaming; .xls (xlrd) não tem leitura parcial e
+    é carregado inteiro e fatiado. Com `colunas` ({posição: nome}, só .csv e
+    .xlsx) lê apenas essas colunas.
+    """
+    info = info if info is not None else {}
+    posicoes = list(colunas) if colunas is not None else None
+    for chunk in _iter_chunks(path, chunk_rows, info, posicoes):
+        if colunas is not None:
+            chunk.columns = list(colunas.values())
+        yield chunk
+
+
+def _iter_chunks(path: Path, chunk_rows: int, info: dict, posicoes: "list|None"):
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        encoding, sep = sniff_csv(path)
+        encoding = _csv_encoding_full(path, encoding)
+        info.update({"encoding": encoding, "separador": "\\t" if sep == "\t" else sep, "csv_engine": "c"})
+        with pd.read_csv(path, encoding=encoding, sep=sep, engine="c", chunksize=chunk_rows, usecols=posicoes) as reader:
+            yield from reader
+    elif ext == ".xlsx":
+        yield from _iter_xlsx_chunks(path, chunk_rows, posicoes)
+    elif ext == ".xls":
+        df = pd.read_excel(path, engine="xlrd")
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows].reset_index(drop=True)
+    else:
+        raise ValueError(f"Extensão não suportada: {ext}")
+
+
+def _value_hashes(s: pd.Series, hash_key: "str|None" = None):
+    """Hash de 64 bits por valor, igual para valores iguais para o drop_duplicates em qualquer dtype.
+
+    Números (de colunas numéricas ou object) vão pelo hash do float64, então
+    1 num bloco e 1.0 no outro batem; texto vai pelo hash do texto (o "1.0"
+    não bate com 1.0) e qualquer ausente (NaN, None, NaT) tem o mesmo hash.
+    """
+    import numbers
+
+    import numpy as np
+    from pandas.api.types import infer_dtype, is_bool_dtype, is_numeric_dtype, is_object_dtype
+
+    chave = {} if hash_key is None else {"hash_key": hash_key}
+
+    def como_float(v):
+        v = np.asarray(v, dtype="float64") + 0.0  # -0.0 == 0.0, como no drop_duplicates
+        return pd.util.hash_pandas_object(pd.Series(v, copy=False), index=False).to_numpy().copy()
+
+    if is_numeric_dtype(s.dtype) and not is_bool_dtype(s.dtype):
+        h = como_float(s.to_numpy(dtype="float64", na_value=np.nan))
+    else:
+        h = pd.util.hash_pandas_object(s, index=False, **chave).to_numpy().copy()
+        if is_object_dtype(s.dtype) and infer_dtype(s, skipna=True) not in ("string", "empty", "boolean"):
+            numero = s.map(lambda v: isinstance(v, numbers.Real) and not isinstance(v, bool)).to_numpy(dtype=bool)
+            if numero.any():
+                h[numero] = como_float(s[numero].tolist())
+    ausente = s.isna().to_numpy()
+    if ausente.any():
+        h[ausente] = como_float([np.nan])[0]
+    return h
+
+
+def row_fingerprints(df: pd.DataFrame):
+    """Hash de 64 bits por linha (todas as colunas, valores por _value_hashes)."""
+    import numpy as np
+
+    h = np.zeros(len(df), dtype="uint64")
+    with np.errstate(over="ignore"):
+        for c in df.columns:
+            h = (h * np.uint64(_FINGERPRINT_MIX)) ^ _value_hashes(df[c])
+    return h
+
+
+def _row_fingerprints_2(df: pd.DataFrame):
+    """Segundo hash de 64 bits por linha, independente do de row_fingerprints.
+
+    Outra chave no hash do texto e, em cada coluna, uma mistura não linear
+    (finalizador do splitmix64, com a posição da coluna) antes de combinar.
+    """
+    import numpy as np
+
+    h = np.zeros(len(df), dtype="uint64")
+    with np.errstate(over="ignore"):
+        for j, c in enumerate(df.columns):
+            x = _value_hashes(df[c], _SECOND_HASH_KEY) + np.uint64(j + 1) * np.uint64(_SPLITMIX_GAMMA)
+            x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            h = (h * np.uint64(_FINGERPRINT_MIX)) ^ (x ^ (x >> np.uint64(31)))
+    return h
+
+
+def dedup_across_blocks(df: pd.DataFrame, vistos: list):
+    """Máscara das linhas novas de um bloco (1ª ocorrência), contra o bloco e os anteriores.
+
+    Cada linha vira uma chave de 128 bits (dois hashes de 64 bits
+    independentes): duas linhas diferentes só se confundem com probabilidade
+    da ordem de n²/2¹²⁸. `vistos` guarda só as chaves (16 bytes por linha
+    distinta), em níveis ordenados pelo 1º hash (lista de (h1, h2)) que são
+    juntados dois a dois quando o mais novo alcança o anterior; cada bloco é
+    procurado em poucos níveis, sem reordenar tudo o que já foi visto.
+    """
+    import numpy as np
+
+    h1, h2 = row_fingerprints(df), _row_fingerprints_2(df)
+    novo = ~pd.DataFrame({"h1": h1, "h2": h2}, copy=False).duplicated().to_numpy()
+    for s1, s2 in vistos:
+        ini = np.searchsorted(s1, h1, side="left")
+        qtd = np.searchsorted(s1, h1, side="right") - ini
+        um = qtd == 1
+        novo[um] &= s2[ini[um]] != h2[um]
+        for i in np.flatnonzero(qtd > 1):  # 1º hash repetido no nível (colisão de 64 bits)
+            novo[i] &= h2[i] not in s2[ini[i]:ini[i] + qtd[i]]
+    ordem = np.argsort(h1[novo], kind="stable")
+    vistos.append((h1[novo][ordem], h2[novo][ordem]))
+    while len(vistos) > 1 and len(vistos[-1][0]) >= len(vistos[-2][0]):
+        (a1, a2), (b1, b2) = vistos.pop(), vistos.pop()
+        s1, s2 = np.concatenate([b1, a1]), np.concatenate([b2, a2])
+        ordem = np.argsort(s1, kind="stable")
+        vistos.append((s1[ordem], s2[ordem]))
+    return novo
+
+
+def _group_order(index: pd.Index):
+    """Posições que ordenam os grupos como groupby(sort=True, dropna=False) (tipos misturados e NaN no fim)."""
+    import numpy as np
+
+    codigos = []
+    for nivel in range(index.nlevels):
+        c, unicos = pd.factorize(index.get_level_values(nivel), sort=True)
+        codigos.append(np.where(c < 0, len(unicos), c))
+    return np.lexsort(codigos[::-1])
+
+
+def process_file_chunked(path: Path, out_dir: Path, cfg: dict, ref_date=None, mode: "str|None" = None,
+                         regra_modo: "str|None" = None) -> dict:
+    """Versão de process_file que lê a entrada em blocos.
+
+    Guarda só o estado por apólice (agrupar: somas/máx/mín/últimos; último: a
+    melhor linha até agora), então a memória depende do nº de apólices e não
+    do nº de linhas. A deduplicação entre blocos guarda só uma chave de 128
+    bits por linha distinta (ver dedup_across_blocks) e a aba "original" é
+    gravada bloco a bloco (worksheet write-only).
+    """
+    import gzip
+    from openpyxl import Workbook
+
+    filename = path.name
+    if mode is None:
+        mode, regra_modo = decide_mode_trace(filename, cfg)
+    opts = processing_options(cfg)
+    original_opt = output_options(cfg)["original_sheet"]
+    drop_tokens = (cfg.get('drop_columns_contains') or cfg.get('rules', {}).get('drop_columns_contains'))
+
+    etapas = StageTimer(filename)
+    leitura = {"processamento": "blocos"}
+    vistos = []
+    state = None
+    colmap = present = None
+    colunas_dropadas = []
+    regras_colunas = {}
+    datas = {}
+    endosso_numeric = None
+    linhas_entrada = 0
+    blocos = 0
+    dedup = dedup_options(cfg)
+    duplicadas = {"duplicadas_removidas": 0}
+    exemplos = {}  # dict como conjunto ordenado
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"{path.stem}__{mode}_automatico.xlsx"
+    original_path = out_dir / f"{path.stem}__original.csv.gz"
+    wb = Workbook(write_only=True)
+    ws_unique = wb.create_sheet("UNIQUE")
+    ws_original = wb.create_sheet("original") if original_opt == "incluir" else None
+    gz = None
+
+    cabecalhos = colmaps = None  # várias abas: cabeçalho e colunas detectadas de cada aba
+    try:
+        try:
+            with etapas("leitura"):
+                abas = sheet_options(cfg, filename)["abas"]
+                if abas == "primeira":
+                    colunas, colunas_dropadas = select_columns_to_read(path, cfg, leitura)
+                    chunks = ((None, c) for c in iter_file_chunks(path, opts["chunk_linhas"], leitura, colunas=colunas))
+                else:
+                    colunas = None
+                    por_aba = iter_sheet_chunks(path, abas, opts["chunk_linhas"], leitura)
+                    cabecalhos = next(por_aba)[0]
+                    chunks = ((aba, c) for _, aba, c in por_aba)
+        except Exception as e:
+            return {"file": filename, "status": "erro_leitura", "detalhe": str(e)}
+        if cabecalhos is not None:
+            # Todas as abas com as mesmas colunas (a união dos cabeçalhos), como na leitura completa
+            uniao = pd.DataFrame(columns=[SHEET_COLUMN] + list(dict.fromkeys(c for cols in cabecalhos.values() for c in cols)))
+            if drop_tokens:
+                uniao, colunas_dropadas = drop_columns_by_contains(uniao, drop_tokens)
+            with etapas("deteccao_colunas"):
+                colmaps = detect_sheet_columns(uniao, cabecalhos, cfg, trace=regras_colunas)
+            if not colmaps:
+                return {"file": filename, "status": "colunas_nao_encontradas", "detalhe": str(cabecalhos)}
+            present = [c for c in OUTPUT_COLUMNS_ORDER if any(c in m for m in colmaps.values())]
+            if mode != "agrupar" and "num_apolice" not in present:
+                return {"file": filename, "status": "sem_num_apolice_para_ultimo"}
+            ignoradas = [aba for aba in cabecalhos if aba not in colmaps]
+            if ignoradas:
+                leitura["abas_ignoradas"] = "; ".join(ignoradas)
+        while True:
+            try:
+                with etapas("leitura"):
+                    aba, raw = next(chunks, (None, None))
+            except Exception as e:
+                return {"file": filename, "status": "erro_leitura", "detalhe": str(e)}
+            if raw is None:
+                break
+            blocos += 1
+            etapas.linhas = (etapas.linhas or 0) + len(raw)
+
+            if aba is not None:
+                raw.insert(0, SHEET_COLUMN, aba)
+                raw = raw.reindex(columns=uniao.columns)
+            elif drop_tokens and colunas is None:
+                with etapas("remocao_colunas"):
+                    raw, colunas_dropadas = drop_columns_by_contains(raw, drop_tokens)
+
+            if colmap is None and colmaps is None:
+                with etapas("deteccao_colunas"):
+                    colmap = detect_columns(raw, cfg["column_synonyms"], trace=regras_colunas)
+                present = [c for c in OUTPUT_COLUMNS_ORDER if c in colmap]
+                if not present:
+                    return {"file": filename, "status": "colunas_nao_encontradas", "detalhe": str(list(raw.columns))}
+                if mode != "agrupar" and "num_apolice" not in present:
+                    return {"file": filename, "status": "sem_num_apolice_para_ultimo"}
+
+            # Deduplicação dentro do bloco e contra os blocos anteriores
+            with etapas("deduplicacao"):
+                if blocos == 1:
+                    mapas = list(colmaps.values()) if colmaps is not None else [colmap]
+                    subset = dedup_columns(raw.columns, dedup["colunas"], mapas)
+                    chaves = [m["num_apolice"] for m in mapas if "num_apolice" in m]
+                novo = dedup_across_blocks(raw[subset] if subset else raw, vistos)
+                if not novo.all():
+                    duplicadas["duplicadas_removidas"] += int((~novo).sum())
+                    if len(exemplos) < dedup["exemplos"]:
+                        exemplos.update(dict.fromkeys(
+                            _duplicate_key_samples(raw, ~novo, chaves, dedup["exemplos"]).split("; ")))
+                    raw = raw[novo].reset_index(drop=True)
+            if raw.empty:
+                continue
+
+            linhas_entrada += len(raw)
+            with etapas("escrita"):
+                if ws_original is not None:
+                    append_frame_rows(ws_original, raw, header=(linhas_entrada == len(raw)))
+                elif original_opt == "separado":
+                    if gz is None:
+                        gz = gzip.open(original_path, "wt", encoding="utf-8", newline="")
+                    raw.to_csv(gz, index=False, header=(linhas_entrada == len(raw)))
+
+            with etapas("normalizacao"):
+                if aba is None:
+                    df = select_and_normalize(raw, colmap, present, datas)
+                elif aba in colmaps:
+                    presentes_aba = [c for c in OUTPUT_COLUMNS_ORDER if c in colmaps[aba]]
+                    df = _add_missing_columns(select_and_normalize(raw, colmaps[aba], presentes_aba, datas), present)
+                else:
+                    df = None  # aba sem colunas reconhecidas: só vai para a aba original
+            del raw
+            if df is None:
+                continue
+
+            with etapas("regra"):
+                if mode == "agrupar":
+                    keys = grouping_keys(df, present)
+                    agg_map = aggregation_map(df)
+                    parcial = df.groupby(keys, dropna=False, sort=False).agg(agg_map)
+                    if state is not None:
+                        parcial = pd.concat([state, parcial])
+                        parcial = parcial.groupby(level=list(range(len(keys))), dropna=False, sort=False).agg(agg_map)
+                    state = parcial
+                else:
+                    col_emissao = "data_emissao" if "data_emissao" in df.columns else None
+                    col_endosso = "num_endosso" if "num_endosso" in df.columns else None
+                    if endosso_numeric is None and col_endosso:
+                        # Decidido no primeiro bloco (no modo em memória usa-se o arquivo inteiro)
+                        endosso_numeric = bool(pd.to_numeric(df[col_endosso], errors="coerce").notna().mean() >= 0.5)
+                    candidatos = df if state is None else pd.concat([state, df], ignore_index=True)
+                    state = latest_per_policy(candidatos, col_emissao, col_endosso,
+                                              endosso_numeric=endosso_numeric).reset_index(drop=True)
+
+        if state is None:
+            return {"file": filename, "status": "vazio"}
+
+        with etapas("finalizacao"):
+            if mode == "agrupar":
+                result = state.iloc[_group_order(state.index)].reset_index()
+            else:
+                result = state
+            result = finalize_result(result, ref_date)
+
+        with etapas("escrita"):
+            append_frame_rows(ws_unique, result)
+            wb.save(out_path)
+    finally:
+        if gz is not None:
+            gz.close()
+
+    saidas = {"saida": str(out_path)}
+    if original_opt == "separado":
+        saidas["saida_original"] = str(original_path)
+    with etapas("consolidado"):
+        parte = write_consolidation_part(out_dir, path.stem, filename, mode, result, cfg)
+    if parte:
+        saidas["parte_consolidado"] = parte
+    if exemplos:
+        duplicadas["exemplos_duplicadas"] = "; ".join(list(exemplos)[: dedup["exemplos"]])
+    if subset:
+        duplicadas["colunas_deduplicacao"] = "; ".join(c for c in subset if c != SHEET_COLUMN)
+    return {
+        "file": filename,
+        "status": "ok",
+        "mode": mode,
+        "regra_modo": regra_modo,
+        "linhas_entrada": linhas_entrada,
+        "linhas_saida": len(result),
+        **duplicadas,
+        "colunas_detectadas": list(result.columns),
+        "colunas_dropadas": colunas_dropadas,
+        "regras_colunas": (format_column_rules(regras_colunas) if colmaps is None
+                           else format_sheet_column_rules(regras_colunas)),
+        **format_date_report(datas),
+        "blocos": blocos,
+        **leitura,
+        **saidas,
+        **etapas.resumo(),
+    }
+
+
+# ----------------------- Consolidado de apólices -----------------------
+
+CONSOLIDATED_DIR = "_consolidado"
+CONSOLIDATED_COLUMNS = ["chave_apolice", "num_apolice", "apolice_susep", "seguradora", "arquivo", "mode",
+                        "is", "data_fim_vigencia", "status_automatico"]
+
+
+def consolidation_options(cfg: dict) -> dict:
+    """Opções do índice consolidado (config.json -> "consolidado"); formatos só de dados, como o cache."""
+    opts = cfg.get("consolidado") or {}
+    formato = opts.get("formato", "feather")
+    if formato not in CACHE_FORMATS:
+        raise ValueError(f"consolidado.formato inválido: {formato!r} (use {', '.join(CACHE_FORMATS)})")
+    return {"enabled": bool(opts.get("enabled", True)), "formato": formato}
+
+
+def insurer_name(filename: str, cfg: dict) -> str:
+    """Nome da seguradora: o padrão de rules.insurer_patterns que casa com o arquivo, senão o nome do arquivo."""
+    engine = compile_mode_rules(cfg.get("rules", {}))
+    i = _first_rule_index(engine, filename, inicio=engine["inicio_seguradoras"])
+    return engine["padroes"][i] if i is not None else Path(filename).stem
+
+
+def _policy_key(v) -> "str|None":
+    if v is None or (isinstance(v, float) and v != v):
+        return None
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    txt = str(v).strip()
+    # Só dígitos: ignora zeros à esquerda (cada seguradora completa de um jeito)
+    return (txt.lstrip("0") or "0") if txt.isdigit() else txt
+
+
+def policy_key_series(s: pd.Series) -> pd.Series:
+    """Chave de apólice comparável entre seguradoras (texto; 123.0 e '000123' -> '123')."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    chaves = [_policy_key(v) for v in uniques]
+    import numpy as np
+    out = np.array(chaves + [None], dtype=object)[codes]
+    return pd.Series(out, index=s.index, dtype=object)
+
+
+def write_consolidation_part(out_dir: Path, stem: str, filename: str, mode: str, result: pd.DataFrame, cfg: dict) -> "str|None":
+    """Grava a fatia do arquivo para o consolidado (só as colunas do índice de apólices)."""
+    opts = consolidation_options(cfg)
+    if not opts["enabled"] or "num_apolice" not in result.columns:
+        return None
+    parte = pd.DataFrame({"chave_apolice": policy_key_series(result["num_apolice"])})
+    for c in CONSOLIDATED_COLUMNS[1:]:
+        if c in result.columns:
+            parte[c] = result[c].to_numpy()
+        elif c == "seguradora":
+            parte[c] = insurer_name(filename, cfg)
+        elif c == "arquivo":
+            parte[c] = filename
+        elif c == "mode":
+            parte[c] = mode
+        else:
+            parte[c] = None
+    for c in ("num_apolice", "apolice_susep"):
+        parte[c] = policy_key_series(parte[c])
+    partes_dir = out_dir / CONSOLIDATED_DIR / "partes"
+    fmt = _store_frame(parte, partes_dir, stem, opts["formato"], verify=False)
+    for antigo in partes_dir.glob(f"{stem}.*"):
+        if antigo.suffix != f".{fmt}":
+            antigo.unlink(missing_ok=True)
+    return str(partes_dir / f"{stem}.{fmt}")
+
+
+def build_consolidated_index(out_dir: Path, resumos: list, cfg: dict) -> "dict|None":
+    """Junta as fatias dos arquivos processados (ou reaproveitados) num índice único de apólices.
+
+    Grava _consolidado/indice_apolices.<formato> (ordenado pela chave),
+    _consolidado/apolices_em_varios_arquivos.csv e o _consolidado_apolices.xlsx
+    com os totais por seguradora.
+    """
+    opts = consolidation_options(cfg)
+    partes = []
+    for r in resumos:
+        caminho = r.get("parte_consolidado")
+        if r.get("status") == "ok" and caminho and Path(caminho).exists():
+            partes.append(_read_frame(Path(caminho), Path(caminho).suffix[1:]))
+    if not partes:
+        return None
+    indice = pd.concat(partes, ignore_index=True)
+    indice = indice.sort_values("chave_apolice", kind="stable", na_position="last").reset_index(drop=True)
+
+    cons_dir = out_dir / CONSOLIDATED_DIR
+    fmt = _store_frame(indice, cons_dir, "indice_apolices", opts["formato"], verify=False)
+    for antigo in cons_dir.glob("indice_apolices.*"):
+        if antigo.suffix != f".{fmt}":
+            antigo.unlink(missing_ok=True)  # inclusive .pickle de versões antigas
+
+    indice_aux = indice.assign(
+        _vigente=(indice["status_automatico"] == "VIGENTE").to_numpy(dtype=bool),
+        _vencida=(indice["status_automatico"] == "VENCIDA").to_numpy(dtype=bool),
+    )
+    por_seguradora = indice_aux.groupby(["seguradora", "mode"], dropna=False).agg(
+        arquivos=("arquivo", "nunique"),
+        apolices=("chave_apolice", "nunique"),
+        is_total=("is", "sum"),
+        vigentes=("_vigente", "sum"),
+        vencidas=("_vencida", "sum"),
+    ).reset_index()
+    n_arquivos = indice.groupby("chave_apolice")["arquivo"].transform("nunique")
+    multiplas = indice[(n_arquivos > 1).to_numpy(dtype=bool)]
+    repetidas = multiplas.groupby(["seguradora", "mode"], dropna=False)["chave_apolice"].nunique()
+    por_seguradora["apolices_em_varios_arquivos"] = (
+        por_seguradora.set_index(["seguradora", "mode"]).index.map(repetidas).fillna(0).astype("int64")
+    )
+
+    # A lista detalhada pode ter centenas de milhares de linhas: vai em CSV, o xlsx fica só com os totais
+    repetidas_path = cons_dir / "apolices_em_varios_arquivos.csv"
+    multiplas.to_csv(repetidas_path, index=False, encoding="utf-8-sig")
+
+    from openpyxl import Workbook
+    resumo_path = out_dir / "_consolidado_apolices.xlsx"
+    wb = Workbook(write_only=True)
+    append_frame_rows(wb.create_sheet("por_seguradora"), por_seguradora)
+    wb.save(resumo_path)
+    return {
+        "indice": str(cons_dir / f"indice_apolices.{fmt}"),
+        "resumo": str(resumo_path),
+        "repetidas": str(repetidas_path),
+        "apolices": int(indice["chave_apolice"].nunique()),
+    }
+
+
+class PolicyIndex:
+    """Índice consolidado carregado em memória, com busca binária pela chave da apólice."""
+
+    def __init__(self, frame: pd.DataFrame):
+        import numpy as np
+
+        self.frame = frame.reset_index(drop=True)
+        chaves = self.frame["chave_apolice"]
+        # Linhas sem chave ficam no fim (na_position="last") e não entram na busca
+        n_validas = int(chaves.notna().sum())
+        self.keys = np.asarray(chaves.iloc[:n_validas].astype(object).to_numpy(), dtype=object)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def lookup(self, numero) -> pd.DataFrame:
+        """Todas as linhas (seguradoras/arquivos) da apólice informada."""
+        chave = _policy_key(numero)
+        if chave is None:
+            return self.frame.iloc[0:0]
+        lo = self.keys.searchsorted(chave, side="left")
+        hi = self.keys.searchsorted(chave, side="right")
+        return self.frame.iloc[lo:hi]
+
+
+def load_policy_index(out_dir: Path) -> PolicyIndex:
+    """Carrega <saida>/_consolidado/indice_apolices.<feather|parquet> (nunca pickle)."""
+    cons_dir = out_dir / CONSOLIDATED_DIR
+    for fmt in CACHE_FORMATS:
+        caminho = cons_dir / f"indice_apolices.{fmt}"
+        if caminho.exists():
+            return PolicyIndex(_read_frame(caminho, fmt))
+    raise FileNotFoundError(f"índice consolidado não encontrado em {cons_dir}")
+
+
+# ----------------------- Execução em lote -----------------------
+
+def _process_file_safe(path: Path, out_dir: Path, cfg: dict, ref_date=None) -> dict:
+    """Executa process_file isolando falhas inesperadas (roda também dentro dos workers)."""
+    perfil_dir = (cfg.get("instrumentacao") or {}).get("perfil_dir")
+    if perfil_dir:
+        return _process_file_profiled(path, out_dir, cfg, ref_date, Path(perfil_dir))
+    try:
+        return process_file(path, out_dir, cfg, ref_date=ref_date)
+    except Exception as e:
+        return {"file": path.name, "status": "erro_processamento", "detalhe": f"{type(e).__name__}: {e}"}
+
+
+def _process_file_profiled(path: Path, out_dir: Path, cfg: dict, ref_date, perfil_dir: Path) -> dict:
+    """--profile: roda o arquivo sob cProfile e grava <arquivo>.prof (pstats) e <arquivo>.txt (top 40)."""
+    import cProfile
+    import io
+    import pstats
+
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        resumo = process_file(path, out_dir, cfg, ref_date=ref_date)
+    except Exception as e:
+        resumo = {"file": path.name, "status": "erro_processamento", "detalhe": f"{type(e).__name__}: {e}"}
+    finally:
+        perfil.disable()
+    perfil_dir.mkdir(parents=True, exist_ok=True)
+    perfil.dump_stats(perfil_dir / f"{path.name}.prof")
+    texto = io.StringIO()
+    pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(40)
+    (perfil_dir / f"{path.name}.txt").write_text(texto.getvalue(), encoding="utf-8")
+    return dict(resumo, perfil=str(perfil_dir / f"{path.name}.prof"))
+
+
+def _init_pool_worker():
+    # Workers do pool não emitem progresso nem escrevem no stdout redirecionado de servir()
+    set_progress_hook(None)
+    sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+
+def run_files(files, out_dir: Path, cfg: dict, ref_date=None, workers: int = 1, cancelar=None, ao_iniciar=None):
+    """Processa os arquivos e devolve (path, resumo) sempre na ordem de entrada.
+
+    Com workers > 1 as chamadas de process_file vão para um pool de processos;
+    a falha de um arquivo (inclusive a queda do worker) não interrompe os demais.
+    Se o Event `cancelar` for ligado, os arquivos em andamento terminam e os que
+    ainda não começaram voltam com status "cancelado". `ao_iniciar(path)` é
+    chamado antes de cada arquivo (só no modo sequencial).
+    """
+    if workers <= 1 or len(files) <= 1:
+        for p in files:
+            if cancelar is not None and cancelar.is_set():
+                yield p, {"file": p.name, "status": "cancelado"}
+                continue
+            if ao_iniciar is not None:
+                ao_iniciar(p)
+            yield p, _process_file_safe(p, out_dir, cfg, ref_date)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, wait
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files)), initializer=_init_pool_worker) as pool:
+        futures = [pool.submit(_process_file_safe, p, out_dir, cfg, ref_date) for p in files]
+        for p, fut in zip(files, futures):
+            while cancelar is not None and not fut.done():
+                if cancelar.is_set():
+                    for f in futures:
+                        f.cancel()  # só tem efeito nos que ainda não começaram
+                    break
+                wait([fut], timeout=0.2)
+            if fut.cancelled():
+                yield p, {"file": p.name, "status": "cancelado"}
+                continue
+            try:
+                resumo = fut.result()
+            except Exception as e:
+                # Ex.: BrokenProcessPool quando um worker é encerrado pelo sistema (falta de memória)
+                resumo = {"file": p.name, "status": "erro_processamento", "detalhe": f"{type(e).__name__}: {e}"}
+            yield p, resumo
+
+
+# ----------------------- Manifesto incremental -----------------------
+
+MANIFEST_NAME = "_manifesto_incremental.json"
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(chunk_size), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+# Seções do config que não alteram o conteúdo das saídas
+RUNTIME_CFG_KEYS = ("cache", "instrumentacao")
+
+
+def config_hash(cfg: dict) -> str:
+    relevante = {k: v for k, v in cfg.items() if k not in RUNTIME_CFG_KEYS}
+    txt = json.dumps(relevante, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(txt.encode("utf-8")).hexdigest()
+
+
+def load_manifest(out_dir: Path) -> dict:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("arquivos", {})
+    except Exception:
+        # Manifesto corrompido: reprocessa tudo
+        return {}
+
+
+def save_manifest(out_dir: Path, entries: dict):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"versao_script": SCRIPT_VERSION, "arquivos": entries}, f, ensure_ascii=False, indent=1, default=str)
+    os.replace(tmp, path)
+
+
+def file_fingerprint(path: Path, cfg_hash: str, ref_iso: str, anterior: "dict|None" = None) -> dict:
+    """Impressão digital do que influencia a saída de um arquivo.
+
+    O hash do conteúdo é reaproveitado do manifesto quando tamanho e mtime não
+    mudaram, para que a checagem não precise reler arquivos grandes.
+    """
+    st = path.stat()
+    anterior = anterior or {}
+    if anterior.get("tamanho") == st.st_size and anterior.get("mtime_ns") == st.st_mtime_ns and anterior.get("hash_arquivo"):
+        hash_arquivo = anterior["hash_arquivo"]
+    else:
+        hash_arquivo = file_sha256(path)
+    return {
+        "tamanho": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "hash_arquivo": hash_arquivo,
+        "hash_config": cfg_hash,
+        "data_referencia": ref_iso,
+        "versao_script": SCRIPT_VERSION,
+    }
+
+
+def can_reuse(entry: "dict|None", fingerprint: dict) -> bool:
+    if not entry or entry.get("resumo", {}).get("status") != "ok":
+        return False
+    for k in ("hash_arquivo", "hash_config", "data_referencia", "versao_script"):
+        if entry.get(k) != fingerprint[k]:
+            return False
+    parte = entry["resumo"].get("parte_consolidado")
+    if parte and Path(parte).suffix[1:] not in CACHE_FORMATS:
+        return False  # fatia em pickle de versões antigas: reprocessa para regravar
+    saida = entry["resumo"].get("saida")
+    return bool(saida) and Path(saida).exists()
+
+
+def write_trace_json(path: Path, run_id: str, resumos: list):
+    """Tempos e picos de memória por etapa de cada arquivo da execução."""
+    arquivos = []
+    for r in resumos:
+        arquivos.append({
+            "arquivo": r.get("file"),
+            "status": r.get("status"),
+            "modo": r.get("mode"),
+            "incremental": r.get("incremental"),
+            "linhas_entrada": r.get("linhas_entrada"),
+            "t_total_s": r.get("t_total_s"),
+            "mem_pico_mb": r.get("mem_pico_mb"),
+            "etapas": r.get("etapas_detalhe"),
+        })
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"run_id": run_id, "data_execucao": datetime.now().isoformat(timespec="seconds"),
+                   "versao": SCRIPT_VERSION, "arquivos": arquivos}, f, ensure_ascii=False, indent=2)
+
+
+def append_csv_log(path: Path, df: pd.DataFrame):
+    """Acrescenta linhas a um CSV histórico. Se as colunas mudaram (versão nova
+    do script), reescreve o arquivo com a união das colunas em vez de
+    desalinhar as linhas antigas."""
+    import csv
+
+    if not path.exists():
+        df.to_csv(path, mode="w", index=False, header=True)
+        return
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        cabecalho = next(csv.reader(f), [])
+    if list(df.columns) == cabecalho:
+        df.to_csv(path, mode="a", index=False, header=False)
+    elif set(df.columns) <= set(cabecalho):
+        df.reindex(columns=cabecalho).to_csv(path, mode="a", index=False, header=False)
+    else:
+        antigo = pd.read_csv(path, dtype=str, keep_default_na=False)
+        tmp = path.with_name(path.name + ".tmp")
+        pd.concat([antigo, df], ignore_index=True).to_csv(tmp, index=False, header=True)
+        os.replace(tmp, path)
+
+
+# ----------------------- Histórico (SQLite) -----------------------
+
+HISTORY_DB_NAME = "historico.sqlite"
+HISTORY_FORMATS = ("sqlite", "csv", "ambos")
+
+# Colunas conhecidas de cada tabela; colunas novas (versões futuras do script) entram com ALTER TABLE
+HISTORY_SCHEMA = {
+    "execucoes": {
+        "run_id": "TEXT PRIMARY KEY",
+        "data_execucao": "TEXT",
+        "data_referencia_status": "TEXT",
+        "datas_referencia": "TEXT",
+        "input_dir": "TEXT",
+        "output_dir": "TEXT",
+        "total_arquivos_encontrados": "INTEGER",
+        "total_processados_ok": "INTEGER",
+        "total_erros": "INTEGER",
+        "total_cancelados": "INTEGER",
+    },
+    "arquivos": {
+        "run_id": "TEXT",
+        "data_execucao": "TEXT",
+        "arquivo": "TEXT",
+        "seguradora": "TEXT",
+        "modo": "TEXT",
+        "regra_modo": "TEXT",
+        "status": "TEXT",
+        "linhas_entrada": "INTEGER",
+        "linhas_saida": "INTEGER",
+        "linhas_por_aba": "TEXT",
+        "duplicadas_removidas": "INTEGER",
+        "saida": "TEXT",
+        "colunas_detectadas": "TEXT",
+        "datas_nao_convertidas": "TEXT",
+        "erro_detalhe": "TEXT",
+        "t_total_s": "REAL",
+        "mem_pico_mb": "REAL",
+        "mem_pico_etapa": "TEXT",
+        "etapas": "TEXT",
+        "incremental": "TEXT",
+    },
+}
+HISTORY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_execucoes_data ON execucoes (data_execucao)",
+    "CREATE INDEX IF NOT EXISTS ix_arquivos_run ON arquivos (run_id)",
+    "CREATE INDEX IF NOT EXISTS ix_arquivos_arquivo ON arquivos (arquivo, data_execucao)",
+    "CREATE INDEX IF NOT EXISTS ix_arquivos_seguradora ON arquivos (seguradora COLLATE NOCASE, data_execucao)",
+    "CREATE INDEX IF NOT EXISTS ix_arquivos_data ON arquivos (data_execucao)",
+]
+
+
+def history_options(cfg: dict) -> dict:
+    """Opções do histórico (config.json -> "historico"); default: só SQLite, em modo WAL."""
+    opts = cfg.get("historico") or {}
+    formato = opts.get("formato", "sqlite")
+    if formato not in HISTORY_FORMATS:
+        raise ValueError(f"historico.formato inválido: {formato!r} (use {', '.join(HISTORY_FORMATS)})")
+    return {"formato": formato, "wal": bool(opts.get("wal", True))}
+
+
+@contextmanager
+def _history_transaction(conn):
+    # BEGIN IMMEDIATE pega o lock de escrita já no início: execuções simultâneas esperam (busy_timeout) em vez de falhar no meio
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _sql_value(v):
+    if v is None or (isinstance(v, float) and v != v):
+        return None
+    if isinstance(v, (pd.Timestamp, datetime)):
+        return None if pd.isna(v) else v.isoformat(sep=" ")
+    if isinstance(v, (list, dict)):
+        return json.dumps(v, ensure_ascii=False, default=str)
+    if hasattr(v, "item"):  # escalares numpy
+        return _sql_value(v.item())
+    if isinstance(v, str) and v == "":
+        return None
+    return v
+
+
+def _history_columns(conn, tabela: str, colunas) -> list:
+    existentes = [r[1] for r in conn.execute(f'PRAGMA table_info("{tabela}")')]
+    for c in colunas:
+        if c not in existentes:
+            conn.execute(f'ALTER TABLE "{tabela}" ADD COLUMN "{c}"')
+            existentes.append(c)
+    return existentes
+
+
+def _history_insert(conn, tabela: str, linhas: list):
+    if not linhas:
+        return
+    colunas = list(dict.fromkeys(c for linha in linhas for c in linha))
+    _history_columns(conn, tabela, colunas)
+    nomes = ", ".join(f'"{c}"' for c in colunas)
+    marcadores = ", ".join("?" for _ in colunas)
+    comando = "INSERT OR REPLACE" if tabela == "execucoes" else "INSERT"
+    conn.executemany(f'{comando} INTO "{tabela}" ({nomes}) VALUES ({marcadores})',
+                     [[_sql_value(linha.get(c)) for c in colunas] for linha in linhas])
+
+
+def _import_csv_history(conn, log_dir: Path, cfg: dict) -> int:
+    """Importa execucoes.csv/arquivos.csv de versões anteriores (uma vez, na criação do banco)."""
+    import csv
+
+    def ler(nome):
+        path = log_dir / nome
+        if not path.exists():
+            return []
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return list(csv.DictReader(f))
+
+    execucoes = ler("execucoes.csv")
+    datas = {e.get("run_id"): e.get("data_execucao") for e in execucoes}
+    arquivos = ler("arquivos.csv")
+    for a in arquivos:
+        a["data_execucao"] = datas.get(a.get("run_id"))
+        a["seguradora"] = insurer_name(a.get("arquivo") or "", cfg)
+    _history_insert(conn, "execucoes", execucoes)
+    _history_insert(conn, "arquivos", arquivos)
+    return len(arquivos)
+
+
+def open_history(log_dir: Path, cfg: dict, wal: bool = True):
+    """Abre (e cria, na primeira vez) o log_dir/historico.sqlite. Devolve a conexão (autocommit)."""
+    import sqlite3
+
+    conn = sqlite3.connect(log_dir / HISTORY_DB_NAME, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 60000")
+    # WAL: leituras (consulta_historico.py) não bloqueiam a gravação; em pasta de rede use historico.wal = false
+    conn.execute(f"PRAGMA journal_mode = {'WAL' if wal else 'DELETE'}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    with _history_transaction(conn):
+        for tabela, colunas in HISTORY_SCHEMA.items():
+            definicao = ", ".join(f'"{c}" {tipo}' for c, tipo in colunas.items())
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{tabela}" ({definicao})')
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)")
+        for comando in HISTORY_INDEXES:
+            conn.execute(comando)
+        if conn.execute("SELECT 1 FROM meta WHERE chave = 'csv_importado'").fetchone() is None:
+            importadas = _import_csv_history(conn, log_dir, cfg)
+            conn.execute("INSERT INTO meta VALUES ('csv_importado', ?)", (str(importadas),))
+    return conn
+
+
+def write_history(log_dir: Path, execucao: dict, arquivos: list, cfg: dict, wal: bool = True) -> Path:
+    """Grava uma execução e as linhas por arquivo numa única transação."""
+    conn = open_history(log_dir, cfg, wal=wal)
+    try:
+        data = _sql_value(execucao.get("data_execucao"))
+        ref = execucao.get("data_referencia_status")
+        if isinstance(ref, (pd.Timestamp, datetime)) and not pd.isna(ref):
+            execucao = dict(execucao, data_referencia_status=ref.date().isoformat())  # como nos CSV antigos
+        linhas = [dict(a, data_execucao=data, seguradora=insurer_name(a["arquivo"], cfg)) for a in arquivos]
+        with _history_transaction(conn):
+            _history_insert(conn, "execucoes", [execucao])
+            _history_insert(conn, "arquivos", linhas)
+    finally:
+        conn.close()
+    return log_dir / HISTORY_DB_NAME
+
+
+# ----------------------- Config compilado -----------------------
+
+# Artefato JSON gravado ao lado do config.json (config.json.compilado) pelo
+# --validate-config: sinônimos já normalizados e a tabela de regras. Só vale
+# enquanto o hash do config.json, o esquema e a versão do script forem os
+# mesmos; senão o config é validado e compilado na hora. Só dados (as regex
+# são recompiladas ao carregar): a pasta do config costuma ser compartilhada.
+CONFIG_ARTIFACT_SUFFIX = ".compilado"
+CONFIG_SCHEMA_VERSION = 2
+
+
+def config_artifact_path(cfg_path: Path) -> Path:
+    return cfg_path.with_name(cfg_path.name + CONFIG_ARTIFACT_SUFFIX)
+
+
+def _check_text_list(valor, chave: str):
+    if not (isinstance(valor, list) and all(isinstance(v, str) for v in valor)):
+        raise ValueError(f"{chave} inválido: {valor!r} (use uma lista de textos)")
+
+
+def _check_rules(rules) -> None:
+    if not isinstance(rules, dict):
+        raise ValueError(f"rules inválido: {rules!r}")
+    if rules.get("default_mode", "ultimo") not in RULE_MODES:
+        raise ValueError(f"rules.default_mode inválido: {rules['default_mode']!r} (use {', '.join(RULE_MODES)})")
+    padroes = []
+    for modo, palavras in (rules.get("suffix_keywords") or {}).items():
+        if modo not in RULE_MODES:
+            raise ValueError(f"rules.suffix_keywords: modo inválido {modo!r} (use {', '.join(RULE_MODES)})")
+        _check_text_list(palavras, f"rules.suffix_keywords.{modo}")
+        padroes += palavras
+    for r in rules.get("insurer_patterns", []):
+        if not (isinstance(r, dict) and isinstance(r.get("pattern"), str) and r.get("mode") in RULE_MODES):
+            raise ValueError(f"rules.insurer_patterns: item inválido {r!r} (use pattern e mode {' ou '.join(RULE_MODES)})")
+        padroes.append(r["pattern"])
+    for padrao in padroes:
+        try:
+            re.compile(padrao)
+        except re.error as e:
+            raise ValueError(f"rules: regex inválida {padrao!r} ({e})") from None
+
+
+def compile_config(cfg: dict) -> dict:
+    """Confere a parte estrutural do config (sinônimos, colunas removidas, regras,
+    abas) e pré-compila sinônimos e regras; ValueError na primeira inconsistência."""
+    if not isinstance(cfg, dict):
+        raise ValueError("o config deve ser um objeto JSON")
+    sinonimos = cfg.get("column_synonyms")
+    if not isinstance(sinonimos, dict) or not sinonimos:
+        raise ValueError("column_synonyms ausente ou vazio")
+    for canon, variantes in sinonimos.items():
+        _check_text_list(variantes, f"column_synonyms.{canon}")
+    _check_text_list(cfg.get("drop_columns_contains") or [], "drop_columns_contains")
+    rules = cfg.get("rules", {})
+    _check_rules(rules)
+    leitura = cfg.get("leitura") or {}
+    check_sheet_selection(leitura.get("abas", "primeira"))
+    for seguradora, selecao in (leitura.get("abas_por_seguradora") or {}).items():
+        check_sheet_selection(selecao, f"leitura.abas_por_seguradora.{seguradora}")
+    return {
+        "sinonimos": (_synonyms_key(sinonimos), compile_column_synonyms(sinonimos)),
+        "regras": (_rules_key(rules), compile_mode_rules(rules)),
+    }
+
+
+def validate_config(cfg: dict, out_dir: "Path|None" = None):
+    """Opções de execução (já com os parâmetros da linha de comando); ValueError se alguma for inválida."""
+    output_options(cfg)
+    processing_options(cfg)
+    consolidation_options(cfg)
+    cache_options(cfg, out_dir or Path("."))
+    history_options(cfg)
+    dedup_options(cfg)
+
+
+def _config_signature(dados: bytes) -> dict:
+    return {"esquema": CONFIG_SCHEMA_VERSION, "versao": SCRIPT_VERSION, "sha256": hashlib.sha256(dados).hexdigest()}
+
+
+def _parse_config(cfg_path: Path, dados: bytes) -> dict:
+    try:
+        return json.loads(dados.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"{cfg_path.name} não é um JSON válido: {e}") from None
+
+
+def write_config_artifact(cfg_path: Path) -> Path:
+    """Valida o config.json e grava o artefato ao lado dele (usado pelo --validate-config).
+
+    ValueError se o config for inválido; OSError se a pasta não aceitar gravação.
+    """
+    dados = cfg_path.read_bytes()
+    cfg = _parse_config(cfg_path, dados)
+    compilado = compile_config(cfg)
+    regras = compilado["regras"][1]
+    artefato = dict(_config_signature(dados))
+    artefato["sinonimos"] = [[canon, [[v, nv] for v, nv, _ in itens]] for canon, itens in compilado["sinonimos"][1]]
+    artefato["regras"] = {
+        "tabela": [[p, modo, regra] for p, (modo, regra) in zip(regras["padroes"], regras["regras"])],
+        "inicio_seguradoras": regras["inicio_seguradoras"],
+        "default": regras["default"],
+    }
+    path = config_artifact_path(cfg_path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(artefato, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return path
+
+
+def load_compiled_config(cfg_path: Path) -> tuple:
+    """(config, reaproveitou): se o artefato bater com o hash do config.json, instala
+    sinônimos e regras dele nos caches de compile_column_synonyms/compile_mode_rules;
+    senão valida e compila o config na hora. Nunca grava o artefato."""
+    dados = cfg_path.read_bytes()
+    cfg = _parse_config(cfg_path, dados)
+    try:
+        with open(config_artifact_path(cfg_path), "r", encoding="utf-8") as f:
+            artefato = json.load(f)
+        reaproveitou = {k: artefato.get(k) for k in ("esquema", "versao", "sha256")} == _config_signature(dados)
+        if reaproveitou:
+            sinonimos = _synonym_table([(canon, [tuple(par) for par in pares]) for canon, pares in artefato["sinonimos"]])
+            regras = artefato["regras"]
+            engine = _rules_engine([tuple(r) for r in regras["tabela"]], regras["inicio_seguradoras"], regras["default"])
+    except (OSError, ValueError, KeyError, TypeError, re.error):
+        # Ausente, truncado ou de outro esquema: compila a partir do config
+        reaproveitou = False
+    if reaproveitou:
+        _COMPILED_SYNONYMS.setdefault(_synonyms_key(cfg["column_synonyms"]), sinonimos)
+        _COMPILED_RULES.setdefault(_rules_key(cfg.get("rules", {})), engine)
+    else:
+        compile_config(cfg)
+    return cfg, reaproveitou
+
+
+# ----------------------- Execução -----------------------
+
+INPUT_EXTENSIONS = (".xlsx", ".xls", ".csv")
+
+# config.json já lido, por caminho: (mtime_ns, tamanho, conteúdo); evita reler e
+# reprocessar o arquivo a cada execução do processo persistente
+_CONFIG_CACHE = {}
+
+
+def load_config(cfg_path: Path) -> dict:
+    """Lê o config.json (com cache por caminho/mtime/tamanho e o artefato compilado).
+    Devolve uma cópia que pode ser alterada; ValueError se o config for inválido."""
+    import copy
+
+    st = cfg_path.stat()
+    chave = str(cfg_path.resolve())
+    item = _CONFIG_CACHE.get(chave)
+    if item is None or item[:2] != (st.st_mtime_ns, st.st_size):
+        item = (st.st_mtime_ns, st.st_size, load_compiled_config(cfg_path)[0])
+        _CONFIG_CACHE[chave] = item
+    return copy.deepcopy(item[2])
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="processa_seguradoras.py", description="Processa arquivos de seguradoras (agrupar ou último valor por apólice).")
+    parser.add_argument("-i", "--input", help="Pasta de entrada com .xlsx/.xls/.csv (obrigatório, exceto com --validate-config)")
+    parser.add_argument("-o", "--output", help="Pasta de saída para salvar os UNIQUE (obrigatório, exceto com --validate-config)")
+    parser.add_argument("-c", "--config", default="config.json", help="Caminho do arquivo de configuração (JSON)")
+    parser.add_argument("--data", dest="ref_date", nargs="+", default=None,
+                        help="Data(s) de referência para cálculo do status (ex.: 30/09/2025; várias: --data 30/09/2025 31/12/2025 hoje "
+                             "gera uma coluna status_automatico_AAAA_MM_DD por data)")
+    parser.add_argument("--log-dir", dest="log_dir", default=None, help="Diretório para logs históricos (default: <saida>/_historico)")
+    parser.add_argument("--workers", type=int, default=1, help="Processos em paralelo (default: 1 = sequencial; 0 = nº de CPUs)")
+    parser.add_argument("--writer", choices=sorted(OUTPUT_WRITERS), default=None, help="Como gravar os xlsx de saída (default: output.writer do config ou openpyxl)")
+    parser.add_argument("--original", dest="original_sheet", choices=ORIGINAL_SHEET_OPTIONS, default=None,
+                        help="Aba 'original': incluir no xlsx, omitir, ou gravar separado em .csv.gz (default: output.original_sheet do config ou incluir)")
+    parser.add_argument("--chunked", action="store_true", help="Lê e processa cada arquivo em blocos (memória proporcional ao nº de apólices)")
+    parser.add_argument("--chunk-linhas", dest="chunk_linhas", type=int, default=None, help="Linhas por bloco no modo --chunked (default: processamento.chunk_linhas ou 200000)")
+    parser.add_argument("--colunas-seletivas", dest="colunas_seletivas", action="store_true",
+                        help="Lê só as colunas reconhecidas pelo config (exige --original omitir)")
+    parser.add_argument("--no-cache", dest="no_cache", action="store_true", help="Não usa o cache de leitura (sempre relê as planilhas)")
+    parser.add_argument("--cache-dir", dest="cache_dir", default=None, help="Pasta do cache de leitura (default: <saida>/_cache_leitura)")
+    parser.add_argument("--no-consolidado", dest="no_consolidado", action="store_true", help="Não gera o índice consolidado de apólices")
+    parser.add_argument("--incremental", action="store_true", help="Pula arquivos que não mudaram desde a última execução (manifesto na pasta de saída)")
+    parser.add_argument("--force", action="store_true", help="Com --incremental, reprocessa todos os arquivos mesmo sem mudanças")
+    parser.add_argument("--trace-json", dest="trace_json", nargs="?", const="", default=None,
+                        help="Grava tempos/memória por etapa de cada arquivo em JSON (default: <log-dir>/traco_<run_id>.json)")
+    parser.add_argument("--profile", action="store_true", help="Roda cada arquivo sob cProfile (<log-dir>/perfil/<run_id>/)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Fica vigiando a pasta de entrada e processa cada arquivo novo/alterado assim que a cópia termina (Ctrl+C para sair)")
+    parser.add_argument("--watch-intervalo", dest="watch_intervalo", type=float, default=5.0,
+                        help="Com --watch, segundos entre as varreduras da pasta (default: 5)")
+    parser.add_argument("--watch-estavel", dest="watch_estavel", type=float, default=10.0,
+                        help="Com --watch, segundos sem mudar tamanho/data para considerar a cópia concluída (default: 10)")
+    parser.add_argument("--validate-config", dest="validate_config", action="store_true",
+                        help="Só confere o config.json (e grava o config compilado ao lado dele); não lê planilhas")
+    parser.add_argument("--progresso", action="store_true",
+                        help=f"Emite eventos de progresso ('{PROGRESS_PREFIX.strip()} {{json}}') e aceita '{CANCEL_COMMAND}' pela entrada padrão (usado pela GUI)")
+    return parser
+
+
+def executar(argv: "list|None" = None, cancelar=None):
+    """Uma execução completa, com os mesmos argumentos da linha de comando.
+
+    `cancelar` (Event) substitui o comando pela entrada padrão de --progresso;
+    erros de uso terminam com SystemExit, como no script.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.validate_config and not (args.input and args.output):
+        parser.error("os argumentos -i/--input e -o/--output são obrigatórios")
+
+    cfg_path = Path(args.config)
+
+    if not args.validate_config:
+        in_dir = Path(args.input)
+        out_dir = Path(args.output)
+        if not in_dir.exists() or not in_dir.is_dir():
+            print(f"ERRO: pasta de entrada inválida: {in_dir}")
+            sys.exit(1)
+
+    if not cfg_path.exists():
+        print(f"ERRO: arquivo de configuração não encontrado: {cfg_path}")
+        sys.exit(1)
+
+    try:
+        cfg = load_config(cfg_path)
+    except ValueError as e:
+        print(f"ERRO: config inválido: {e}")
+        sys.exit(1)
+
+    # Parâmetros da linha de comando têm prioridade sobre o config.json
+    if args.writer:
+        cfg.setdefault("output", {})["writer"] = args.writer
+    if args.original_sheet:
+        cfg.setdefault("output", {})["original_sheet"] = args.original_sheet
+    if args.chunked:
+        cfg.setdefault("processamento", {})["chunked"] = True
+    if args.chunk_linhas:
+        cfg.setdefault("processamento", {})["chunk_linhas"] = args.chunk_linhas
+    if args.colunas_seletivas:
+        cfg.setdefault("leitura", {})["colunas_seletivas"] = True
+    if args.no_cache:
+        cfg.setdefault("cache", {})["enabled"] = False
+    if args.no_consolidado:
+        cfg.setdefault("consolidado", {})["enabled"] = False
+    if args.cache_dir:
+        cfg.setdefault("cache", {})["dir"] = args.cache_dir
+    try:
+        validate_config(cfg, None if args.validate_config else out_dir)
+        args.ref_dates = parse_reference_dates(args.ref_date) if args.ref_date else []
+    except ValueError as e:
+        print(f"ERRO: {e}")
+        sys.exit(1)
+    if (cfg.get("leitura") or {}).get("colunas_seletivas") and not selective_reading(cfg):
+        print(f"AVISO: leitura seletiva de colunas ignorada: {selective_reading_issue(cfg)}")
+    if consolidation_options(cfg)["enabled"] and not has_pyarrow():
+        print("AVISO: índice consolidado desligado: requer pyarrow (pip install pyarrow)")
+        cfg.setdefault("consolidado", {})["enabled"] = False
+    if args.validate_config:
+        try:
+            compilado = f"; compilado em {write_config_artifact(cfg_path).name}"
+        except OSError as e:
+            compilado = f"; AVISO: config compilado não gravado ({e})"
+        print(f"config OK: {cfg_path} ({len(cfg['column_synonyms'])} colunas, "
+              f"{len(compile_mode_rules(cfg.get('rules', {}))['regras'])} regras de modo{compilado})")
+        return
+
+    log_dir = Path(args.log_dir) if args.log_dir else (out_dir / "_historico")
+    log_dir.mkdir(parents=True, exist_ok=True)
+    if args.progresso:
+        cancelar = cancelar if cancelar is not None else watch_cancel()
+
+    if args.watch:
+        watch_folder(args, cfg, log_dir, cancelar=cancelar)
+        return
+
+    files = list_input_files(in_dir)
+    if not files:
+        print("Nenhum arquivo .xlsx/.xls/.csv encontrado na pasta de entrada.")
+        sys.exit(0)
+    process_batch(args, cfg, files, log_dir, cancelar=cancelar)
+
+
+def list_input_files(in_dir: Path) -> list:
+    return sorted((p for p in in_dir.iterdir() if p.suffix.lower() in INPUT_EXTENSIONS), key=lambda p: p.name.lower())
+
+
+def process_batch(args, cfg: dict, files: list, log_dir: Path, cancelar=None, anteriores: "dict|None" = None) -> list:
+    """Uma execução sobre `files`: processa, grava o resumo, os históricos e o consolidado. Devolve os resumos.
+
+    `anteriores` (modo --watch) são resumos de arquivos que não mudaram desde
+    que foram processados nesta sessão; entram no resumo sem reprocessar. No
+    --watch, o histórico por arquivo recebe só o que foi processado no lote.
+    """
+    import uuid
+
+    in_dir = Path(args.input)
+    out_dir = Path(args.output)
+    anteriores = anteriores or {}
+    cache_opts = cache_options(cfg, out_dir)
+    cons_opts = consolidation_options(cfg)
+    datas_ref = args.ref_dates
+    # Uma data: como sempre; várias: a lista inteira vai para finalize_result
+    ref_dt = (datas_ref[0] if len(datas_ref) == 1 else datas_ref) if datas_ref else None
+
+    run_id = str(uuid.uuid4())
+    if args.profile:
+        cfg.setdefault("instrumentacao", {})["perfil_dir"] = str(log_dir / "perfil" / run_id)
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    effective_ref = datas_ref[0] if datas_ref else pd.Timestamp(datetime.now().date())
+
+    # Modo incremental: arquivos sem mudança reaproveitam a linha do resumo anterior
+    incremental = args.incremental or args.watch
+    manifest, fingerprints, reaproveitados = {}, {}, {}
+    if incremental:
+        manifest = load_manifest(out_dir)
+        cfg_h = config_hash(cfg)
+        ref_iso = ",".join(d.date().isoformat() for d in datas_ref) or effective_ref.date().isoformat()
+        for p in files:
+            if p.name in anteriores:
+                reaproveitados[p.name] = dict(anteriores[p.name], incremental="reaproveitado")
+                continue
+            fingerprints[p.name] = file_fingerprint(p, cfg_h, ref_iso, manifest.get(p.name))
+            if not args.force and can_reuse(manifest.get(p.name), fingerprints[p.name]):
+                reaproveitados[p.name] = dict(manifest[p.name]["resumo"], incremental="reaproveitado")
+    progresso = None
+    if args.progresso:
+        progresso = ProgressTracker(files, set(reaproveitados), workers=workers)
+        set_progress_hook(progresso.etapa)
+    processados = run_files([p for p in files if p.name not in reaproveitados], out_dir, cfg, ref_date=ref_dt,
+                            workers=workers, cancelar=cancelar,
+                            ao_iniciar=progresso.arquivo_inicio if progresso else None)
+
+    resumos = []
+    per_file_logs = []
+    for p in files:
+        if p.name in reaproveitados:
+            resumo = reaproveitados[p.name]
+        else:
+            _, resumo = next(processados)
+            if incremental and resumo.get("status") != "cancelado":
+                manifest[p.name] = dict(fingerprints[p.name], resumo=resumo)
+                resumo = dict(resumo, incremental="processado")
+        resumos.append(resumo)
+        if progresso:
+            progresso.arquivo_fim(p, resumo)
+        if resumo.get("incremental") == "reaproveitado":
+            if not args.watch:
+                print(f"[OK] {p.name} -> {resumo.get('mode')} | sem alterações (resultado anterior reaproveitado)")
+        elif resumo.get("status") == "cancelado":
+            print(f"[CANCELADO] {p.name}")
+        elif resumo.get("status") == "ok":
+            print(f"[OK] {p.name} -> {resumo.get('mode')} | linhas: {resumo.get('linhas_entrada')} -> {resumo.get('linhas_saida')}")
+        else:
+            print(f"[ERRO] {p.name} -> {resumo.get('status')} | {resumo.get('detalhe', '')}")
+        if args.watch and resumo.get("incremental") == "reaproveitado":
+            continue
+        per_file_logs.append({
+            "run_id": run_id,
+            "arquivo": p.name,
+            "modo": resumo.get("mode"),
+            "regra_modo": resumo.get("regra_modo"),
+            "status": resumo.get("status"),
+            "linhas_entrada": resumo.get("linhas_entrada"),
             "linhas_saida": resumo.get("linhas_saida"),
+            "linhas_por_aba": resumo.get("linhas_por_aba"),
+            "duplicadas_removidas": resumo.get("duplicadas_removidas"),
             "saida": resumo.get("saida"),
             "colunas_detectadas": ";".join(resumo.get("colunas_detectadas", [])) if resumo.get("colunas_detectadas") else None,
-            "erro_detalhe": resumo.get("detalhe")
+            "datas_nao_convertidas": resumo.get("datas_nao_convertidas"),
+            "erro_detalhe": resumo.get("detalhe"),
+            "t_total_s": resumo.get("t_total_s"),
+            "mem_pico_mb": resumo.get("mem_pico_mb"),
+            "mem_pico_etapa": resumo.get("mem_pico_etapa"),
+            "etapas": resumo.get("etapas"),
+            # "reaproveitado": o arquivo não mudou e a linha repete o resultado anterior
+            "incremental": resumo.get("incremental"),
         })
 
-    resumo_df = pd.DataFrame(resumos)
-    effective_ref = (ref_dt if ref_dt is not None else pd.Timestamp(datetime.now().date()))
+    if incremental:
+        # Mantém também as entradas de arquivos que ainda estão na pasta mas ficaram fora deste lote (--watch)
+        save_manifest(out_dir, {nome: e for nome, e in manifest.items() if (in_dir / nome).exists()})
+    if cache_opts["enabled"]:
+        evict_cache(cache_opts["dir"], cache_opts["max_mb"])
+
+    consolidado = build_consolidated_index(out_dir, resumos, cfg) if cons_opts["enabled"] else None
+
+    resumo_df = pd.DataFrame([{k: v for k, v in r.items() if k != "etapas_detalhe"} for r in resumos])
     resumo_df['data_referencia_base'] = pd.Timestamp(effective_ref.date())
     resumo_df['run_id'] = run_id
 
@@ -354,30 +3359,208 @@ def main():
         'output_dir': str(out_dir.resolve()),
         'total_arquivos_encontrados': len(files),
         'total_processados_ok': int(sum(1 for r in resumos if r.get('status') == 'ok')),
-        'total_erros': int(sum(1 for r in resumos if r.get('status') != 'ok'))
+        'total_erros': int(sum(1 for r in resumos if r.get('status') not in ('ok', 'cancelado'))),
+        'total_cancelados': int(sum(1 for r in resumos if r.get('status') == 'cancelado')),
     }])
+    if len(datas_ref) > 1:
+        exec_log['datas_referencia'] = "; ".join(f"{d:%d/%m/%Y}" for d in datas_ref)
 
     resumo_path = out_dir / "_resumo_processamento.xlsx"
     with pd.ExcelWriter(resumo_path, engine="openpyxl") as writer:
         resumo_df.to_excel(writer, index=False, sheet_name="resumo")
         exec_log.to_excel(writer, index=False, sheet_name="log_execucao")
 
-    # CSV históricos (append)
-    exec_csv = log_dir / 'execucoes.csv'
-    files_csv = log_dir / 'arquivos.csv'
+    print(f"\nResumo salvo em: {resumo_path}")
+    hist_opts = history_options(cfg)
+    if hist_opts["formato"] in ("sqlite", "ambos"):
+        db_path = write_history(log_dir, exec_log.iloc[0].to_dict(), per_file_logs, cfg, wal=hist_opts["wal"])
+        print(f"Histórico (SQLite): {db_path}")
+    if hist_opts["formato"] in ("csv", "ambos"):
+        # CSV históricos (append), formato das versões anteriores
+        exec_csv = log_dir / 'execucoes.csv'
+        files_csv = log_dir / 'arquivos.csv'
+        append_csv_log(exec_csv, exec_log)
+        append_csv_log(files_csv, pd.DataFrame(per_file_logs))
+        print(f"Log histórico (execuções): {exec_csv}\nLog histórico (arquivos): {files_csv}")
+    if args.trace_json is not None:
+        trace_path = Path(args.trace_json) if args.trace_json else (log_dir / f"traco_{run_id}.json")
+        write_trace_json(trace_path, run_id, resumos)
+        print(f"Traço por etapa: {trace_path}")
+    if consolidado:
+        print(f"Consolidado de apólices ({consolidado['apolices']} apólices): {consolidado['resumo']}")
+    if progresso:
+        progresso.fim(resumos)
+    return resumos
 
-    if exec_csv.exists():
-        exec_log.to_csv(exec_csv, mode='a', index=False, header=False)
-    else:
-        exec_log.to_csv(exec_csv, mode='w', index=False, header=True)
 
-    per_file_df = pd.DataFrame(per_file_logs)
-    if files_csv.exists():
-        per_file_df.to_csv(files_csv, mode='a', index=False, header=False)
-    else:
-        per_file_df.to_csv(files_csv, mode='w', index=False, header=True)
+def _file_is_readable(path: Path) -> bool:
+    """Falso enquanto outro programa mantém o arquivo aberto com exclusividade (cópia em andamento no Windows)."""
+    try:
+        with open(path, "rb") as f:
+            f.read(1)
+        return True
+    except OSError:
+        return False
+
+
+def _log_watch_error(log_dir: Path, erro: Exception, pendentes: list):
+    """Erro de um lote do --watch: aviso na tela e o traceback em log_dir/vigia_erros.log."""
+    import traceback
+
+    agora = datetime.now()
+    print(f"\n[{agora:%H:%M:%S}] ERRO no lote: {type(erro).__name__}: {erro} | "
+          f"{len(pendentes)} arquivo(s) ficam para a próxima varredura", flush=True)
+    try:
+        with open(log_dir / "vigia_erros.log", "a", encoding="utf-8") as f:
+            f.write(f"[{agora:%Y-%m-%d %H:%M:%S}] pendentes: {', '.join(pendentes)}\n")
+            f.write("".join(traceback.format_exception(erro)))
+    except OSError:
+        pass
+
+
+def watch_folder(args, cfg: dict, log_dir: Path, cancelar=None):
+    """Modo --watch: varre a pasta de entrada a cada intervalo e processa os arquivos novos ou alterados.
+
+    Um arquivo só entra quando tamanho e data de modificação ficam iguais por
+    --watch-estavel segundos e ele pode ser aberto (cópias pela metade ficam
+    para a próxima varredura). Os que ficam prontos na mesma varredura formam
+    um lote, processado em paralelo (--workers) e de forma incremental: cada
+    lote regrava o resumo e o consolidado com todos os arquivos já prontos e
+    acrescenta ao histórico só o que foi processado. Se o lote falhar (resumo
+    aberto no Excel, histórico travado), o erro vai para vigia_erros.log e os
+    arquivos são tentados de novo na varredura seguinte.
+    """
+    in_dir = Path(args.input)
+    # nome -> ((tamanho, mtime_ns), quando foi visto assim pela 1ª vez)
+    observados = {}
+    # nome -> (tamanho, mtime_ns) da versão já processada nesta sessão, e o resumo dela
+    prontos, resumos = {}, {}
+    print(f"Vigiando {in_dir} a cada {args.watch_intervalo:g}s (arquivo pronto após {args.watch_estavel:g}s sem mudanças). Ctrl+C para sair.", flush=True)
+    try:
+        while cancelar is None or not cancelar.is_set():
+            agora = time.monotonic()
+            atuais, novos = {}, []
+            for p in list_input_files(in_dir):
+                if p.name.startswith("~$"):
+                    continue  # arquivo de trava do Excel
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                assinatura = (st.st_size, st.st_mtime_ns)
+                atuais[p.name] = p
+                if prontos.get(p.name) == assinatura:
+                    continue
+                visto = observados.get(p.name)
+                if visto is None or visto[0] != assinatura:
+                    observados[p.name] = (assinatura, agora)
+                elif agora - visto[1] >= args.watch_estavel and _file_is_readable(p):
+                    novos.append((p, assinatura))
+            for nome in set(prontos) - set(atuais):
+                del prontos[nome]
+                resumos.pop(nome, None)
+            observados = {nome: v for nome, v in observados.items() if nome in atuais}
+
+            if novos:
+                for p, assinatura in novos:
+                    prontos[p.name] = assinatura
+                    observados.pop(p.name, None)
+                    resumos.pop(p.name, None)
+                lote = sorted((atuais[nome] for nome in prontos), key=lambda p: p.name.lower())
+                print(f"\n[{datetime.now():%H:%M:%S}] {len(novos)} arquivo(s) novo(s)/alterado(s)", flush=True)
+                # Arquivos com erro não são reaproveitados pelo manifesto; aqui só voltam a rodar se mudarem
+                anteriores = {nome: r for nome, r in resumos.items() if nome in prontos}
+                try:
+                    resultados = process_batch(args, cfg, lote, log_dir, cancelar=cancelar, anteriores=anteriores)
+                except Exception as e:
+                    # Ex.: resumo aberto no Excel (PermissionError), histórico travado. Os arquivos novos
+                    # voltam para a fila, já estáveis, e o lote é refeito na próxima varredura
+                    _log_watch_error(log_dir, e, [p.name for p, _ in novos])
+                    for p, assinatura in novos:
+                        prontos.pop(p.name, None)
+                        observados[p.name] = (assinatura, agora - args.watch_estavel)
+                    resultados = []
+                for r in resultados:
+                    if r.get("status") == "cancelado":
+                        prontos.pop(r.get("file"), None)
+                    elif r.get("status") != "ok":
+                        resumos[r.get("file")] = r
+            if cancelar is not None and cancelar.wait(args.watch_intervalo):
+                break
+            if cancelar is None:
+                time.sleep(args.watch_intervalo)
+    except KeyboardInterrupt:
+        pass
+    print("Vigia encerrada.")
+
+
+class _ConnWriter:
+    """stdout/stderr de servir(): envia cada linha completa pela conexão."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._pendente = ""
+
+    def write(self, texto: str) -> int:
+        self._pendente += texto
+        if "\n" in self._pendente:
+            *linhas, self._pendente = self._pendente.split("\n")
+            for linha in linhas:
+                self.conn.send(("linha", linha + "\n"))
+        return len(texto)
+
+    def flush(self):
+        if self._pendente:
+            self.conn.send(("linha", self._pendente))
+            self._pendente = ""
+
+
+def servir(conn, cancelar=None, memoria_mb: float = 1024):
+    """Processo persistente (usado pela GUI): imports, config e leituras ficam carregados entre execuções.
 
-    print(f"\nResumo salvo em: {resumo_path}\nLog histórico (execuções): {exec_csv}\nLog histórico (arquivos): {files_csv}")
+    Recebe ("executar", argv) pela conexão, devolve a saída como ("linha", texto)
+    e termina cada execução com ("fim", código). `cancelar` é um Event
+    compartilhado (multiprocessing) que a GUI liga para interromper; qualquer
+    outra mensagem (ex.: ("sair", None)) encerra o processo. memoria_mb é o
+    default de cache.memoria_mb (planilhas lidas guardadas em memória).
+    """
+    import traceback
+
+    global _MEMORY_CACHE_MB
+    _MEMORY_CACHE_MB = memoria_mb
+    saida = _ConnWriter(conn)
+    # Ler pd.__version__ faz o import adiado do pandas já aqui, e não no 1º clique em Executar
+    conn.send(("pronto", {"pid": os.getpid(), "pandas": pd.__version__}))
+    while True:
+        try:
+            msg, argv = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg != "executar":
+            return
+        if cancelar is not None:
+            cancelar.clear()
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout = sys.stderr = saida
+        rc = 0
+        try:
+            executar(argv, cancelar=cancelar)
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code)
+            rc = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            traceback.print_exc(file=saida)
+            rc = 1
+        finally:
+            set_progress_hook(None)
+            saida.flush()
+            sys.stdout, sys.stderr = stdout, stderr
+        conn.send(("fim", rc))
+
+
+def main():
+    executar()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+"""Workbooks com várias abas (leitura.abas): seleção, abas ignoradas, _aba na deduplicação e regra do último."""
+
+import copy
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import processa_seguradoras as ps
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_abas import gerar_workbook  # noqa: E402
+from gerador import gravar_arquivo  # noqa: E402
+
+DATA_REF = pd.Timestamp("2025-09-30")
+
+
+@pytest.fixture
+def cfg():
+    cfg = json.loads((ROOT / "config.json").read_text(encoding="utf-8"))
+    cfg.update(cache={"enabled": False}, consolidado={"enabled": False},
+               output=dict(cfg.get("output") or {}, original_sheet="omitir"))
+    return cfg
+
+
+def _com_abas(cfg, abas="todas", **extra):
+    cfg = copy.deepcopy(cfg)
+    cfg["leitura"] = dict(cfg.get("leitura") or {}, abas=abas)
+    cfg.update(extra)
+    return cfg
+
+
+def _workbook(caminho: Path, abas: dict) -> Path:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for nome, df in abas.items():
+        ps.append_frame_rows(wb.create_sheet(nome), df)
+    wb.save(caminho)
+    return caminho
+
+
+def _apolices(numeros, is_, emissao="01/01/2025", endosso=0):
+    return pd.DataFrame({
+        "apolice": numeros,
+        "data de emissao": emissao,
+        "endosso": endosso,
+        "is": is_,
+        "fim vigencia": "31/12/2025",
+    })
+
+
+def _rodar(arquivo, saida, cfg):
+    resumo = ps.process_file(arquivo, saida, cfg, ref_date=DATA_REF)
+    assert resumo["status"] == "ok", resumo.get("detalhe")
+    return resumo, pd.read_excel(resumo["saida"], sheet_name="UNIQUE")
+
+
+def test_select_sheets_por_regex():
+    nomes = ["Resumo", "Garantia Judicial", "garantia", "Fiança", "Garantias antigas x"]
+    assert ps.select_sheets(nomes, "primeira") == ["Resumo"]
+    assert ps.select_sheets(nomes, "todas") == nomes
+    # Nome inteiro (fullmatch), sem diferenciar maiúsculas, na ordem do arquivo
+    assert ps.select_sheets(nomes, ["fiança", "Garantia( Judicial)?"]) == ["Garantia Judicial", "garantia", "Fiança"]
+    with pytest.raises(ValueError, match="nenhuma aba"):
+        ps.select_sheets(nomes, ["Crédito"])
+    with pytest.raises(ValueError, match="regex inválida"):
+        ps.check_sheet_selection(["Garantia("])
+
+
+def test_le_so_as_abas_escolhidas(tmp_path, cfg):
+    arquivo = _workbook(tmp_path / "SEGURADORA_agrupar.xlsx", {
+        "Produto 1": _apolices(["1", "2"], [10.0, 20.0]),
+        "Produto 2": _apolices(["3"], [30.0]),
+        "Outro": _apolices(["4"], [40.0]),
+    })
+    resumo, unique = _rodar(arquivo, tmp_path / "out", _com_abas(cfg, ["produto \\d"]))
+    assert resumo["linhas_por_aba"] == "Produto 1=2; Produto 2=1"
+    assert sorted(unique["num_apolice"].astype(str)) == ["1", "2", "3"]
+
+
+@pytest.mark.parametrize("chunked", [False, True], ids=["normal", "blocos"])
+def test_aba_sem_apolice_fica_de_fora(tmp_path, cfg, chunked):
+    arquivo = _workbook(tmp_path / "SEGURADORA_agrupar.xlsx", {
+        "Resumo": pd.DataFrame({"Produto": ["Garantia"], "Total": [999.0]}),
+        "Garantia": _apolices(["1", "2"], [10.0, 20.0]),
+        # Cabeçalhos diferentes: cada aba é detectada com o próprio cabeçalho
+        "Fiança": pd.DataFrame({"numero da apolice": ["3"], "importancia segurada": [30.0],
+                                "data fim vigencia": ["31/12/2025"]}),
+    })
+    cfg = _com_abas(cfg, processamento={"chunked": chunked, "chunk_linhas": 1})
+    resumo, unique = _rodar(arquivo, tmp_path / "out", cfg)
+    assert resumo["abas_ignoradas"] == "Resumo"
+    assert dict(zip(unique["num_apolice"].astype(str), unique["is"])) == {"1": 10.0, "2": 20.0, "3": 30.0}
+
+
+@pytest.mark.parametrize("colunas", [None, ["num_apolice", "is"]], ids=["linha_inteira", "colunas"])
+@pytest.mark.parametrize("chunked", [False, True], ids=["normal", "blocos"])
+def test_mesma_linha_em_abas_diferentes_nao_e_repetida(tmp_path, cfg, colunas, chunked):
+    arquivo = _workbook(tmp_path / "SEGURADORA_agrupar.xlsx", {
+        "A": _apolices(["1", "1"], [100.0, 100.0]),  # repetida dentro da aba: sai
+        "B": _apolices(["1"], [100.0]),              # igual à da aba A: fica
+    })
+    cfg = _com_abas(cfg, deduplicacao={"colunas": colunas, "exemplos": 5},
+                    processamento={"chunked": chunked, "chunk_linhas": 1})
+    resumo, unique = _rodar(arquivo, tmp_path / "out", cfg)
+    assert resumo["duplicadas_removidas"] == 1
+    assert list(unique["is"]) == [200.0]
+    if colunas:
+        assert ps.SHEET_COLUMN not in resumo["colunas_deduplicacao"]
+
+
+@pytest.mark.parametrize("ordem", [("A", "B"), ("B", "A")])
+def test_ultimo_empate_fica_com_a_aba_que_vem_antes(tmp_path, cfg, ordem):
+    valores = {"A": 100.0, "B": 200.0}
+    arquivo = _workbook(tmp_path / "SEGURADORA_ultimo.xlsx",
+                        {aba: _apolices(["7"], [valores[aba]]) for aba in ordem})
+    _, unique = _rodar(arquivo, tmp_path / "out", _com_abas(cfg))
+    assert list(unique["is"]) == [valores[ordem[0]]]
+
+    # Emissão mais recente ganha, em qualquer aba
+    arquivo = _workbook(tmp_path / "SEGURADORA_2_ultimo.xlsx", {
+        ordem[0]: _apolices(["7"], [valores[ordem[0]]]),
+        ordem[1]: _apolices(["7"], [valores[ordem[1]]], emissao="02/01/2025"),
+    })
+    _, unique = _rodar(arquivo, tmp_path / "out", _com_abas(cfg))
+    assert list(unique["is"]) == [valores[ordem[1]]]
+
+
+@pytest.mark.parametrize("modo", ["agrupar", "ultimo"])
+def test_igual_as_abas_juntadas_a_mao(tmp_path, cfg, modo):
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    juntas = gerar_workbook(entrada / f"SEGURADORA_abas_{modo}.xlsx", 3, 150, cfg)
+    gravar_arquivo(juntas, entrada / f"SEGURADORA_juntas_{modo}.xlsx")
+
+    _, ref = _rodar(entrada / f"SEGURADORA_juntas_{modo}.xlsx", tmp_path / "out", cfg)
+    resumo, abas = _rodar(entrada / f"SEGURADORA_abas_{modo}.xlsx", tmp_path / "out", _com_abas(cfg))
+    assert resumo["abas_ignoradas"] == "Resumo"
+    pd.testing.assert_frame_equal(ref, abas)
+
+    cfg_blocos = _com_abas(cfg, processamento={"chunked": True, "chunk_linhas": 50})
+    _, blocos = _rodar(entrada / f"SEGURADORA_abas_{modo}.xlsx", tmp_path / "blocos", cfg_blocos)
+    # Em blocos a soma da IS pode diferir na última casa (ordem da soma)
+    pd.testing.assert_frame_equal(ref, blocos, check_exact=False, rtol=1e-12)
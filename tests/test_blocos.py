@@ -0,0 +1,117 @@
+"""Modo em blocos: deduplicação entre blocos exata e mesmo resultado do modo normal."""
+
+import copy
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import processa_seguradoras as ps
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from gerador import gerar_frame, gravar_arquivo  # noqa: E402
+
+
+def _em_blocos(df, tamanho):
+    vistos = []
+    return np.concatenate([ps.dedup_across_blocks(df.iloc[i:i + tamanho].reset_index(drop=True), vistos)
+                           for i in range(0, len(df), tamanho)])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_igual_ao_duplicated(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 300))
+    df = pd.DataFrame({
+        "a": rng.choice(np.array(["x", "y", None, 1, 1.0], dtype=object), n),
+        "b": rng.choice([0.0, -0.0, np.nan, 2.5], n),
+        "c": pd.to_datetime(rng.choice(["2025-01-01", None], n)),
+    })
+    tamanho = int(rng.integers(1, 50))
+    assert np.array_equal(_em_blocos(df, tamanho), ~df.duplicated().to_numpy())
+
+
+def test_inteiro_e_float_em_blocos_diferentes():
+    vistos = []
+    assert ps.dedup_across_blocks(pd.DataFrame({"v": [1, 2]}), vistos).tolist() == [True, True]
+    assert ps.dedup_across_blocks(pd.DataFrame({"v": [2.0, np.nan]}), vistos).tolist() == [False, True]
+    assert ps.dedup_across_blocks(pd.DataFrame({"v": [np.nan, 3.0]}), vistos).tolist() == [False, True]
+
+
+def test_texto_numerico_nao_e_o_numero():
+    # "1" e 1 são valores diferentes para o drop_duplicates; só 1 e 1.0 são iguais
+    df = pd.DataFrame({"v": pd.Series(["1", 1, 1.0, "1.0", "1"], dtype=object)})
+    assert _em_blocos(df, 2).tolist() == (~df.duplicated()).tolist() == [True, True, False, True, False]
+
+
+def test_memoria_so_das_chaves():
+    # Texto longo: guardar as linhas custaria centenas de bytes cada; as chaves, 16
+    rng = np.random.default_rng(0)
+    n = 60_000
+    df = pd.DataFrame({f"t{j}": [f"{'x' * 80}{v}" for v in rng.integers(0, 10**12, n)] for j in range(4)})
+    vistos = []
+    for i in range(0, n, 5_000):
+        ps.dedup_across_blocks(df.iloc[i:i + 5_000].reset_index(drop=True), vistos)
+    assert sum(len(h1) for h1, _ in vistos) == n
+    assert sum(h1.nbytes + h2.nbytes for h1, h2 in vistos) == 16 * n
+    assert len(vistos) <= 4  # níveis juntados: cada bloco não é procurado em todos os anteriores
+
+
+def test_colisao_de_hash_nao_remove_linha_distinta(monkeypatch):
+    # Todas as linhas com o mesmo hash: só os valores decidem
+    monkeypatch.setattr(ps, "row_fingerprints", lambda df: np.zeros(len(df), dtype="uint64"))
+    df = pd.DataFrame({"apolice": ["A", "B", "A", "C", "B"], "is": [1.0, 2.0, 1.0, 3.0, 2.5]})
+    assert _em_blocos(df, 2).tolist() == [True, True, False, True, True]
+    assert _em_blocos(df, 2).tolist() == (~df.duplicated()).tolist()
+
+
+@pytest.mark.parametrize("modo", ["agrupar", "ultimo"])
+def test_process_file_em_blocos_igual_ao_normal(tmp_path, modo):
+    cfg = json.loads((ROOT / "config.json").read_text(encoding="utf-8"))
+    cfg["cache"] = {"enabled": False}
+    cfg["consolidado"] = {"enabled": False}
+    cfg["output"] = dict(cfg.get("output") or {}, original_sheet="omitir")
+    df = gerar_frame(3000, seed=3, cfg=cfg)
+    df = pd.concat([df, df.sample(400, random_state=3)], ignore_index=True)
+    entrada = tmp_path / f"SEGURADORA_{modo}.xlsx"
+    gravar_arquivo(df, entrada)
+
+    normal = ps.process_file(entrada, tmp_path / "normal", cfg)
+    cfg_blocos = copy.deepcopy(cfg)
+    cfg_blocos["processamento"] = {"chunked": True, "chunk_linhas": 700}
+    blocos = ps.process_file(entrada, tmp_path / "blocos", cfg_blocos)
+
+    assert blocos["duplicadas_removidas"] == normal["duplicadas_removidas"] >= 400
+    nome = f"SEGURADORA_{modo}__{modo}_automatico.xlsx"
+    ref = pd.read_excel(tmp_path / "normal" / nome, sheet_name="UNIQUE")
+    # Em blocos a soma da IS pode diferir na última casa (ordem da soma)
+    pd.testing.assert_frame_equal(ref, pd.read_excel(tmp_path / "blocos" / nome, sheet_name="UNIQUE"),
+                                  check_exact=False, rtol=1e-12)
+
+
+def test_agrupar_com_apolices_de_tipos_misturados(tmp_path):
+    # 123 (número) e "ABC-1" (texto) na mesma coluna: ordem final igual à do groupby do modo normal
+    cfg = json.loads((ROOT / "config.json").read_text(encoding="utf-8"))
+    cfg["cache"] = {"enabled": False}
+    cfg["consolidado"] = {"enabled": False}
+    df = pd.DataFrame({
+        "Número da Apólice": pd.Series([123, "ABC-1", 7, "ABC-1", 123, None, "z9"], dtype=object),
+        "IS": [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0],
+        "Data Fim Vigência": pd.to_datetime(["2026-01-01"] * 7),
+    })
+    entrada = tmp_path / "SEGURADORA_mista_agrupar.xlsx"
+    df.to_excel(entrada, index=False)
+
+    normal = ps.process_file(entrada, tmp_path / "normal", cfg)
+    cfg_blocos = copy.deepcopy(cfg)
+    cfg_blocos["processamento"] = {"chunked": True, "chunk_linhas": 2}
+    blocos = ps.process_file(entrada, tmp_path / "blocos", cfg_blocos)
+    assert normal["status"] == blocos["status"] == "ok", blocos.get("detalhe")
+    nome = "SEGURADORA_mista_agrupar__agrupar_automatico.xlsx"
+    pd.testing.assert_frame_equal(pd.read_excel(tmp_path / "normal" / nome, sheet_name="UNIQUE"),
+                                  pd.read_excel(tmp_path / "blocos" / nome, sheet_name="UNIQUE"))
@@ -0,0 +1,89 @@
+"""Cache de leitura: só formatos de dados (nunca pickle), e sem pyarrow não há cache em disco."""
+
+import builtins
+import json
+import pickle
+
+import pandas as pd
+import pytest
+
+import processa_seguradoras as ps
+
+
+@pytest.fixture
+def planilha(tmp_path):
+    caminho = tmp_path / "in" / "AXA_2025_09.csv"
+    caminho.parent.mkdir()
+    pd.DataFrame({"apolice": ["1", "2", "3"], "is": ["10", "20", "30"]}).to_csv(caminho, index=False)
+    return caminho
+
+
+@pytest.fixture
+def cfg(tmp_path):
+    return {"cache": {"enabled": True, "dir": str(tmp_path / "cache")}}
+
+
+def _ler(planilha, cfg, tmp_path):
+    info = {}
+    df = ps.read_any_file_cached(planilha, cfg, tmp_path / "out", info)
+    return df, info
+
+
+def test_grava_em_formato_colunar_e_reaproveita(planilha, cfg, tmp_path):
+    df, info = _ler(planilha, cfg, tmp_path)
+    assert info["cache"] == "gravado"
+    arquivos = {p.suffix for p in (tmp_path / "cache").iterdir()}
+    assert arquivos == {".json", ".feather"}
+
+    df2, info2 = _ler(planilha, cfg, tmp_path)
+    assert info2["cache"] == "acerto"
+    pd.testing.assert_frame_equal(df, df2)
+
+
+def test_pickle_no_cache_nunca_e_lido(planilha, cfg, tmp_path, monkeypatch):
+    _ler(planilha, cfg, tmp_path)
+    cache_dir = tmp_path / "cache"
+    meta_path = next(cache_dir.glob("*.json"))
+    key = meta_path.stem
+
+    class Malicioso:
+        def __reduce__(self):
+            return (exec, ("import builtins; builtins._cache_pickle_executado = True",))
+
+    # Entrada plantada numa pasta compartilhada: meta apontando para um .pickle
+    (cache_dir / f"{key}.pickle").write_bytes(pickle.dumps(Malicioso()))
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    meta["formato"] = "pickle"
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    monkeypatch.delattr(builtins, "_cache_pickle_executado", raising=False)
+
+    df, info = _ler(planilha, cfg, tmp_path)
+    assert not hasattr(builtins, "_cache_pickle_executado")
+    assert info["cache"] == "gravado"  # releu a planilha e regravou em feather
+    assert json.loads(meta_path.read_text(encoding="utf-8"))["formato"] == "feather"
+    assert len(df) == 3
+
+
+def test_frame_que_o_formato_nao_preserva_nao_e_guardado(planilha, cfg, tmp_path, monkeypatch):
+    misturado = pd.DataFrame({"a": pd.Series([1, "x", 2.5], dtype=object)})
+    monkeypatch.setattr(ps, "read_any_file", lambda *a, **k: misturado)
+
+    df, info = _ler(planilha, cfg, tmp_path)
+    assert df is misturado
+    assert info["cache"] == "erro_gravacao"
+    assert not list((tmp_path / "cache").glob("*.pickle"))
+    assert not list((tmp_path / "cache").glob("*.json"))
+
+
+def test_sem_pyarrow_nao_usa_cache_em_disco(planilha, cfg, tmp_path, monkeypatch):
+    monkeypatch.setattr(ps, "has_pyarrow", lambda: False)
+    for _ in range(2):
+        df, info = _ler(planilha, cfg, tmp_path)
+        assert info["cache"] == "sem_pyarrow"
+        assert len(df) == 3
+    assert not (tmp_path / "cache").exists()
+
+
+def test_formato_pickle_e_recusado(tmp_path):
+    with pytest.raises(ValueError, match="cache.formato"):
+        ps.cache_options({"cache": {"formato": "pickle"}}, tmp_path)
@@ -0,0 +1,107 @@
+"""Config compilado (config.json.compilado) e --validate-config."""
+
+import copy
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+import processa_seguradoras as ps
+
+CONFIG = Path(__file__).resolve().parents[1] / "config.json"
+
+
+@pytest.fixture
+def cfg_path(tmp_path):
+    destino = tmp_path / "config.json"
+    shutil.copy(CONFIG, destino)
+    return destino
+
+
+@pytest.fixture(autouse=True)
+def caches_limpos():
+    for cache in (ps._COMPILED_SYNONYMS, ps._COMPILED_RULES, ps._CONFIG_CACHE):
+        cache.clear()
+    yield
+
+
+def test_carregar_nao_grava_artefato(cfg_path):
+    cfg, reaproveitou = ps.load_compiled_config(cfg_path)
+    assert not reaproveitou
+    assert not ps.config_artifact_path(cfg_path).exists()
+    assert cfg == json.loads(cfg_path.read_text(encoding="utf-8"))
+
+
+def test_artefato_e_json_e_equivale_a_compilar(cfg_path):
+    artefato = ps.write_config_artifact(cfg_path)
+    dados = json.loads(artefato.read_text(encoding="utf-8"))
+    assert dados["esquema"] == ps.CONFIG_SCHEMA_VERSION
+
+    cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
+    sinonimos = ps.compile_column_synonyms(cfg["column_synonyms"])
+    regras = ps.compile_mode_rules(cfg["rules"])
+    ps._COMPILED_SYNONYMS.clear()
+    ps._COMPILED_RULES.clear()
+
+    cfg2, reaproveitou = ps.load_compiled_config(cfg_path)
+    assert reaproveitou and cfg2 == cfg
+    assert ps.compile_column_synonyms(cfg2["column_synonyms"]) == sinonimos
+    regras2 = ps.compile_mode_rules(cfg2["rules"])
+    assert {k: v for k, v in regras2.items() if k != "testes"} == {k: v for k, v in regras.items() if k != "testes"}
+    assert [(lit, rx.pattern, rx.flags) for lit, rx in regras2["testes"]] == \
+        [(lit, rx.pattern, rx.flags) for lit, rx in regras["testes"]]
+
+
+def test_artefato_desatualizado_e_ignorado(cfg_path):
+    ps.write_config_artifact(cfg_path)
+    cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
+    cfg["rules"]["insurer_patterns"].insert(0, {"pattern": "NOVA", "mode": "agrupar"})
+    cfg_path.write_text(json.dumps(cfg), encoding="utf-8")
+    cfg2, reaproveitou = ps.load_compiled_config(cfg_path)
+    assert not reaproveitou
+    assert ps.decide_mode_trace("NOVA_2025.xlsx", cfg2) == ("agrupar", "seguradora:NOVA")
+
+
+def test_artefato_corrompido_e_ignorado(cfg_path):
+    ps.config_artifact_path(cfg_path).write_text("{não é json", encoding="utf-8")
+    _, reaproveitou = ps.load_compiled_config(cfg_path)
+    assert not reaproveitou
+
+
+@pytest.mark.parametrize("alterar, mensagem", [
+    (lambda c: c["rules"]["insurer_patterns"].append({"pattern": "AXA(", "mode": "agrupar"}), "regex inválida"),
+    (lambda c: c["rules"].update(default_mode="soma"), "default_mode"),
+    (lambda c: c["column_synonyms"].update({"is": "IS"}), "column_synonyms.is"),
+    (lambda c: c["leitura"].update(abas="algumas"), "leitura.abas"),
+])
+def test_config_invalido(cfg_path, alterar, mensagem):
+    cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
+    alterar(cfg)
+    cfg_path.write_text(json.dumps(cfg), encoding="utf-8")
+    with pytest.raises(ValueError, match=mensagem):
+        ps.load_compiled_config(cfg_path)
+    with pytest.raises(ValueError, match=mensagem):
+        ps.write_config_artifact(cfg_path)
+
+
+def test_validate_config_grava_e_nao_importa_pandas(cfg_path, capsys):
+    import subprocess
+    import sys
+
+    codigo = ("import sys, processa_seguradoras as ps; "
+              f"ps.executar(['--validate-config', '-c', {str(cfg_path)!r}]); "
+              "print(type(sys.modules['pandas']).__name__)")
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=CONFIG.parent, capture_output=True, text=True,
+                           check=True).stdout
+    assert "config OK" in saida and saida.split()[-1] == "_LazyModule"
+    assert ps.config_artifact_path(cfg_path).exists()
+
+
+def test_regras_compiladas_por_conteudo(cfg_path):
+    # servir e os workers recebem um dict novo a cada execução: o cache não pode crescer com eles
+    cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
+    engine = ps.compile_mode_rules(cfg["rules"])
+    for _ in range(100):
+        assert ps.compile_mode_rules(copy.deepcopy(cfg["rules"])) is engine
+    assert len(ps._COMPILED_RULES) == 1
@@ -0,0 +1,57 @@
+"""Conversões vetorizadas contra as implementações antigas (apply/iterrows)."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import processa_seguradoras as ps
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from bench_conversoes import (br_number_to_float_series_ref, casos_numeros,  # noqa: E402
+                              recompute_status_by_dates_ref)
+
+REF = pd.Timestamp("2025-09-30")
+
+NUMEROS = {
+    "vazios e NaN": [None, np.nan, pd.NA, pd.NaT, "", " ", "  \t", "-", "R$", "abc"],
+    "vírgula e ponto": ["1.234,56", "R$ 1.234.567,89", "-1.234,5", "1.2,3", "1,234.56", ".,", "0.000,01"],
+    "milhar sem decimais": ["1.234", "1.234.567", "12.345.678", "1,234", "1,234,567", "100.000"],
+    "números": [0, -0.0, 7, 1234.5, 1e20, True, np.inf],
+}
+
+
+@pytest.mark.parametrize("nome", NUMEROS)
+def test_br_number_casos(nome):
+    s = pd.Series(NUMEROS[nome], dtype=object)
+    pd.testing.assert_series_equal(ps.br_number_to_float_series(s), br_number_to_float_series_ref(s))
+
+
+@pytest.mark.parametrize("nome", list(casos_numeros()))
+def test_br_number_aleatorios(nome):
+    s = casos_numeros()[nome]
+    assert ps.br_number_to_float_series(s).equals(br_number_to_float_series_ref(s))
+
+
+def _datas():
+    fim = pd.Series(pd.to_datetime(["2025-09-29", "2025-09-30", "2025-10-01", None, "2030-01-01", None]))
+    return pd.DataFrame({"num_apolice": range(len(fim)), "data_fim_vigencia": fim})
+
+
+@pytest.mark.parametrize("col", ["data_fim_vigencia", "inexistente"])
+def test_status_igual_ao_antigo(col):
+    df = _datas()
+    novo = ps.recompute_status_by_dates(df.copy(), col, today_override=REF)
+    pd.testing.assert_frame_equal(novo, recompute_status_by_dates_ref(df.copy(), col, today_override=REF))
+
+
+def test_status_none_sem_data_fim():
+    # None na lista vira o ausente da coluna (NaN na coluna de texto do pandas), como na versão antiga
+    status = ps.recompute_status_by_dates(_datas(), "data_fim_vigencia", today_override=REF)["status_automatico"]
+    assert status.isna().tolist() == [False, False, False, True, False, True]
+    assert status.dropna().tolist() == ["VENCIDA", "VIGENTE", "VIGENTE", "VIGENTE"]
+    sem_coluna = ps.recompute_status_by_dates(_datas(), "inexistente", today_override=REF)
+    assert sem_coluna["status_automatico"].isna().all()
@@ -0,0 +1,68 @@
+"""Várias datas de referência (--data d1 d2 ...): uma coluna status_automatico_AAAA_MM_DD por data."""
+
+import pandas as pd
+import pytest
+
+import processa_seguradoras as ps
+
+FIM = ["31/08/2025", "30/09/2025", "15/11/2025", "31/12/2025", "01/01/2026", ""]
+
+
+@pytest.fixture
+def entrada(tmp_path):
+    pasta = tmp_path / "in"
+    pasta.mkdir()
+    pd.DataFrame({
+        "apolice": [str(i + 1) for i in range(len(FIM))],
+        "is": [1000.0 * (i + 1) for i in range(len(FIM))],
+        "fim vigencia": FIM,
+    }).to_csv(pasta / "AXA_2025_09.csv", index=False)
+    return pasta
+
+
+def _unique(entrada, saida, datas, *extra):
+    ps.executar(["-i", str(entrada), "-o", str(saida), "--no-cache", "--no-consolidado", *extra, "--data", *datas])
+    (arquivo,) = saida.glob("AXA_2025_09__*_automatico.xlsx")
+    return pd.read_excel(arquivo, sheet_name="UNIQUE")
+
+
+def test_parse_reference_dates():
+    datas = ps.parse_reference_dates(["30/09/2025, 2025-12-31;31-03-2026", "30/09/2025"])
+    assert datas == [pd.Timestamp("2025-09-30"), pd.Timestamp("2025-12-31"), pd.Timestamp("2026-03-31")]
+    assert ps.parse_reference_dates("hoje") == [pd.Timestamp(pd.Timestamp.now().date())]
+    with pytest.raises(ValueError, match="data de referência inválida"):
+        ps.parse_reference_dates(["30/09/2025", "31/02/2025"])
+
+
+@pytest.mark.parametrize("extra", [[], ["--chunked"]], ids=["normal", "blocos"])
+def test_uma_data_nao_muda_a_saida(tmp_path, entrada, extra):
+    unique = _unique(entrada, tmp_path / "out", ["30/09/2025"], *extra)
+    assert not [c for c in unique.columns if c.startswith("status_automatico_")]
+
+    esperado = ps.finalize_result(
+        pd.DataFrame({"data_fim_vigencia": pd.to_datetime(FIM, dayfirst=True)}), pd.Timestamp("2025-09-30"))
+    assert list(unique["status_automatico"].fillna("")) == list(esperado["status_automatico"].fillna(""))
+
+
+@pytest.mark.parametrize("extra", [[], ["--chunked"]], ids=["normal", "blocos"])
+def test_cada_data_ganha_sua_coluna(tmp_path, entrada, extra):
+    datas = ["30/09/2025", "31/12/2025", "hoje"]
+    varias = _unique(entrada, tmp_path / "varias", datas, *extra)
+    base = _unique(entrada, tmp_path / "base", datas[:1], *extra)
+
+    novas = [ps.status_column_name(d) for d in ps.parse_reference_dates(datas)]
+    i = list(varias.columns).index("status_automatico")
+    assert list(varias.columns[i + 1:i + 1 + len(novas)]) == novas
+    # Sem as colunas novas, a saída é a mesma da execução só com a primeira data
+    pd.testing.assert_frame_equal(varias.drop(columns=novas), base)
+    for texto, coluna in zip(datas, novas):
+        sozinha = _unique(entrada, tmp_path / coluna, [texto], *extra)
+        assert list(varias[coluna].fillna("")) == list(sozinha["status_automatico"].fillna("")), texto
+
+
+def test_data_invalida_e_erro(tmp_path, entrada, capsys):
+    with pytest.raises(SystemExit) as e:
+        ps.executar(["-i", str(entrada), "-o", str(tmp_path / "out"), "--data", "30/09/2025", "31/02/2025"])
+    assert e.value.code == 1
+    assert "ERRO: data de referência inválida: '31/02/2025'" in capsys.readouterr().out
+    assert not list((tmp_path / "out").glob("*_automatico.xlsx"))
@@ -0,0 +1,26 @@
+"""duplicate_rows marca as mesmas linhas que DataFrame.duplicated, pelos dois caminhos."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import processa_seguradoras as ps
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from bench_deduplicacao import aleatorio  # noqa: E402
+
+
+@pytest.mark.parametrize("impressao", [False, True], ids=["duplicated", "impressao_digital"])
+@pytest.mark.parametrize("caso", range(40))
+def test_igual_ao_duplicated(monkeypatch, caso, impressao):
+    if impressao:
+        monkeypatch.setattr(ps, "DEDUP_FINGERPRINT_MIN_ROWS", 0)
+        monkeypatch.setattr(ps, "DEDUP_FINGERPRINT_MIN_COLS", 0)
+    rng = np.random.default_rng(caso)
+    df = aleatorio(rng, int(rng.integers(0, 300)), int(rng.integers(1, 5)))
+    subset = list(rng.choice(df.columns, int(rng.integers(1, len(df.columns) + 1)), replace=False)) \
+        if caso % 2 else None
+    assert np.array_equal(ps.duplicate_rows(df, subset), df.duplicated(subset=subset).to_numpy())
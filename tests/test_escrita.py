@@ -0,0 +1,55 @@
+"""Gravação em worksheets write-only: valores que o openpyxl recusa não podem derrubar a planilha."""
+
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+import processa_seguradoras as ps
+
+
+def _gravar_e_ler(tmp_path, df, **kwargs):
+    wb = Workbook(write_only=True)
+    ps.append_frame_rows(wb.create_sheet("dados"), df, **kwargs)
+    wb.save(tmp_path / "saida.xlsx")
+    return list(load_workbook(tmp_path / "saida.xlsx")["dados"].values)
+
+
+class Qualquer:
+    def __str__(self):
+        return "qualquer\x07objeto"
+
+
+def test_caracteres_de_controle_e_objetos(tmp_path):
+    df = pd.DataFrame({
+        "texto": ["ok", "bad\x01char", None],
+        "objeto": [object, Qualquer(), 3],
+        "str": pd.Series(["a\x02b", "c", None], dtype="str"),
+        "numero": [1.5, float("nan"), 2.0],
+        "data": pd.to_datetime(["2025-01-31", None, "2025-12-31"]),
+        "com_fuso": [pd.Timestamp("2025-01-01", tz="UTC"), None, None],
+    })
+    linhas = _gravar_e_ler(tmp_path, df, chunk_rows=2)
+    assert linhas[0] == tuple(df.columns)
+    assert [l[0] for l in linhas[1:]] == ["ok", "badchar", None]
+    assert linhas[1][1] == str(object)
+    assert linhas[2][1] == "qualquerobjeto"
+    assert linhas[3][1] == 3
+    assert [l[2] for l in linhas[1:]] == ["ab", "c", None]
+    assert [l[3] for l in linhas[1:]] == [1.5, None, 2.0]
+    assert [l[4] for l in linhas[1:]] == [datetime(2025, 1, 31), None, datetime(2025, 12, 31)]
+    assert linhas[1][5] == "2025-01-01 00:00:00+00:00"
+
+
+def test_cabecalho_com_caracteres_de_controle(tmp_path):
+    linhas = _gravar_e_ler(tmp_path, pd.DataFrame({"col\x0buna": [1]}))
+    assert linhas == [("coluna",), (1,)]
+
+
+def test_writer_streaming_com_valores_invalidos(tmp_path):
+    result = pd.DataFrame({"num_apolice": ["A\x01", "B"], "is": [1.0, 2.0]})
+    raw = pd.DataFrame({"Apólice": ["A\x01", object()], "IS": ["1,0", "2,0"]})
+    ps.write_output_streaming(tmp_path / "out.xlsx", result, raw)
+    wb = load_workbook(tmp_path / "out.xlsx")
+    assert list(wb["UNIQUE"].values)[1] == ("A", 1.0)
+    assert len(list(wb["original"].values)) == 3
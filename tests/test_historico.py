@@ -0,0 +1,50 @@
+"""Histórico: arquivos reaproveitados pelo --incremental não contam como execução nova."""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import consulta_historico as ch
+import processa_seguradoras as ps
+
+CFG = json.loads((Path(__file__).resolve().parents[1] / "config.json").read_text(encoding="utf-8"))
+
+
+def _linha(arquivo, incremental):
+    return {"run_id": None, "arquivo": arquivo, "status": "ok", "modo": "agrupar",
+            "linhas_entrada": 10, "linhas_saida": 5, "incremental": incremental}
+
+
+def _gravar(log_dir, run_id, incremental):
+    execucao = {"run_id": run_id, "data_execucao": f"2025-10-0{run_id} 10:00:00"}
+    linhas = [dict(_linha("AXA_2025_09.xlsx", incremental), run_id=run_id)]
+    ps.write_history(log_dir, execucao, linhas, CFG)
+
+
+def test_consultas_ignoram_reaproveitados(tmp_path):
+    _gravar(tmp_path, "1", None)
+    _gravar(tmp_path, "2", "processado")
+    _gravar(tmp_path, "3", "reaproveitado")
+    conn = ch.conectar(tmp_path)
+    try:
+        assert conn.execute(ch.consulta(conn, "ultimo-ok-seguradora"), ("AXA",)).fetchone()[-1] == "2"
+        assert conn.execute(ch.consulta(conn, "ultimo-ok")).fetchone()[-1] == "2"
+        assert len(conn.execute(ch.consulta(conn, "tendencia"), ("AXA", 50)).fetchall()) == 2
+        assert len(conn.execute(ch.consulta(conn, "arquivo"), ("AXA_2025_09.xlsx", 50)).fetchall()) == 2
+        total = conn.execute("SELECT incremental FROM arquivos ORDER BY run_id").fetchall()
+        assert total == [(None,), ("processado",), ("reaproveitado",)]
+    finally:
+        conn.close()
+
+
+def test_banco_antigo_sem_coluna_incremental(tmp_path):
+    conn = sqlite3.connect(tmp_path / ch.HISTORY_DB_NAME)
+    conn.execute("CREATE TABLE arquivos (run_id, data_execucao, arquivo, seguradora, status, linhas_entrada, linhas_saida)")
+    conn.execute("INSERT INTO arquivos VALUES ('1', '2025-10-01', 'AXA.xlsx', 'AXA', 'ok', 1, 1)")
+    conn.commit()
+    conn.close()
+    conn = ch.conectar(tmp_path)
+    try:
+        assert conn.execute(ch.consulta(conn, "ultimo-ok")).fetchone()[-1] == "1"
+    finally:
+        conn.close()
@@ -0,0 +1,119 @@
+"""Manifesto do --incremental: o que é reaproveitado e o que invalida o resultado anterior."""
+
+import json
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import processa_seguradoras as ps
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def pastas(tmp_path):
+    entrada = tmp_path / "in"
+    entrada.mkdir()
+    for nome, numeros in (("AXA_2025_09.csv", ["1", "2"]), ("TOKIO_2025_09.csv", ["3", "3"])):
+        pd.DataFrame({"apolice": numeros, "is": [10.0, 20.0], "fim vigencia": "31/12/2025"}).to_csv(
+            entrada / nome, index=False)
+    # Sem coluna de apólice: termina em erro (colunas_nao_encontradas)
+    pd.DataFrame({"x": [1]}).to_csv(entrada / "ERRO_2025_09.csv", index=False)
+    cfg_path = tmp_path / "config.json"
+    cfg_path.write_text((ROOT / "config.json").read_text(encoding="utf-8"), encoding="utf-8")
+    return entrada, tmp_path / "out", cfg_path
+
+
+def _rodar(pastas, capsys, *extra, data="30/09/2025") -> dict:
+    """Executa com --incremental e devolve {arquivo: 'reaproveitado' | 'processado' | 'erro'}."""
+    entrada, saida, cfg_path = pastas
+    capsys.readouterr()
+    ps.executar(["-i", str(entrada), "-o", str(saida), "-c", str(cfg_path), "--no-cache", "--no-consolidado",
+                 "--incremental", "--data", data, *extra])
+    estados = {}
+    for linha in capsys.readouterr().out.splitlines():
+        m = re.match(r"\[(OK|ERRO)\] (\S+) ->", linha)
+        if m:
+            reaproveitado = "sem alterações" in linha
+            estados[m.group(2)] = "reaproveitado" if reaproveitado else ("processado" if m.group(1) == "OK" else "erro")
+    return estados
+
+
+def test_reaproveita_o_que_nao_mudou(pastas, capsys):
+    assert _rodar(pastas, capsys) == {"AXA_2025_09.csv": "processado", "TOKIO_2025_09.csv": "processado",
+                                      "ERRO_2025_09.csv": "erro"}
+    # Arquivo com erro nunca é reaproveitado: roda de novo mesmo sem mudar
+    assert _rodar(pastas, capsys) == {"AXA_2025_09.csv": "reaproveitado", "TOKIO_2025_09.csv": "reaproveitado",
+                                      "ERRO_2025_09.csv": "erro"}
+
+    entrada, saida, _ = pastas
+    resumo = pd.read_excel(saida / "_resumo_processamento.xlsx")
+    assert dict(zip(resumo["file"], resumo["incremental"])) == {
+        "AXA_2025_09.csv": "reaproveitado", "TOKIO_2025_09.csv": "reaproveitado", "ERRO_2025_09.csv": "processado"}
+
+    # Mesmo conteúdo com outra data de modificação: reaproveita (o hash do conteúdo não mudou)
+    st = (entrada / "AXA_2025_09.csv").stat()
+    os.utime(entrada / "AXA_2025_09.csv", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert _rodar(pastas, capsys)["AXA_2025_09.csv"] == "reaproveitado"
+
+    # Conteúdo novo: reprocessa só ele
+    pd.DataFrame({"apolice": ["9"], "is": [1.0], "fim vigencia": "31/12/2025"}).to_csv(
+        entrada / "AXA_2025_09.csv", index=False)
+    estados = _rodar(pastas, capsys)
+    assert estados["AXA_2025_09.csv"] == "processado"
+    assert estados["TOKIO_2025_09.csv"] == "reaproveitado"
+
+
+def test_outra_data_invalida(pastas, capsys):
+    _rodar(pastas, capsys)
+    estados = _rodar(pastas, capsys, data="31/12/2025")
+    assert estados["AXA_2025_09.csv"] == estados["TOKIO_2025_09.csv"] == "processado"
+    # Mais uma data na lista também muda a saída
+    estados = _rodar(pastas, capsys, "31/03/2026", data="31/12/2025")
+    assert estados["AXA_2025_09.csv"] == "processado"
+    assert _rodar(pastas, capsys, "31/03/2026", data="31/12/2025")["AXA_2025_09.csv"] == "reaproveitado"
+
+
+def test_mudanca_no_config_invalida(pastas, capsys):
+    _, _, cfg_path = pastas
+    _rodar(pastas, capsys)
+    cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
+    cfg["cache"]["max_mb"] = 10  # seção de execução: não muda as saídas
+    cfg_path.write_text(json.dumps(cfg), encoding="utf-8")
+    assert _rodar(pastas, capsys)["AXA_2025_09.csv"] == "reaproveitado"
+
+    cfg["column_synonyms"]["is"].append("valor da garantia")
+    cfg_path.write_text(json.dumps(cfg), encoding="utf-8")
+    estados = _rodar(pastas, capsys)
+    assert estados["AXA_2025_09.csv"] == estados["TOKIO_2025_09.csv"] == "processado"
+
+
+def test_nova_versao_do_script_invalida(pastas, capsys, monkeypatch):
+    _rodar(pastas, capsys)
+    monkeypatch.setattr(ps, "SCRIPT_VERSION", ps.SCRIPT_VERSION + ".teste")
+    estados = _rodar(pastas, capsys)
+    assert estados["AXA_2025_09.csv"] == estados["TOKIO_2025_09.csv"] == "processado"
+
+
+def test_force_reprocessa_tudo(pastas, capsys):
+    _rodar(pastas, capsys)
+    assert set(_rodar(pastas, capsys, "--force").values()) == {"processado", "erro"}
+    # --force também regrava o manifesto: sem ele, volta a reaproveitar
+    assert _rodar(pastas, capsys)["AXA_2025_09.csv"] == "reaproveitado"
+
+
+def test_saida_apagada_ou_manifesto_corrompido_reprocessa(pastas, capsys):
+    _, saida, _ = pastas
+    _rodar(pastas, capsys)
+    (arquivo,) = saida.glob("AXA_2025_09__*_automatico.xlsx")
+    arquivo.unlink()
+    estados = _rodar(pastas, capsys)
+    assert estados["AXA_2025_09.csv"] == "processado"
+    assert estados["TOKIO_2025_09.csv"] == "reaproveitado"
+
+    (saida / ps.MANIFEST_NAME).write_text("{corrompido", encoding="utf-8")
+    assert ps.load_manifest(saida) == {}
+    assert _rodar(pastas, capsys)["TOKIO_2025_09.csv"] == "processado"
@@ -0,0 +1,131 @@
+"""Índice consolidado de apólices: chave sem zeros à esquerda, apólices repetidas e formatos só de dados."""
+
+import builtins
+import json
+import pickle
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import processa_seguradoras as ps
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_REF = pd.Timestamp("2025-09-30")
+
+
+@pytest.fixture
+def cfg():
+    cfg = json.loads((ROOT / "config.json").read_text(encoding="utf-8"))
+    cfg["consolidado"] = {"enabled": True, "formato": "feather"}
+    return cfg
+
+
+def _resultado(numeros, fim="2026-01-31"):
+    df = pd.DataFrame({
+        "num_apolice": pd.Series(numeros, dtype=object),
+        "is": [1000.0 * (i + 1) for i in range(len(numeros))],
+        "data_fim_vigencia": pd.Timestamp(fim),
+    })
+    return ps.finalize_result(df, DATA_REF)
+
+
+@pytest.fixture
+def indice(tmp_path, cfg):
+    arquivos = {
+        "AXA_2025_09.xlsx": ["000123", "456", "ABC-1"],
+        "TOKIO_2025_09.xlsx": [123.0, "789", "0456"],
+        "CESCE_2025_09.xlsx": ["999"],
+    }
+    resumos = []
+    for nome, numeros in arquivos.items():
+        parte = ps.write_consolidation_part(tmp_path, Path(nome).stem, nome, "agrupar", _resultado(numeros), cfg)
+        resumos.append({"status": "ok", "parte_consolidado": parte})
+    info = ps.build_consolidated_index(tmp_path, resumos, cfg)
+    return info, ps.load_policy_index(tmp_path)
+
+
+@pytest.mark.parametrize("numero", ["123", "000123", 123, 123.0, " 0123 "])
+def test_lookup_ignora_zeros_a_esquerda(indice, numero):
+    _, idx = indice
+    achadas = idx.lookup(numero)
+    assert sorted(achadas["seguradora"]) == ["AXA", "TOKIO"]
+    assert set(achadas["chave_apolice"]) == {"123"}
+
+
+def test_lookup_texto_e_inexistentes(indice):
+    _, idx = indice
+    assert list(idx.lookup("ABC-1")["seguradora"]) == ["AXA"]
+    assert idx.lookup("0ABC-1").empty  # com letras a chave é o texto, sem tirar zeros
+    assert idx.lookup("124").empty
+    assert idx.lookup(None).empty
+    assert len(idx) == 7
+
+
+def test_apolices_em_varios_arquivos(indice, tmp_path):
+    info, _ = indice
+    repetidas = pd.read_csv(info["repetidas"], encoding="utf-8-sig", dtype=str)
+    assert Path(info["repetidas"]) == tmp_path / "_consolidado" / "apolices_em_varios_arquivos.csv"
+    pares = sorted(zip(repetidas["chave_apolice"], repetidas["arquivo"]))
+    assert pares == [("123", "AXA_2025_09.xlsx"), ("123", "TOKIO_2025_09.xlsx"),
+                     ("456", "AXA_2025_09.xlsx"), ("456", "TOKIO_2025_09.xlsx")]
+    assert info["apolices"] == 5
+
+    totais = pd.read_excel(info["resumo"], sheet_name="por_seguradora").set_index("seguradora")
+    assert totais.loc["AXA", "apolices_em_varios_arquivos"] == 2
+    assert totais.loc["TOKIO", "apolices_em_varios_arquivos"] == 2
+    assert totais.loc["CESCE", "apolices_em_varios_arquivos"] == 0
+
+
+def test_formato_pickle_e_recusado(cfg):
+    cfg["consolidado"]["formato"] = "pickle"
+    with pytest.raises(ValueError, match="consolidado.formato"):
+        ps.validate_config(cfg)
+
+
+def test_indice_em_pickle_nunca_e_lido(tmp_path, monkeypatch):
+    class Malicioso:
+        def __reduce__(self):
+            return (exec, ("import builtins; builtins._indice_pickle_executado = True",))
+
+    cons_dir = tmp_path / "_consolidado"
+    cons_dir.mkdir()
+    (cons_dir / "indice_apolices.pickle").write_bytes(pickle.dumps(Malicioso()))
+    monkeypatch.delattr(builtins, "_indice_pickle_executado", raising=False)
+
+    with pytest.raises(FileNotFoundError):
+        ps.load_policy_index(tmp_path)
+    assert not hasattr(builtins, "_indice_pickle_executado")
+
+
+def test_regravar_remove_indice_pickle_antigo(tmp_path, cfg):
+    cons_dir = tmp_path / "_consolidado"
+    cons_dir.mkdir()
+    (cons_dir / "indice_apolices.pickle").write_bytes(b"antigo")
+    parte = ps.write_consolidation_part(tmp_path, "AXA_2025_09", "AXA_2025_09.xlsx", "agrupar", _resultado(["1"]), cfg)
+    ps.build_consolidated_index(tmp_path, [{"status": "ok", "parte_consolidado": parte}], cfg)
+    assert sorted(p.name for p in cons_dir.glob("indice_apolices.*")) == ["indice_apolices.feather"]
+
+
+def test_fatia_pickle_antiga_nao_e_reaproveitada(tmp_path):
+    saida = tmp_path / "AXA__agrupar_automatico.xlsx"
+    saida.write_bytes(b"")
+    impressao = {"hash_arquivo": "h", "hash_config": "c", "data_referencia": "2025-09-30", "versao_script": "v"}
+    entrada = dict(impressao, resumo={"status": "ok", "saida": str(saida),
+                                      "parte_consolidado": str(tmp_path / "partes" / "AXA.feather")})
+    assert ps.can_reuse(entrada, impressao)
+    entrada["resumo"]["parte_consolidado"] = str(tmp_path / "partes" / "AXA.pickle")
+    assert not ps.can_reuse(entrada, impressao)
+
+
+def test_sem_pyarrow_desliga_o_consolidado(tmp_path, monkeypatch, capsys):
+    entrada = tmp_path / "in"
+    entrada.mkdir()
+    pd.DataFrame({"apolice": ["1", "2"], "fim vigencia": ["31/12/2025", "31/01/2025"]}).to_csv(
+        entrada / "AXA_2025_09.csv", index=False)
+    monkeypatch.setattr(ps, "has_pyarrow", lambda: False)
+
+    ps.executar(["-i", str(entrada), "-o", str(tmp_path / "out"), "--data", "30/09/2025"])
+    assert "índice consolidado desligado" in capsys.readouterr().out
+    assert not (tmp_path / "out" / "_consolidado").exists()
+    assert list((tmp_path / "out").glob("AXA_2025_09__*_automatico.xlsx"))
@@ -0,0 +1,105 @@
+"""Leitura seletiva de colunas: mesmo resultado da leitura completa (csv/xlsx, em blocos ou não)."""
+
+import copy
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import processa_seguradoras as ps
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_leitura_seletiva import frame_largo  # noqa: E402
+
+DEDUP = ["num_apolice", "num_endosso", "data_emissao", "is"]
+
+
+@pytest.fixture
+def cfg():
+    cfg = json.loads((ROOT / "config.json").read_text(encoding="utf-8"))
+    cfg.update(cache={"enabled": False}, consolidado={"enabled": False},
+               output=dict(cfg.get("output") or {}, original_sheet="omitir"),
+               deduplicacao={"colunas": DEDUP})
+    return cfg
+
+
+def _rodar(arquivo, saida, cfg, seletiva, chunked):
+    cfg = copy.deepcopy(cfg)
+    cfg["leitura"] = dict(cfg.get("leitura") or {}, colunas_seletivas=seletiva)
+    cfg["processamento"] = {"chunked": chunked, "chunk_linhas": 700}
+    resumo = ps.process_file(arquivo, saida, cfg)
+    assert resumo["status"] == "ok", resumo.get("detalhe")
+    return resumo, pd.read_excel(resumo["saida"], sheet_name="UNIQUE")
+
+
+@pytest.mark.parametrize("chunked", [False, True], ids=["normal", "blocos"])
+@pytest.mark.parametrize("formato", ["csv", "xlsx"])
+def test_igual_a_leitura_completa(tmp_path, cfg, formato, chunked):
+    df = frame_largo(2000, 30, cfg, seed=1)
+    df = pd.concat([df, df.sample(200, random_state=1)], ignore_index=True)
+    arquivo = tmp_path / f"JUNTO_largo_agrupar.{formato}"
+    if formato == "xlsx":
+        df.to_excel(arquivo, index=False)
+    else:
+        df.to_csv(arquivo, index=False, sep=";")
+    completo, ref = _rodar(arquivo, tmp_path / "completo", cfg, False, chunked)
+    seletivo, novo = _rodar(arquivo, tmp_path / "seletivo", cfg, True, chunked)
+    assert "colunas_lidas" not in completo
+    assert seletivo["colunas_lidas"].endswith(f"/{df.shape[1]}")
+    assert seletivo["duplicadas_removidas"] == completo["duplicadas_removidas"] >= 200
+    pd.testing.assert_frame_equal(ref, novo, check_exact=False, rtol=1e-12)
+
+
+def test_sem_deduplicacao_colunas_le_tudo(tmp_path, cfg):
+    # Linhas iguais nas colunas reconhecidas e diferentes só em "Obs": não são repetidas
+    cfg["deduplicacao"] = {"colunas": None}
+    cfg["leitura"] = {"colunas_seletivas": True}
+    assert not ps.selective_reading(cfg)
+    assert "deduplicacao.colunas" in ps.selective_reading_issue(cfg)
+    df = pd.DataFrame({"Apólice": ["A1", "A1"], "IS": [100.0, 100.0], "Obs": ["x", "y"]})
+    arquivo = tmp_path / "JUNTO_obs_agrupar.xlsx"
+    df.to_excel(arquivo, index=False)
+    resumo = ps.process_file(arquivo, tmp_path / "saida", cfg)
+    assert "colunas_lidas" not in resumo and resumo["duplicadas_removidas"] == 0
+    assert pd.read_excel(resumo["saida"], sheet_name="UNIQUE")["is"].tolist() == [200.0]
+
+
+def test_colunas_de_deduplicacao_sao_lidas(tmp_path, cfg):
+    cfg["deduplicacao"] = {"colunas": ["num_apolice", "Obs"]}
+    cfg["leitura"] = {"colunas_seletivas": True}
+    arquivo = tmp_path / "JUNTO_obs_agrupar.csv"
+    pd.DataFrame({"Apólice": ["A1", "A1", "A1"], "IS": [100.0, 100.0, 100.0], "Extra": [1, 2, 3],
+                  "Obs": ["x", "y", "x"]}).to_csv(arquivo, index=False, sep=";")
+    colunas, _ = ps.select_columns_to_read(arquivo, cfg)
+    assert list(colunas.values()) == ["Apólice", "IS", "Obs"]
+    resumo = ps.process_file(arquivo, tmp_path / "saida", cfg)
+    assert resumo["colunas_lidas"] == "3/4" and resumo["duplicadas_removidas"] == 1
+    assert pd.read_excel(resumo["saida"], sheet_name="UNIQUE")["is"].tolist() == [200.0]
+
+
+def test_xlsx_posicoes_iguais_a_aba_inteira(tmp_path):
+    # Linhas vazias no meio e no fim, e linha com valor só numa coluna não lida
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["a", "b", "c", "d"])
+    ws.append([1, "x", 2.5, None])
+    ws.append([None, None, None, "só d"])
+    ws.append([])
+    ws.append([3, "z", None, 4])
+    ws.append([5.0, "y", "2025-01-01", None])
+    ws.append([])
+    arquivo = tmp_path / "abas.xlsx"
+    wb.save(arquivo)
+    completo = next(ps._iter_xlsx_chunks(arquivo, 10**9))
+    for posicoes in ([0, 2], [1], [3, 0]):
+        parcial = next(ps._iter_xlsx_chunks(arquivo, 10**9, sorted(posicoes)))
+        esperado = completo.iloc[:, sorted(posicoes)]
+        pd.testing.assert_frame_equal(parcial, esperado)
+    assert len(completo) == 5 and np.isnan(completo.iloc[2, 0])
@@ -0,0 +1,47 @@
+"""Modo ULTIMO: latest_per_policy dá as mesmas linhas, na mesma ordem, que sort_for_latest + drop_duplicates."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import processa_seguradoras as ps
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from bench_ultimo import antigo, endossos  # noqa: E402
+
+COLUNAS = [("data_emissao", "num_endosso"), ("data_emissao", None), (None, "num_endosso"), (None, None)]
+
+
+def _confere(df):
+    for col_emissao, col_endosso in COLUNAS:
+        ref = antigo(df, col_emissao, col_endosso)
+        novo = ps.latest_per_policy(df, col_emissao, col_endosso)
+        assert ref.index.equals(novo.index), (col_emissao, col_endosso)
+        pd.testing.assert_frame_equal(novo, ref)
+
+
+@pytest.mark.parametrize("caso", range(200))
+def test_aleatorio(caso):
+    # Empates (poucas datas), datas/endossos vazios, endosso em texto e entrada já ordenada
+    rng = np.random.default_rng(caso)
+    n = int(rng.integers(1, 400))
+    df = endossos(n, max(1, n // int(rng.integers(1, 6))), rng, vazios=float(rng.choice([0, 0.1, 0.5])),
+                  texto=caso % 3 == 1, datas=int(rng.choice([3, 30, 400])))
+    if caso % 4 == 3:  # já ordenada: usa o caminho rápido
+        df = pd.concat([antigo(df, "data_emissao", "num_endosso"), df]).reset_index(drop=True)
+    _confere(df)
+
+
+def test_empates_e_vazios():
+    df = pd.DataFrame({
+        "num_apolice": pd.Series(["A", "A", "A", "B", "B", "C", "C"], dtype="str"),
+        "data_emissao": pd.to_datetime(["2025-01-01", "2025-01-01", None, None, None, "2024-01-01", "2024-01-01"]),
+        "num_endosso": [1.0, 1.0, 9.0, np.nan, np.nan, np.nan, 2.0],
+        "linha": range(7),
+    })
+    _confere(df)
+    _confere(df.assign(num_endosso=pd.Series(["E1", "E1", "E9", None, None, None, "E2"], dtype="str")))
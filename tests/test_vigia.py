@@ -0,0 +1,31 @@
+"""--watch: um lote que falha não derruba a vigia e os arquivos voltam para a fila."""
+
+import threading
+from argparse import Namespace
+
+import processa_seguradoras as ps
+
+
+def test_lote_com_erro_e_refeito_na_proxima_varredura(tmp_path, monkeypatch, capsys):
+    entrada, log_dir = tmp_path / "entrada", tmp_path / "log"
+    entrada.mkdir()
+    log_dir.mkdir()
+    (entrada / "SEGURADORA_A_agrupar.xlsx").write_bytes(b"x")
+    cancelar = threading.Event()
+    lotes = []
+
+    def process_batch(args, cfg, files, log_dir, cancelar=None, anteriores=None):
+        lotes.append([p.name for p in files])
+        if len(lotes) == 1:
+            raise PermissionError("_resumo_processamento.xlsx aberto")
+        cancelar.set()
+        return [{"file": p.name, "status": "ok"} for p in files]
+
+    monkeypatch.setattr(ps, "process_batch", process_batch)
+    args = Namespace(input=str(entrada), watch_intervalo=0.01, watch_estavel=0)
+    ps.watch_folder(args, {}, log_dir, cancelar=cancelar)
+
+    assert lotes == [["SEGURADORA_A_agrupar.xlsx"]] * 2
+    assert "ERRO no lote: PermissionError" in capsys.readouterr().out
+    log = (log_dir / "vigia_erros.log").read_text(encoding="utf-8")
+    assert "pendentes: SEGURADORA_A_agrupar.xlsx" in log and "PermissionError" in log